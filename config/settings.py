@@ -13,13 +13,15 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 import os
 from pathlib import Path
 
-import dj_database_url
-
-from dotenv import load_dotenv
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env")
+
+# Production sets real environment variables, so only import and parse
+# dotenv when a local .env file exists.
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
 
 
 def _env_bool(name: str, default: bool = False) -> bool:
@@ -71,6 +73,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "planner.middleware.ReadYourWritesMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -101,15 +104,32 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Optional server-side pooling (psycopg 3 pool) for PostgreSQL. Pooled
+# connections replace persistent ones, so CONN_MAX_AGE is forced to 0.
+# Other engines ignore these settings.
+DATABASE_POOL = _env_bool("DATABASE_POOL", False)
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "2"))
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "10"))
+
+
+def _database_config(url: str) -> dict:
+    import dj_database_url
+
+    config = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+    if DATABASE_POOL and config["ENGINE"] == "django.db.backends.postgresql":
+        config["CONN_MAX_AGE"] = 0
+        config.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DATABASE_POOL_MIN_SIZE,
+            "max_size": DATABASE_POOL_MAX_SIZE,
+            "timeout": DATABASE_POOL_TIMEOUT,
+        }
+    return config
+
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL:
-    DATABASES = {
-        "default": dj_database_url.parse(
-            DATABASE_URL,
-            conn_max_age=600,
-            conn_health_checks=True,
-        )
-    }
+    DATABASES = {"default": _database_config(DATABASE_URL)}
 else:
     DATABASES = {
         "default": {
@@ -118,6 +138,55 @@ else:
         }
     }
 
+# Optional read replica. Dashboard and results reads opt in to it; writes
+# and reads shortly after a session's write stay on the primary.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+DATABASE_REPLICA_ALIAS = None
+if DATABASE_REPLICA_URL:
+    DATABASE_REPLICA_ALIAS = "replica"
+    DATABASES[DATABASE_REPLICA_ALIAS] = _database_config(DATABASE_REPLICA_URL)
+    DATABASES[DATABASE_REPLICA_ALIAS]["TEST"] = {"MIRROR": "default"}
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "10"))
+# After failing to connect to the replica, read from the primary this long
+# before trying it again.
+DATABASE_REPLICA_RETRY_SECONDS = int(os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30"))
+DATABASE_ROUTERS = ["planner.db_routers.PrimaryReplicaRouter"]
+
+# Bearer token for monitoring endpoints such as /metrics/db-pool. Staff
+# users can read them without it.
+MONITORING_TOKEN = os.getenv("MONITORING_TOKEN", "")
+# /readyz reruns its dependency checks at most this often. It always
+# reports the AI breaker state; only with READINESS_REQUIRE_AI does an open
+# breaker make the instance unready. That is off by default because an AI
+# outage hits every instance at once, the local fallback keeps the site
+# useful, and an instance out of rotation gets no new samples to recover.
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "5"))
+READINESS_REQUIRE_AI = _env_bool("READINESS_REQUIRE_AI", False)
+
+
+# Cache
+# Rate limits, the AI call cap, idempotency keys and the monitoring
+# counters live in the cache and must be shared by every worker and
+# instance, so production points REDIS_URL at a shared Redis/Valkey. With
+# CACHE_REQUIRE_SHARED (on unless DEBUG), /readyz fails while the cache is
+# the per-process fallback, so a deploy without REDIS_URL never goes live.
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_REQUIRE_SHARED = _env_bool("CACHE_REQUIRE_SHARED", not DEBUG)
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -167,17 +236,123 @@ STORAGES = {
 
 if not DEBUG:
     STORAGES["staticfiles"] = {
-        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+        "BACKEND": "planner.storage.MinifiedCompressedManifestStaticFilesStorage",
     }
 
+# Stylesheets purged of unused rules and minified by collectstatic. Whitenoise
+# then fingerprints them, writes .gz and .br variants and serves the hashed
+# names with a ten-year immutable Cache-Control.
+STATIC_MINIFY_CSS = ["planner/style.css"]
+
 EMAIL_BACKEND = os.getenv(
     "EMAIL_BACKEND",
     "django.core.mail.backends.console.EmailBackend"
     if DEBUG
     else "django.core.mail.backends.smtp.EmailBackend",
 )
+# SMTP server for the smtp backend; the outbox worker is the only sender.
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = _env_bool("EMAIL_USE_TLS", True)
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@datenite.local")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+OUTBOX_RETRY_MAX_SECONDS = int(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
 ENABLE_AI = os.getenv("ENABLE_AI", "True") == "True"
+# Collect question-schema requests arriving within this window into one
+# Gemini call. 0 disables batching.
+QUESTION_BATCH_WINDOW_MS = int(os.getenv("QUESTION_BATCH_WINDOW_MS", "0"))
+QUESTION_BATCH_MAX_SIZE = int(os.getenv("QUESTION_BATCH_MAX_SIZE", "8"))
+# Reuse a stored question schema when a new couple's descriptions are at
+# least this similar (estimated Jaccard over word shingles).
+SCHEMA_LIBRARY_ENABLED = _env_bool("SCHEMA_LIBRARY_ENABLED", True)
+SCHEMA_LIBRARY_THRESHOLD = float(os.getenv("SCHEMA_LIBRARY_THRESHOLD", "0.6"))
+SCHEMA_LIBRARY_NUM_PERM = int(os.getenv("SCHEMA_LIBRARY_NUM_PERM", "64"))
+SCHEMA_LIBRARY_BANDS = int(os.getenv("SCHEMA_LIBRARY_BANDS", "16"))
+SCHEMA_LIBRARY_REFRESH_SECONDS = int(os.getenv("SCHEMA_LIBRARY_REFRESH_SECONDS", "60"))
+# Sliding-window limits as "<requests>/<seconds>", applied per session,
+# user, IP and plan.
+RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", True)
+# Proxies in front of the app that append to X-Forwarded-For (App Platform's
+# load balancer is one). The client IP is the hop the outermost of them
+# added; anything further left is client-supplied and ignored.
+RATE_LIMIT_TRUSTED_PROXIES = int(
+    os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0" if DEBUG else "1")
+)
+RATE_LIMITS = {
+    "generate": os.getenv("RATE_LIMIT_GENERATE", "10/600"),
+    "refine": os.getenv("RATE_LIMIT_REFINE", "20/600"),
+    "create_invite": os.getenv("RATE_LIMIT_CREATE_INVITE", "20/3600"),
+}
+# In-flight Gemini calls across all workers; extra calls use the local
+# fallback instead of waiting. 0 disables the cap.
+AI_MAX_CONCURRENT_CALLS = int(os.getenv("AI_MAX_CONCURRENT_CALLS", "4"))
+AI_SLOT_TIMEOUT_SECONDS = int(os.getenv("AI_SLOT_TIMEOUT_SECONDS", "120"))
+# Latency budgets, in seconds, for views that call Gemini. Each call gets
+# what is left of its request's budget as its timeout (capped at
+# AI_CALL_TIMEOUT_SECONDS) and is skipped in favour of the local fallback
+# when less than AI_MIN_CALL_SECONDS is left. Keep budgets below
+# GUNICORN_TIMEOUT.
+AI_REQUEST_BUDGETS = {
+    "vote": float(os.getenv("AI_BUDGET_VOTE_SECONDS", "15")),
+    "results": float(os.getenv("AI_BUDGET_RESULTS_SECONDS", "25")),
+}
+AI_CALL_TIMEOUT_SECONDS = float(os.getenv("AI_CALL_TIMEOUT_SECONDS", "30"))
+AI_MIN_CALL_SECONDS = float(os.getenv("AI_MIN_CALL_SECONDS", "1"))
+# Gemini models tried in order, as "<model>" or "<model>:<timeout seconds>".
+# Models failing more than AI_MODEL_DEMOTE_ERROR_RATE of their calls in the
+# last AI_MODEL_STATS_WINDOW_SECONDS move to the back of the chain.
+AI_MODELS = _env_list("AI_MODELS", ["gemini-2.0-flash"])
+AI_MODEL_STATS_WINDOW_SECONDS = int(os.getenv("AI_MODEL_STATS_WINDOW_SECONDS", "300"))
+AI_MODEL_STATS_MIN_SAMPLES = int(os.getenv("AI_MODEL_STATS_MIN_SAMPLES", "20"))
+AI_MODEL_DEMOTE_ERROR_RATE = float(os.getenv("AI_MODEL_DEMOTE_ERROR_RATE", "0.5"))
+# Start a second attempt when the first has not answered by its model's p90
+# latency; the first reply wins.
+AI_HEDGE_ENABLED = _env_bool("AI_HEDGE_ENABLED", False)
+# Vote and results forms carry an idempotency key. A replayed POST gets the
+# first one's redirect for IDEMPOTENCY_TTL_SECONDS; a concurrent duplicate
+# waits up to IDEMPOTENCY_WAIT_SECONDS for it. IDEMPOTENCY_LOCK_SECONDS
+# should cover the slowest request (GUNICORN_TIMEOUT).
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# City x week x question x option vote counts (planner/analytics.py). Votes
+# saved through the site update them straight away with
+# ANALYTICS_ROLLUP_ON_SAVE; `rollup_answers` catches up on everything else
+# (imports, legacy votes, deletions), reading rows older than
+# ANALYTICS_ROLLUP_LAG_SECONDS so slow transactions are not skipped.
+ANALYTICS_ROLLUP_ON_SAVE = _env_bool("ANALYTICS_ROLLUP_ON_SAVE", True)
+ANALYTICS_ROLLUP_BATCH_SIZE = int(os.getenv("ANALYTICS_ROLLUP_BATCH_SIZE", "500"))
+ANALYTICS_ROLLUP_LAG_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "30"))
+ANALYTICS_CACHE_SECONDS = int(os.getenv("ANALYTICS_CACHE_SECONDS", "300"))
+# Stages run in the gunicorn master before forking (see planner/warmup.py).
+# "ai" preloads google.genai and "database" opens a connection; both are off
+# by default to keep boots short and connections out of the master.
+WARMUP_STAGES = _env_list("WARMUP_STAGES", ["urls", "templates", "gazetteer"])
+# Boot time for settings, apps and the WSGI handler in a fresh interpreter,
+# checked by profile_startup and the test suite.
+COLD_START_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET_SECONDS", "1.5"))
+# Whole-page cache for login, signup and the anonymous home page. Bump
+# PAGE_CACHE_VERSION to drop every cached page after a template change.
+PAGE_CACHE_ENABLED = _env_bool("PAGE_CACHE_ENABLED", True)
+PAGE_CACHE_SECONDS = int(os.getenv("PAGE_CACHE_SECONDS", "300"))
+PAGE_CACHE_VERSION = os.getenv("PAGE_CACHE_VERSION", "1")
+# Plans per page on the anonymous home dashboard, which is backed by the
+# device index instead of a token list in the session.
+SESSION_DASHBOARD_PAGE_SIZE = int(os.getenv("SESSION_DASHBOARD_PAGE_SIZE", "10"))
+# A device's last-seen time on a plan link is refreshed at most this often,
+# so repeat page views do not write (and pin the session to the primary).
+DEVICE_LINK_TOUCH_SECONDS = int(os.getenv("DEVICE_LINK_TOUCH_SECONDS", "3600"))
+# Retention: guest plans with no votes or visits for RETENTION_PLAN_DAYS are
+# archived to gzipped JSONL and deleted by `manage.py apply_retention`.
+# Plans linked to an account use RETENTION_ACCOUNT_PLAN_DAYS (0 keeps them).
+RETENTION_PLAN_DAYS = int(os.getenv("RETENTION_PLAN_DAYS", "365"))
+RETENTION_ACCOUNT_PLAN_DAYS = int(os.getenv("RETENTION_ACCOUNT_PLAN_DAYS", "0"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR") or str(BASE_DIR / "archive")
 LOGIN_URL = "planner:login"
 LOGIN_REDIRECT_URL = "planner:home"
 LOGOUT_REDIRECT_URL = "planner:login"
@@ -16,11 +16,24 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.http import HttpResponse
 from django.urls import include, path
 
+from planner.health import (
+    ai_deadline_stats,
+    ai_model_stats,
+    answer_trend_stats,
+    db_pool_stats,
+    liveness,
+    readiness,
+)
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("healthz", lambda _request: HttpResponse(b"ok", content_type="text/plain")),
+    path("healthz", liveness, name="liveness"),
+    path("readyz", readiness, name="readiness"),
+    path("metrics/db-pool", db_pool_stats, name="db_pool_stats"),
+    path("metrics/ai-deadlines", ai_deadline_stats, name="ai_deadline_stats"),
+    path("metrics/ai-models", ai_model_stats, name="ai_model_stats"),
+    path("metrics/answer-trends", answer_trend_stats, name="answer_trend_stats"),
     path("", include("planner.urls")),
 ]
@@ -0,0 +1,50 @@
+"""Gunicorn settings for App Platform's 512MB instances.
+
+Requests spend most of their time waiting on Gemini and PostgreSQL, so a
+couple of preloaded processes with several threads each serve far more
+concurrent users than sync workers in the same memory.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# With gthread this is the worker heartbeat, not a request time limit: a
+# worker is restarted only when its main loop stops checking in, and a slow
+# request on one thread never trips it. Request time is bounded by the AI
+# budgets (AI_BUDGET_*_SECONDS) instead.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers now and then to cap slow memory growth.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+# Import Django once in the master so workers share its pages copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    # With preload_app the master has already imported Django; warm the
+    # shared caches once here so every forked worker starts with them.
+    if preload_app:
+        from planner.warmup import warm_up
+
+        timings = warm_up()
+        server.log.info(
+            "Warm-up: %s",
+            ", ".join(
+                f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items()
+            ),
+        )
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared across forks.
+    from django.db import connections
+
+    connections.close_all()
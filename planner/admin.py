@@ -1,23 +1,248 @@
+import uuid
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count
+from django.db.models.fields.json import KeyTextTransform
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
+
+from .analytics import answer_trends
+from .constants import DEFAULT_GENERATED_QUESTIONS
+from .models import (
+    AnswerRollup,
+    GeneratedVote,
+    OutboundEmail,
+    Participant,
+    Plan,
+    SchemaLibraryEntry,
+    Vote,
+)
+from .services import compatibility_overview
+
+# Weeks shown on the admin trends page.
+TREND_WEEKS = 8
+
+# Most recent plans scored for the compatibility section of the analytics page.
+COMPATIBILITY_SAMPLE_PLANS = 500
+
+
+def _estimated_rows(queryset):
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use PostgreSQL's planner estimate for unfiltered changelists of big
+    tables instead of a full ``COUNT(*)``."""
+
+    threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == "postgresql" and not queryset.query.where:
+            estimate = _estimated_rows(queryset)
+            if estimate > self.threshold:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
-from .models import GeneratedVote, Participant, Plan, Vote
+def _choice_questions():
+    return [
+        question
+        for question in DEFAULT_GENERATED_QUESTIONS["questions"]
+        if question["type"] == "single"
+    ]
+
+
+def answer_distribution(question_id):
+    """``{value: count}`` for one question across generated and legacy votes,
+    grouped in the database."""
+    counts = {}
+    generated = (
+        GeneratedVote.objects.filter(answers__has_key=question_id)
+        .annotate(choice=KeyTextTransform(question_id, "answers"))
+        .values("choice")
+        .annotate(total=Count("id"))
+    )
+    for row in generated:
+        if row["choice"]:
+            counts[row["choice"]] = counts.get(row["choice"], 0) + row["total"]
+    if question_id in {field.name for field in Vote._meta.concrete_fields}:
+        legacy = (
+            Vote.objects.exclude(**{question_id: ""})
+            .values(question_id)
+            .annotate(total=Count("id"))
+        )
+        for row in legacy:
+            counts[row[question_id]] = counts.get(row[question_id], 0) + row["total"]
+    return counts
 
 
 @admin.register(Plan)
-class PlanAdmin(admin.ModelAdmin):
+class PlanAdmin(LargeTableAdmin):
     list_display = ("id", "inviter_email", "invitee_email", "city", "created_at")
-    search_fields = ("inviter_email", "invitee_email", "city")
+    search_fields = ("=inviter_email", "=invitee_email")
+    raw_id_fields = ("created_by",)
+    readonly_fields = ("version",)
+    change_list_template = "admin/planner/plan/change_list.html"
+
+    def get_search_results(self, request, queryset, search_term):
+        # Cities contain spaces, so match the whole term rather than words.
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        city = search_term.strip()
+        if city:
+            results |= queryset.filter(city__iexact=city)
+        return results, may_have_duplicates
+
+    def get_urls(self):
+        return [
+            path(
+                "analytics/",
+                self.admin_site.admin_view(self.analytics_view),
+                name="planner_plan_analytics",
+            ),
+            path(
+                "analytics/trends/",
+                self.admin_site.admin_view(self.trends_view),
+                name="planner_plan_trends",
+            ),
+            *super().get_urls(),
+        ]
+
+    def analytics_view(self, request):
+        questions = []
+        for question in _choice_questions():
+            counts = answer_distribution(question["id"])
+            total = sum(counts.values())
+            labels = {
+                option["value"]: option["label"] for option in question["options"]
+            }
+            questions.append(
+                {
+                    "text": question["text"],
+                    "total": total,
+                    "rows": [
+                        {
+                            "label": labels.get(value, value),
+                            "count": count,
+                            "percent": round(100 * count / total) if total else 0,
+                        }
+                        for value, count in sorted(
+                            counts.items(), key=lambda item: item[1], reverse=True
+                        )
+                    ],
+                }
+            )
+        cities = (
+            Plan.objects.exclude(city="")
+            .values("city")
+            .annotate(total=Count("id"))
+            .order_by("-total")[:10]
+        )
+        overview = compatibility_overview(
+            Plan.objects.order_by("-created_at")[:COMPATIBILITY_SAMPLE_PLANS]
+        )
+        texts = {question["id"]: question["text"] for question in _choice_questions()}
+        compatibility = {
+            "couples": overview["couples"],
+            "percent": round(overview["mean_score"] * 100),
+            "rows": [
+                {
+                    "text": texts.get(question_id, question_id),
+                    "match_percent": round(item["match_rate"] * 100),
+                    "agreement_percent": round(item["mean_agreement"] * 100),
+                }
+                for question_id, item in sorted(
+                    overview["questions"].items(),
+                    key=lambda entry: entry[1]["mean_agreement"],
+                )
+            ],
+        }
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Plan analytics",
+            "questions": questions,
+            "cities": cities,
+            "compatibility": compatibility,
+        }
+        return TemplateResponse(request, "admin/planner/plan/analytics.html", context)
+
+    def trends_view(self, request):
+        city = request.GET.get("city")
+        trends = answer_trends(city=city, weeks=TREND_WEEKS)
+        questions = {question["id"]: question for question in _choice_questions()}
+        weeks = {}
+        for group in trends["trends"]:
+            question = questions.get(group["question"], {})
+            labels = {
+                option["value"]: option["label"]
+                for option in question.get("options", [])
+            }
+            weeks.setdefault(group["week"], []).append(
+                {
+                    "city": group["city"],
+                    "text": question.get("text", group["question"]),
+                    "winner": labels.get(group["winner"], group["winner"]),
+                    "percent": round(
+                        100 * group["options"][group["winner"]] / group["total"]
+                    ),
+                    "total": group["total"],
+                }
+            )
+        cities = (
+            AnswerRollup.objects.filter(count__gt=0)
+            .values_list("city", flat=True)
+            .distinct()
+            .order_by("city")
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Weekly answer trends",
+            "city": city,
+            "cities": cities,
+            "weeks": weeks.items(),
+            "processed_through": trends["processed_through"],
+        }
+        return TemplateResponse(request, "admin/planner/plan/trends.html", context)
 
 
 @admin.register(Participant)
-class ParticipantAdmin(admin.ModelAdmin):
+class ParticipantAdmin(LargeTableAdmin):
     list_display = ("id", "plan", "email", "role")
-    search_fields = ("email",)
+    list_select_related = ("plan",)
+    raw_id_fields = ("plan", "user")
+    search_fields = ("=email",)
     list_filter = ("role",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Support pastes a token from a link; match it on the unique index.
+        try:
+            token = uuid.UUID(search_term.strip())
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(token=token), False
+
 
 @admin.register(Vote)
-class VoteAdmin(admin.ModelAdmin):
+class VoteAdmin(LargeTableAdmin):
     list_display = (
         "id",
         "participant",
@@ -26,9 +251,28 @@ class VoteAdmin(admin.ModelAdmin):
         "budget_choice",
         "submitted_at",
     )
+    list_select_related = ("participant",)
+    raw_id_fields = ("participant",)
     list_filter = ("dinner_choice", "activity_choice", "budget_choice")
 
 
 @admin.register(GeneratedVote)
-class GeneratedVoteAdmin(admin.ModelAdmin):
+class GeneratedVoteAdmin(LargeTableAdmin):
     list_display = ("id", "participant", "submitted_at")
+    list_select_related = ("participant",)
+    raw_id_fields = ("participant",)
+
+
+@admin.register(SchemaLibraryEntry)
+class SchemaLibraryEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "locale", "hits", "created_at", "last_used_at")
+    list_filter = ("locale",)
+    readonly_fields = ("signatures",)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(LargeTableAdmin):
+    list_display = ("id", "to_email", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    search_fields = ("=to_email",)
+    raw_id_fields = ("plan",)
@@ -0,0 +1,286 @@
+"""City x week x question x option vote counts, maintained incrementally.
+
+Each vote's single-choice answers are counted once in :class:`AnswerRollup`,
+under its plan's canonical city and the week it was submitted. :class:`RolledUpVote`
+remembers what every vote added, so a re-saved vote swaps its old answers
+for the new ones and a deleted vote can be subtracted without recounting
+the vote tables. Votes saved through the site are applied in the transaction
+that saves them, and votes cleared by a new description are subtracted once
+that commits; the ``rollup_answers`` job applies everything newer than its
+per-table watermark and removes any other deleted votes.
+"""
+
+import hashlib
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import incr_counter
+from .localization import canonical_city
+from .models import AnswerRollup, GeneratedVote, RolledUpVote, RollupWatermark, Vote
+from .question_schema import normalize_schema
+from .signals import description_changed
+
+CACHE_PREFIX = "planner:analytics"
+
+LEGACY_FIELDS = (
+    "dinner_choice",
+    "activity_choice",
+    "sweet_choice",
+    "budget_choice",
+    "mood_choice",
+    "duration_choice",
+    "transport_choice",
+)
+
+
+def week_start(moment):
+    """The Monday of ``moment``'s week in the current time zone."""
+    day = timezone.localdate(moment)
+    return day - timedelta(days=day.weekday())
+
+
+def _generated_answers(vote):
+    schema = normalize_schema(vote.participant.plan.generated_questions)
+    answers = vote.answers or {}
+    counted = {}
+    for question in schema.get("questions", []):
+        if question.get("type") != "single":
+            continue
+        value = answers.get(question["id"])
+        if value in {option["value"] for option in question.get("options", [])}:
+            counted[question["id"]] = value
+    return counted
+
+
+def _legacy_answers(vote):
+    return {
+        field: getattr(vote, field) for field in LEGACY_FIELDS if getattr(vote, field)
+    }
+
+
+# Watermark source -> (vote model, RolledUpVote link field, answers to count).
+SOURCES = {
+    "generated": (GeneratedVote, "generated_vote", _generated_answers),
+    "legacy": (Vote, "vote", _legacy_answers),
+}
+
+
+def _add(deltas, city, week, answers, sign):
+    for question_id, option in answers.items():
+        deltas[(city, week, question_id, option)] += sign
+
+
+def _bump_generation():
+    incr_counter(f"{CACHE_PREFIX}:generation")
+
+
+def _apply(deltas):
+    # Sorted so concurrent writers lock rollup rows in the same order.
+    changed = False
+    for key in sorted(deltas):
+        delta = deltas[key]
+        if not delta:
+            continue
+        changed = True
+        city, week, question_id, option = key
+        rows = AnswerRollup.objects.filter(
+            city=city, week=week, question_id=question_id, option=option
+        )
+        if rows.update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                AnswerRollup.objects.create(
+                    city=city,
+                    week=week,
+                    question_id=question_id,
+                    option=option,
+                    count=delta,
+                )
+        except IntegrityError:
+            rows.update(count=F("count") + delta)
+    if changed:
+        transaction.on_commit(_bump_generation)
+
+
+def _refresh(source, vote, deltas):
+    """Swap what ``vote`` last contributed for its current answers. The
+    caller holds the vote's row lock, which serializes writers of its
+    :class:`RolledUpVote`."""
+    _model, link, answers_for = SOURCES[source]
+    city = canonical_city(vote.participant.plan.city)
+    week = week_start(vote.submitted_at)
+    answers = answers_for(vote)
+    try:
+        snapshot = vote.rollup
+    except RolledUpVote.DoesNotExist:
+        RolledUpVote.objects.create(
+            **{link: vote}, city=city, week=week, answers=answers
+        )
+    else:
+        if (snapshot.city, snapshot.week, snapshot.answers) == (city, week, answers):
+            return
+        _add(deltas, snapshot.city, snapshot.week, snapshot.answers, -1)
+        snapshot.city, snapshot.week, snapshot.answers = city, week, answers
+        snapshot.save(update_fields=["city", "week", "answers"])
+    _add(deltas, city, week, answers, 1)
+
+
+def rollup_vote(vote):
+    """Count a just-saved :class:`GeneratedVote`; call inside the
+    transaction that saved it."""
+    if not settings.ANALYTICS_ROLLUP_ON_SAVE:
+        return
+    deltas = Counter()
+    _refresh("generated", vote, deltas)
+    _apply(deltas)
+
+
+def _rollup_source(source, batch_size, cutoff):
+    model, _link, _answers = SOURCES[source]
+    with transaction.atomic():
+        watermark, _created = RollupWatermark.objects.get_or_create(source=source)
+        # Locking the watermark keeps two jobs from applying the same batch.
+        watermark = RollupWatermark.objects.select_for_update().get(pk=watermark.pk)
+        rows = model.objects.filter(submitted_at__lte=cutoff)
+        if watermark.submitted_at:
+            rows = rows.filter(
+                Q(submitted_at__gt=watermark.submitted_at)
+                | Q(submitted_at=watermark.submitted_at, id__gt=watermark.last_id)
+            )
+        batch = list(
+            rows.select_related("participant__plan", "rollup")
+            .select_for_update(of=("self",))
+            .order_by("submitted_at", "id")[:batch_size]
+        )
+        if not batch:
+            return 0
+        deltas = Counter()
+        for vote in batch:
+            _refresh(source, vote, deltas)
+        _apply(deltas)
+        watermark.submitted_at = batch[-1].submitted_at
+        watermark.last_id = batch[-1].id
+        watermark.save(update_fields=["submitted_at", "last_id", "updated_at"])
+    return len(batch)
+
+
+def _subtract(snapshots, limit=None):
+    """Remove the counts of ``snapshots`` and delete them, skipping rows
+    another worker is already removing."""
+    with transaction.atomic():
+        rows = RolledUpVote.objects.select_for_update(skip_locked=True).filter(
+            snapshots
+        )
+        gone = list(rows.order_by("id")[:limit] if limit else rows)
+        if not gone:
+            return 0
+        deltas = Counter()
+        for snapshot in gone:
+            _add(deltas, snapshot.city, snapshot.week, snapshot.answers, -1)
+        _apply(deltas)
+        RolledUpVote.objects.filter(id__in=[snapshot.id for snapshot in gone]).delete()
+    return len(gone)
+
+
+def _remove_deleted(batch_size):
+    # Snapshots whose vote row no longer exists, found with an anti-join.
+    gone = Q()
+    for model, link, _answers in SOURCES.values():
+        gone |= Q(**{f"{link}_id__isnull": False}) & ~Exists(
+            model.objects.filter(pk=OuterRef(f"{link}_id"))
+        )
+    return _subtract(gone, limit=batch_size)
+
+
+@receiver(description_changed)
+def _subtract_cleared_votes(sender, vote_ids, **kwargs):
+    # A new description deletes both partners' votes; drop them from the
+    # trends now instead of on the job's next pass.
+    cleared = Q()
+    for source, ids in vote_ids.items():
+        if ids:
+            cleared |= Q(**{f"{SOURCES[source][1]}_id__in": ids})
+    if cleared:
+        _subtract(cleared)
+
+
+def rollup_answers(batch_size: int | None = None, now=None) -> dict:
+    """Apply one batch of new or re-saved votes per vote table, and one
+    batch of deleted votes.
+
+    Only rows submitted more than ``ANALYTICS_ROLLUP_LAG_SECONDS`` ago are
+    read, so a transaction that commits after the watermark has passed its
+    timestamp is not skipped. Returns the number of votes handled per
+    table and the number of deleted votes removed.
+    """
+    batch_size = batch_size or settings.ANALYTICS_ROLLUP_BATCH_SIZE
+    cutoff = (now or timezone.now()) - timedelta(
+        seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS
+    )
+    stats = {source: _rollup_source(source, batch_size, cutoff) for source in SOURCES}
+    stats["removed"] = _remove_deleted(batch_size)
+    return stats
+
+
+def answer_trends(city=None, weeks: int = 8, question_id=None, today=None) -> dict:
+    """Option counts per city, week and question for the last ``weeks``
+    weeks, newest first, with each group's winning option.
+
+    Read from the rollup tables and cached for ``ANALYTICS_CACHE_SECONDS``;
+    any rollup change starts a new cache generation.
+    """
+    if city is not None:
+        city = canonical_city(city)
+    params = f"{city!r}:{weeks}:{question_id!r}:{today}"
+    digest = hashlib.sha256(params.encode()).hexdigest()[:16]
+    generation = cache.get(f"{CACHE_PREFIX}:generation", 0)
+    cache_key = f"{CACHE_PREFIX}:trends:{generation}:{digest}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    since = week_start(today or timezone.now()) - timedelta(weeks=weeks - 1)
+    rows = AnswerRollup.objects.filter(week__gte=since, count__gt=0)
+    if city is not None:
+        rows = rows.filter(city=city)
+    if question_id:
+        rows = rows.filter(question_id=question_id)
+    groups = {}
+    for row_city, week, row_question, option, count in rows.order_by(
+        "-week", "city", "question_id", "-count", "option"
+    ).values_list("city", "week", "question_id", "option", "count"):
+        group = groups.setdefault(
+            (row_city, week, row_question),
+            {
+                "city": row_city,
+                "week": week.isoformat(),
+                "question": row_question,
+                "total": 0,
+                "winner": option,
+                "options": {},
+            },
+        )
+        group["options"][option] = count
+        group["total"] += count
+
+    watermarks = dict(RollupWatermark.objects.values_list("source", "submitted_at"))
+    result = {
+        "city": city,
+        "since": since.isoformat(),
+        "weeks": weeks,
+        "processed_through": {
+            source: watermarks[source].isoformat() if watermarks.get(source) else None
+            for source in SOURCES
+        },
+        "trends": list(groups.values()),
+    }
+    cache.set(cache_key, result, timeout=settings.ANALYTICS_CACHE_SECONDS)
+    return result
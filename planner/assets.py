@@ -0,0 +1,215 @@
+"""Build-time CSS purging, minification and critical-CSS extraction."""
+
+import functools
+import re
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+
+APP_DIR = Path(__file__).resolve().parent
+STYLESHEET = "planner/style.css"
+ABOVE_THE_FOLD_TEMPLATE = APP_DIR / "templates" / "planner" / "base.html"
+
+# Self-hosted Latin subsets written by ``manage.py subset_fonts``. None are
+# committed yet; only files that exist are declared, and pages load Google
+# Fonts while none of them are built.
+FONT_FACES = (
+    ("Nunito", 400, "planner/fonts/nunito-latin-400.woff2", True),
+    ("Nunito", 600, "planner/fonts/nunito-latin-600.woff2", False),
+    (
+        "Cormorant Garamond",
+        500,
+        "planner/fonts/cormorant-garamond-latin-500.woff2",
+        False,
+    ),
+    (
+        "Cormorant Garamond",
+        700,
+        "planner/fonts/cormorant-garamond-latin-700.woff2",
+        True,
+    ),
+)
+# Loaded without blocking render until the self-hosted fonts are built.
+GOOGLE_FONTS_URL = (
+    "https://fonts.googleapis.com/css2?family=Cormorant+Garamond:wght@500;700"
+    "&family=Nunito:wght@400;600&display=swap"
+)
+# Google Fonts' "latin" subset.
+LATIN_UNICODE_RANGE = (
+    "U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, "
+    "U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, "
+    "U+2212, U+2215, U+FEFF, U+FFFD"
+)
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_SPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+_SELECTOR_NAME_RE = re.compile(r"[.#](-?[_a-zA-Z][\w-]*)")
+_TAG_RE = re.compile(r"(?:^|[\s>+~])([a-z][a-z0-9]*)")
+_SELECTOR_ARGS_RE = re.compile(r"\[[^\]]*\]|::?[\w-]+(?:\([^)]*\))?")
+_WORD_RE = re.compile(r"[\w-]+")
+# At-rules whose body holds rules that can be filtered individually.
+_GROUPING_AT_RULES = ("@media", "@supports", "@layer", "@container")
+
+
+def _mask_strings(css: str):
+    strings = []
+
+    def stash(match):
+        strings.append(match.group(0))
+        return f"\0{len(strings) - 1}\0"
+
+    return _STRING_RE.sub(stash, css), strings
+
+
+def _unmask_strings(css: str, strings) -> str:
+    return re.sub(r"\0(\d+)\0", lambda match: strings[int(match.group(1))], css)
+
+
+def _compact(css: str) -> str:
+    css = _SPACE_RE.sub(" ", _COMMENT_RE.sub("", css))
+    return _PUNCTUATION_RE.sub(r"\1", css).strip()
+
+
+def _compact_declarations(body: str) -> str:
+    declarations = []
+    for declaration in body.split(";"):
+        name, colon, value = declaration.partition(":")
+        if colon and name.strip():
+            declarations.append(f"{name.strip()}:{value.strip()}")
+    return ";".join(declarations)
+
+
+def parse(css: str):
+    """Split compacted, string-masked CSS into ``(prelude, body)`` blocks.
+
+    ``body`` is a declaration string, or a nested block list for grouping
+    at-rules such as ``@media``.
+    """
+    blocks = []
+    position = 0
+    while True:
+        start = css.find("{", position)
+        if start == -1:
+            break
+        prelude = css[position:start].strip()
+        depth = 1
+        end = start + 1
+        while depth and end < len(css):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+            end += 1
+        inner = css[start + 1 : end - 1]
+        if prelude.startswith(_GROUPING_AT_RULES):
+            prelude = re.sub(r"\s*:\s*", ":", prelude)
+            blocks.append((prelude, parse(inner)))
+        elif prelude.startswith("@keyframes"):
+            blocks.append((prelude, parse(inner)))
+        else:
+            blocks.append((prelude, _compact_declarations(inner)))
+        position = end
+    return blocks
+
+
+def serialize(blocks) -> str:
+    parts = []
+    for prelude, body in blocks:
+        if isinstance(body, list):
+            inner = serialize(body)
+            if inner:
+                parts.append(f"{prelude}{{{inner}}}")
+        else:
+            parts.append(f"{prelude}{{{body}}}")
+    return "".join(parts)
+
+
+def _selector_used(selector: str, tokens, match_tags: bool) -> bool:
+    if not all(name in tokens for name in _SELECTOR_NAME_RE.findall(selector)):
+        return False
+    if match_tags:
+        bare = _SELECTOR_ARGS_RE.sub("", selector)
+        return all(tag in tokens for tag in _TAG_RE.findall(bare))
+    return True
+
+
+def _filter(blocks, tokens, match_tags):
+    kept = []
+    for prelude, body in blocks:
+        if prelude.startswith(_GROUPING_AT_RULES):
+            kept.append((prelude, _filter(body, tokens, match_tags)))
+        elif prelude.startswith("@"):
+            kept.append((prelude, body))
+        else:
+            selectors = [
+                selector
+                for selector in prelude.split(",")
+                if _selector_used(selector, tokens, match_tags)
+            ]
+            if selectors:
+                kept.append((",".join(selectors), body))
+    return kept
+
+
+def _drop_unused_keyframes(blocks, css: str):
+    kept = []
+    for prelude, body in blocks:
+        if prelude.startswith(_GROUPING_AT_RULES):
+            kept.append((prelude, _drop_unused_keyframes(body, css)))
+        elif prelude.startswith("@keyframes"):
+            name = prelude.split(None, 1)[-1]
+            if re.search(rf"animation[\w-]*:[^;}}]*\b{re.escape(name)}\b", css):
+                kept.append((prelude, body))
+        else:
+            kept.append((prelude, body))
+    return kept
+
+
+def minify(css: str, tokens=None, match_tags: bool = False) -> str:
+    """Minify ``css``, dropping rules that name a class or id missing from
+    ``tokens`` when given. With ``match_tags``, element names must appear
+    in ``tokens`` too; otherwise element selectors are always kept."""
+    masked, strings = _mask_strings(css)
+    blocks = parse(_compact(masked))
+    if tokens is not None:
+        blocks = _filter(blocks, tokens, match_tags)
+        blocks = _drop_unused_keyframes(blocks, serialize(blocks))
+    return _unmask_strings(serialize(blocks), strings)
+
+
+def _words(paths) -> frozenset:
+    words = set()
+    for path in paths:
+        words.update(_WORD_RE.findall(Path(path).read_text(encoding="utf-8")))
+    return frozenset(words)
+
+
+def used_tokens() -> frozenset:
+    """Every word in the app's templates and Python, a superset of the
+    class names and ids the markup can produce."""
+    return _words([*APP_DIR.glob("templates/**/*.html"), *APP_DIR.glob("**/*.py")])
+
+
+@functools.cache
+def critical_css() -> str:
+    source = finders.find(STYLESHEET)
+    if not source:
+        return ""
+    css = Path(source).read_text(encoding="utf-8")
+    # Only the elements and classes of the page shell in base.html.
+    return minify(css, _words([ABOVE_THE_FOLD_TEMPLATE]), match_tags=True)
+
+
+@functools.cache
+def available_font_faces():
+    return tuple(face for face in FONT_FACES if finders.find(face[2]))
+
+
+def latin_codepoints():
+    codepoints = []
+    for part in LATIN_UNICODE_RANGE.split(","):
+        start, _, end = part.strip()[2:].partition("-")
+        codepoints.extend(range(int(start, 16), int(end or start, 16) + 1))
+    return codepoints
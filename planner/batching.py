@@ -0,0 +1,66 @@
+"""Micro-batching for AI requests that arrive close together."""
+
+import threading
+
+
+class _BatchJob:
+    def __init__(self, key, payload):
+        self.key = key
+        self.payload = payload
+        self.result = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Collect submissions for a short window and send them as one batch.
+
+    The first caller in a window becomes the leader: it waits up to
+    ``window_seconds`` (or until ``max_batch_size`` jobs are queued), then
+    hands every queued payload to ``send_batch`` and wakes the followers.
+    ``send_batch`` receives ``{key: payload}`` and returns ``{key: result}``;
+    keys missing from the result resolve to ``None`` so callers can fall back.
+    """
+
+    def __init__(self, send_batch, window_seconds: float, max_batch_size: int):
+        self.send_batch = send_batch
+        self.window_seconds = max(window_seconds, 0.0)
+        self.max_batch_size = max(max_batch_size, 1)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._batch_full = threading.Event()
+
+    def submit(self, key, payload):
+        job = _BatchJob(key, payload)
+        with self._lock:
+            self._pending.append(job)
+            is_leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch_size:
+                self._batch_full.set()
+
+        if not is_leader:
+            job.done.wait()
+            return job.result
+
+        self._batch_full.wait(self.window_seconds)
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._batch_full.clear()
+
+        for start in range(0, len(batch), self.max_batch_size):
+            self._dispatch(batch[start : start + self.max_batch_size])
+        return job.result
+
+    def _dispatch(self, jobs):
+        payloads = {}
+        for job in jobs:
+            payloads.setdefault(job.key, job.payload)
+
+        results = {}
+        try:
+            results = self.send_batch(payloads) or {}
+        except Exception:
+            results = {}
+        finally:
+            for job in jobs:
+                job.result = results.get(job.key)
+                job.done.set()
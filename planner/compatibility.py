@@ -0,0 +1,274 @@
+"""Precomputed compatibility scores between vote options."""
+
+import functools
+from collections import Counter
+from itertools import product
+
+from .models import Vote
+
+CHOICES_BY_QUESTION = {
+    "dinner_choice": Vote.DINNER_CHOICES,
+    "activity_choice": Vote.ACTIVITY_CHOICES,
+    "sweet_choice": Vote.SWEET_CHOICES,
+    "budget_choice": Vote.BUDGET_CHOICES,
+    "mood_choice": Vote.MOOD_CHOICES,
+    "duration_choice": Vote.DURATION_CHOICES,
+    "transport_choice": Vote.TRANSPORT_CHOICES,
+}
+
+# Questions whose options run from one extreme to the other, so neighbours
+# are closer than the ends.
+ORDINAL_QUESTIONS = {"budget_choice", "duration_choice"}
+
+QUESTION_WEIGHTS = {
+    "dinner_choice": 1.5,
+    "activity_choice": 1.5,
+    "budget_choice": 1.0,
+    "mood_choice": 1.0,
+    "sweet_choice": 0.75,
+    "duration_choice": 0.75,
+    "transport_choice": 0.5,
+}
+
+UNRELATED_SCORE = 0.2
+
+OPTION_AFFINITIES = {
+    "dinner_choice": {
+        ("italian", "tapas"): 0.6,
+        ("sushi", "tapas"): 0.6,
+        ("italian", "home"): 0.5,
+        ("italian", "sushi"): 0.3,
+        ("tapas", "home"): 0.3,
+    },
+    "activity_choice": {
+        ("music", "dance"): 0.7,
+        ("music", "art"): 0.5,
+        ("movie", "art"): 0.4,
+        ("movie", "music"): 0.3,
+    },
+    "sweet_choice": {
+        ("chocolate", "dessert"): 0.8,
+        ("dessert", "coffee"): 0.5,
+        ("cocktail", "coffee"): 0.4,
+        ("chocolate", "cocktail"): 0.4,
+    },
+    "mood_choice": {
+        ("playful", "adventurous"): 0.7,
+        ("classic", "relaxed"): 0.6,
+        ("playful", "relaxed"): 0.5,
+        ("playful", "classic"): 0.4,
+    },
+    "transport_choice": {
+        ("walk", "mixed"): 0.75,
+        ("drive", "mixed"): 0.75,
+        ("walk", "drive"): 0.25,
+    },
+}
+
+
+def _ordinal_score(values, a, b) -> float:
+    if len(values) < 2:
+        return 1.0 if a == b else 0.0
+    return 1.0 - abs(values.index(a) - values.index(b)) / (len(values) - 1)
+
+
+def _pair_score(question_id, values, a, b) -> float:
+    if a == b:
+        return 1.0
+    affinities = OPTION_AFFINITIES.get(question_id, {})
+    if (a, b) in affinities:
+        return affinities[(a, b)]
+    if (b, a) in affinities:
+        return affinities[(b, a)]
+    if question_id in ORDINAL_QUESTIONS:
+        return _ordinal_score(values, a, b)
+    return UNRELATED_SCORE
+
+
+def _build_matrix(question_id, values):
+    return {
+        (a, b): _pair_score(question_id, values, a, b)
+        for a, b in product(values, repeat=2)
+    }
+
+
+COMPATIBILITY_MATRIX = {
+    question_id: _build_matrix(question_id, [value for value, _label in choices])
+    for question_id, choices in CHOICES_BY_QUESTION.items()
+}
+
+
+@functools.lru_cache(maxsize=512)
+def option_matrix(question_id: str, values: tuple) -> dict:
+    """Return the pairwise score matrix for one question's option values.
+
+    Default options reuse the precomputed matrix; AI-generated option sets
+    are scored once and memoized.
+    """
+    known = COMPATIBILITY_MATRIX.get(question_id, {})
+    if all((value, value) in known for value in values):
+        return {pair: known[pair] for pair in product(values, repeat=2)}
+    return _build_matrix(question_id, list(values))
+
+
+@functools.lru_cache(maxsize=4096)
+def ranked_options(question_id: str, values: tuple, a, b) -> tuple:
+    """``(option, score)`` pairs, best compromise first.
+
+    An option's score is the lower of the two partners' scores for it; ties
+    go to the higher combined score and then to option order. Empty when
+    either answer is not one of ``values``.
+    """
+    matrix = option_matrix(question_id, values)
+    if (a, a) not in matrix or (b, b) not in matrix:
+        return ()
+    ranked = sorted(
+        values,
+        key=lambda option: (
+            -min(matrix[(a, option)], matrix[(b, option)]),
+            -(matrix[(a, option)] + matrix[(b, option)]),
+            values.index(option),
+        ),
+    )
+    return tuple(
+        (option, min(matrix[(a, option)], matrix[(b, option)])) for option in ranked
+    )
+
+
+def compromise_option(question_id: str, values: tuple, a, b):
+    """Pick the option both partners can live with best (see
+    :func:`ranked_options`)."""
+    if not values:
+        return a or b
+    if a == b or not b:
+        return a
+    if not a:
+        return b
+    ranked = ranked_options(question_id, values, a, b)
+    return ranked[0][0] if ranked else a
+
+
+def _single_questions(schema):
+    for question in schema.get("questions", []):
+        if question.get("type") == "single":
+            values = tuple(option["value"] for option in question.get("options", []))
+            yield question, values
+
+
+def agreement(question_id: str, values: tuple, a, b) -> float:
+    """0-1 score for one pair of answers to one question."""
+    return option_matrix(question_id, values).get((a, b), 1.0 if a == b else 0.0)
+
+
+def overlap_score(schema, answers_a, answers_b) -> float:
+    """Weighted 0-1 agreement between two partners' single-choice answers."""
+    total = 0.0
+    weight_sum = 0.0
+    for question, values in _single_questions(schema):
+        question_id = question["id"]
+        a = answers_a.get(question_id)
+        b = answers_b.get(question_id)
+        if not a or not b:
+            continue
+        weight = QUESTION_WEIGHTS.get(question_id, 1.0)
+        total += weight * agreement(question_id, values, a, b)
+        weight_sum += weight
+    if not weight_sum:
+        return 0.0
+    return total / weight_sum
+
+
+def plan_compatibility(schema, answers_a, answers_b, compromises: int = 3) -> dict:
+    """Per-question agreement, the weighted score and, where the partners
+    differ, the top ``compromises`` options ranked for both of them."""
+    questions = []
+    for question, values in _single_questions(schema):
+        question_id = question["id"]
+        a = answers_a.get(question_id)
+        b = answers_b.get(question_id)
+        if not a or not b:
+            continue
+        labels = {option["value"]: option["label"] for option in question["options"]}
+        ranked = () if a == b else ranked_options(question_id, values, a, b)
+        questions.append(
+            {
+                "id": question_id,
+                "text": question.get("text", question_id),
+                "weight": QUESTION_WEIGHTS.get(question_id, 1.0),
+                "answers": [
+                    {"value": a, "label": labels.get(a, a)},
+                    {"value": b, "label": labels.get(b, b)},
+                ],
+                "agreement": round(agreement(question_id, values, a, b), 3),
+                "compromises": [
+                    {
+                        "value": option,
+                        "label": labels.get(option, option),
+                        "score": round(score, 3),
+                    }
+                    for option, score in ranked[:compromises]
+                ],
+            }
+        )
+    score = overlap_score(schema, answers_a, answers_b)
+    return {
+        "score": round(score, 3),
+        "percent": round(score * 100),
+        "questions": questions,
+    }
+
+
+def aggregate_compatibility(couples) -> dict:
+    """Score many ``(schema, answers_a, answers_b)`` couples at once.
+
+    Each distinct (question, options, answer pair) is scored once however
+    many couples share it, so analytics over thousands of plans costs about
+    as much as the number of distinct combinations. Returns the couple
+    count, the mean weighted score and per-question agreement.
+    """
+    pairs = Counter()
+    scores = {}
+    score_sum = 0.0
+    count = 0
+    for schema, answers_a, answers_b in couples:
+        total = 0.0
+        weight_sum = 0.0
+        for question, values in _single_questions(schema):
+            question_id = question["id"]
+            a = answers_a.get(question_id)
+            b = answers_b.get(question_id)
+            if not a or not b:
+                continue
+            # Answer order does not change the score; count both as one.
+            key = (question_id, values, *sorted((a, b)))
+            pairs[key] += 1
+            if key not in scores:
+                scores[key] = agreement(*key)
+            weight = QUESTION_WEIGHTS.get(question_id, 1.0)
+            total += weight * scores[key]
+            weight_sum += weight
+        if weight_sum:
+            score_sum += total / weight_sum
+            count += 1
+
+    questions = {}
+    for key, seen in pairs.items():
+        question_id, _values, a, b = key
+        item = questions.setdefault(
+            question_id, {"couples": 0, "matches": 0, "agreement_sum": 0.0}
+        )
+        item["couples"] += seen
+        item["matches"] += seen if a == b else 0
+        item["agreement_sum"] += seen * scores[key]
+    return {
+        "couples": count,
+        "mean_score": round(score_sum / count, 3) if count else 0.0,
+        "questions": {
+            question_id: {
+                "couples": item["couples"],
+                "match_rate": round(item["matches"] / item["couples"], 3),
+                "mean_agreement": round(item["agreement_sum"] / item["couples"], 3),
+            }
+            for question_id, item in questions.items()
+        },
+    }
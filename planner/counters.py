@@ -0,0 +1,17 @@
+"""Atomic counters in the shared cache."""
+
+from django.core.cache import cache
+
+
+def incr_counter(key, delta=1, timeout=None):
+    """Add ``delta`` to the counter at ``key`` and return the new value.
+
+    The counter starts at zero and expires after ``timeout`` seconds; the
+    default keeps it until the cache evicts it. ``add`` only writes when the
+    key is missing, so concurrent first increments all count.
+    """
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key, delta)
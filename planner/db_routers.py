@@ -0,0 +1,91 @@
+"""Send opted-in reads to a replica while keeping writes on the primary."""
+
+import contextlib
+import contextvars
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+_replica_reads = contextvars.ContextVar("planner_replica_reads", default=False)
+_pinned_to_primary = contextvars.ContextVar("planner_pinned_to_primary", default=False)
+_wrote = contextvars.ContextVar("planner_wrote", default=False)
+# Per process: monotonic time until which the replica is skipped.
+_replica_down_until = 0.0
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """Allow reads inside the block to use the replica, if one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextlib.contextmanager
+def request_routing(pinned: bool):
+    """Scope routing state to one request; ``pinned`` forces the primary."""
+    pinned_token = _pinned_to_primary.set(pinned)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(pinned_token)
+        _wrote.reset(wrote_token)
+
+
+def wrote_during_request() -> bool:
+    return _wrote.get()
+
+
+def mark_replica_down():
+    """Send replica reads to the primary for ``DATABASE_REPLICA_RETRY_SECONDS``."""
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+
+
+def _replica_available(alias) -> bool:
+    if time.monotonic() < _replica_down_until:
+        return False
+    try:
+        # A no-op while the connection is open; otherwise this connects.
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        mark_replica_down()
+        return False
+    return True
+
+
+class PrimaryReplicaRouter:
+    """Route reads to ``DATABASE_REPLICA_ALIAS`` only inside ``replica_reads``.
+
+    Any write pins the rest of the request to the primary, as does an open
+    transaction on the primary, so callers always read their own writes.
+    When the replica cannot be connected to, reads use the primary until
+    ``DATABASE_REPLICA_RETRY_SECONDS`` have passed.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = settings.DATABASE_REPLICA_ALIAS
+        if (
+            replica
+            and _replica_reads.get()
+            and not _pinned_to_primary.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+            and _replica_available(replica)
+        ):
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        _pinned_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,22 @@
+"""Connection pool introspection for monitoring."""
+
+from django.db import connections
+
+
+def pool_stats():
+    """Return psycopg pool statistics for every configured database alias.
+
+    Aliases without a pool (SQLite, or PostgreSQL with ``DATABASE_POOL`` off)
+    report ``{"pooled": False}``. Unopened pools are not opened here.
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool_options = connection.settings_dict.get("OPTIONS", {}).get("pool")
+        if connection.vendor != "postgresql" or not pool_options:
+            stats[alias] = {"pooled": False, "vendor": connection.vendor}
+            continue
+        pool = connection._connection_pools.get(alias)
+        pool_stats = pool.get_stats() if pool is not None else {}
+        stats[alias] = {"pooled": True, "vendor": connection.vendor, **pool_stats}
+    return stats
@@ -0,0 +1,124 @@
+"""Per-request latency budgets that bound outbound AI calls."""
+
+import contextlib
+import contextvars
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .counters import incr_counter
+
+# Upper bounds, in seconds, of the latency buckets recorded per budget.
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+OUTCOMES = ("ok", "timeout", "error", "skipped")
+STATS_CACHE_PREFIX = "planner:deadline"
+
+_deadline = contextvars.ContextVar("planner_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextlib.contextmanager
+def deadline(name: str, seconds: float):
+    """Give the code inside the block ``seconds`` to finish.
+
+    Nested deadlines never extend an outer one.
+    """
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires_at = min(expires_at, current[1])
+    token = _deadline.set((name, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_budget(name: str):
+    """Run a view (or view method) under ``AI_REQUEST_BUDGETS[name]``."""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with deadline(name, settings.AI_REQUEST_BUDGETS[name]):
+                return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def remaining():
+    """Seconds left in the current budget, or ``None`` outside one."""
+    current = _deadline.get()
+    if current is None:
+        return None
+    return max(current[1] - time.monotonic(), 0.0)
+
+
+def budget_name() -> str:
+    current = _deadline.get()
+    return current[0] if current is not None else "none"
+
+
+def call_timeout(cap: float | None = None) -> float:
+    """Timeout for the next AI call: what is left of the budget, capped at
+    ``cap`` (default ``AI_CALL_TIMEOUT_SECONDS``).
+
+    Raises :class:`DeadlineExceeded` when less than ``AI_MIN_CALL_SECONDS``
+    is left, since a call that short cannot succeed.
+    """
+    timeout = settings.AI_CALL_TIMEOUT_SECONDS if cap is None else cap
+    left = remaining()
+    if left is not None:
+        if left < settings.AI_MIN_CALL_SECONDS:
+            raise DeadlineExceeded(f"{left:.2f}s left in the {budget_name()} budget")
+        timeout = min(timeout, left)
+    return timeout
+
+
+def is_timeout(exc: Exception) -> bool:
+    if isinstance(exc, TimeoutError):
+        return True
+    lowered = f"{type(exc).__name__} {exc}".lower()
+    return "timeout" in lowered or "timed out" in lowered or "deadline" in lowered
+
+
+def record_call(outcome: str, seconds: float | None = None):
+    """Count one AI call against the current budget, with its latency."""
+    prefix = f"{STATS_CACHE_PREFIX}:{budget_name()}"
+    incr_counter(f"{prefix}:{outcome}")
+    if seconds is None:
+        return
+    bucket = next((str(bound) for bound in LATENCY_BUCKETS if seconds <= bound), "inf")
+    incr_counter(f"{prefix}:le:{bucket}")
+
+
+def deadline_stats():
+    """Outcome counts and a latency histogram per budget name."""
+    names = [*settings.AI_REQUEST_BUDGETS, "none"]
+    buckets = [*(str(bound) for bound in LATENCY_BUCKETS), "inf"]
+    stats = {}
+    for name in names:
+        prefix = f"{STATS_CACHE_PREFIX}:{name}"
+        keys = [f"{prefix}:{outcome}" for outcome in OUTCOMES]
+        keys += [f"{prefix}:le:{bucket}" for bucket in buckets]
+        values = cache.get_many(keys)
+        outcomes = {
+            outcome: values.get(f"{prefix}:{outcome}", 0) for outcome in OUTCOMES
+        }
+        if not any(outcomes.values()):
+            continue
+        stats[name] = {
+            "budget_seconds": settings.AI_REQUEST_BUDGETS.get(name),
+            **outcomes,
+            "latency": {
+                bucket: values.get(f"{prefix}:le:{bucket}", 0) for bucket in buckets
+            },
+        }
+    return stats
@@ -0,0 +1,172 @@
+"""Monitoring endpoints and health probes."""
+
+import hmac
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .analytics import answer_trends
+from .db_routers import mark_replica_down
+from .dbpool import pool_stats
+from .deadlines import deadline_stats
+from .providers import breaker_open, provider_stats
+
+READINESS_PROBE_KEY = "planner:readiness:probe"
+
+_readiness = None
+_readiness_lock = threading.Lock()
+_migrations_applied = False
+
+
+class NotReady(Exception):
+    """A dependency answered but is not usable; the message is reported."""
+
+
+def _monitoring_allowed(request) -> bool:
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.MONITORING_TOKEN
+    header = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+
+
+def db_pool_stats(request):
+    if not _monitoring_allowed(request):
+        return JsonResponse({"detail": "forbidden"}, status=403)
+    return JsonResponse(pool_stats())
+
+
+def ai_deadline_stats(request):
+    if not _monitoring_allowed(request):
+        return JsonResponse({"detail": "forbidden"}, status=403)
+    return JsonResponse(deadline_stats())
+
+
+def ai_model_stats(request):
+    if not _monitoring_allowed(request):
+        return JsonResponse({"detail": "forbidden"}, status=403)
+    return JsonResponse(provider_stats())
+
+
+def answer_trend_stats(request):
+    if not _monitoring_allowed(request):
+        return JsonResponse({"detail": "forbidden"}, status=403)
+    try:
+        weeks = min(max(int(request.GET.get("weeks", "8")), 1), 52)
+    except ValueError:
+        return JsonResponse({"detail": "weeks must be a number"}, status=400)
+    return JsonResponse(
+        answer_trends(
+            city=request.GET.get("city"),
+            weeks=weeks,
+            question_id=request.GET.get("question") or None,
+        )
+    )
+
+
+def liveness(_request):
+    # Only proves the worker can answer; dependencies are readiness's job.
+    return HttpResponse(b"ok", content_type="text/plain")
+
+
+def _check_database(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def _check_cache():
+    if settings.CACHE_REQUIRE_SHARED and isinstance(
+        caches[DEFAULT_CACHE_ALIAS], LocMemCache
+    ):
+        raise NotReady("cache is per-process; set REDIS_URL")
+    value = uuid.uuid4().hex
+    cache.set(READINESS_PROBE_KEY, value, timeout=60)
+    if cache.get(READINESS_PROBE_KEY) != value:
+        raise NotReady("cache did not return the value just written")
+
+
+def _check_migrations():
+    global _migrations_applied
+    # Applied migrations stay applied, so load the graph once per process.
+    if _migrations_applied:
+        return
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if pending:
+        raise NotReady(f"{len(pending)} unapplied migrations")
+    _migrations_applied = True
+
+
+def _check_ai():
+    if not settings.ENABLE_AI:
+        return {"state": "disabled"}
+    if breaker_open():
+        if settings.READINESS_REQUIRE_AI:
+            raise NotReady("every AI model is failing")
+        return {"state": "open"}
+    return {"state": "closed"}
+
+
+def _timed(check, *args):
+    started = time.perf_counter()
+    try:
+        result = {"ok": True, **(check(*args) or {})}
+    except NotReady as exc:
+        result = {"ok": False, "error": str(exc)}
+    except Exception as exc:
+        # Probes are public; report the failure without its details.
+        result = {"ok": False, "error": type(exc).__name__}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _run_checks():
+    checks = {}
+    for alias in connections:
+        if alias == DEFAULT_DB_ALIAS:
+            checks["database"] = _timed(_check_database, alias)
+        else:
+            # The router sends replica reads to the primary while the replica
+            # cannot be connected to, so a failing replica is reported without
+            # taking the instance out of rotation; a failed probe also tells
+            # the router to skip it straight away.
+            check = _timed(_check_database, alias)
+            if not check["ok"] and alias == settings.DATABASE_REPLICA_ALIAS:
+                mark_replica_down()
+            checks[f"database:{alias}"] = {**check, "required": False}
+    checks["cache"] = _timed(_check_cache)
+    checks["migrations"] = _timed(_check_migrations)
+    checks["ai"] = _timed(_check_ai)
+    return {
+        "ready": all(
+            check["ok"] for check in checks.values() if check.get("required", True)
+        ),
+        "checked_at": timezone.now().isoformat(),
+        "checks": checks,
+    }
+
+
+def readiness(_request):
+    """Dependency checks with per-check latency, cached for
+    ``READINESS_CACHE_SECONDS`` so frequent probes add no load."""
+    global _readiness
+    # Concurrent probes wait for one run of the checks instead of each
+    # running their own.
+    with _readiness_lock:
+        now = time.monotonic()
+        if (
+            _readiness is None
+            or now - _readiness[0] >= settings.READINESS_CACHE_SECONDS
+        ):
+            _readiness = (now, _run_checks())
+        body = _readiness[1]
+    return JsonResponse(body, status=200 if body["ready"] else 503)
@@ -0,0 +1,109 @@
+"""Idempotency keys for form POSTs that redo expensive work when repeated."""
+
+import functools
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+FIELD_NAME = "idempotency_key"
+PENDING = "pending"
+# Fields that differ between renders of the same form, not between answers.
+_UNHASHED_FIELDS = frozenset({FIELD_NAME, "csrfmiddlewaretoken"})
+
+# How often a duplicate request checks whether the first one has finished.
+_POLL_SECONDS = 0.1
+
+
+def new_key() -> str:
+    return uuid.uuid4().hex
+
+
+def _cache_key(token, action, key):
+    return f"planner:idempotency:{token}:{action}:{key}"
+
+
+def fingerprint(data) -> str:
+    """Hash of the submitted form fields, so a reused key with different
+    answers is not mistaken for a replay."""
+    fields = sorted(
+        (name, data.getlist(name)) for name in data if name not in _UNHASHED_FIELDS
+    )
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+
+def _wait_for_outcome(cache_key):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        outcome = cache.get(cache_key)
+        if outcome != PENDING or time.monotonic() >= deadline:
+            return outcome
+        time.sleep(_POLL_SECONDS)
+
+
+def idempotent_post(default_action: str):
+    """Run a ``post(self, request, token)`` view method at most once per
+    idempotency key.
+
+    The key comes from the form's hidden ``idempotency_key`` field and is
+    scoped to the participant token and the form's ``action``. A replay gets
+    the original redirect without redoing any work; a duplicate that
+    arrives while the first is still running waits for it. The outcome is
+    stored with a :func:`fingerprint` of the form, and a reused key whose
+    fields changed (a page restored from the back/forward cache and edited)
+    runs as a new submission. Only redirects
+    are remembered, so a form re-rendered with errors can be resubmitted.
+    POSTs without a key run as before.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(self, request, token, *args, **kwargs):
+            key = request.POST.get(FIELD_NAME, "").strip()
+            if not key:
+                return view(self, request, token, *args, **kwargs)
+
+            action = request.POST.get("action", default_action)
+            cache_key = _cache_key(token, action, key[:64])
+            submitted = fingerprint(request.POST)
+            if not cache.add(
+                cache_key, PENDING, timeout=settings.IDEMPOTENCY_LOCK_SECONDS
+            ):
+                outcome = _wait_for_outcome(cache_key)
+                if outcome == PENDING:
+                    messages.info(request, "Still working on your last request.")
+                    return redirect(request.path)
+                if outcome:
+                    location, stored = outcome
+                    if stored == submitted:
+                        return redirect(location)
+                    # Same key, different answers: a new submission.
+                else:
+                    # The first attempt failed and released the key.
+                    cache.add(
+                        cache_key, PENDING, timeout=settings.IDEMPOTENCY_LOCK_SECONDS
+                    )
+
+            try:
+                response = view(self, request, token, *args, **kwargs)
+            except BaseException:
+                cache.delete(cache_key)
+                raise
+            if response.status_code in (301, 302, 303):
+                cache.set(
+                    cache_key,
+                    (response["Location"], submitted),
+                    timeout=settings.IDEMPOTENCY_TTL_SECONDS,
+                )
+            else:
+                cache.delete(cache_key)
+            return response
+
+        return wrapper
+
+    return decorator
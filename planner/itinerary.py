@@ -0,0 +1,170 @@
+"""Deterministic local date plans assembled from both partners' answers."""
+
+import functools
+import json
+
+from .compatibility import compromise_option, overlap_score
+
+OPENING_TEMPLATES = {
+    "playful": "Meet somewhere lively and kick off with a silly two-minute challenge.",
+    "classic": "Dress up a little and open the night with a small gesture, like a handwritten note.",
+    "adventurous": "Start with something neither of you has tried before to set an adventurous tone.",
+    "relaxed": "Start slow: meet somewhere quiet and give yourselves a few minutes to unwind.",
+}
+DINNER_TEMPLATES = {
+    "italian": "Share dinner at a cozy Italian spot{in_city}",
+    "sushi": "Have sushi by candlelight{in_city}",
+    "tapas": "Order a spread of tapas and shared plates{in_city}",
+    "home": "Cook a candlelit dinner at home together",
+}
+BUDGET_TEMPLATES = {
+    "cozy": " and keep it budget-friendly.",
+    "mid": " with one small splurge, like a special starter or drink.",
+    "fancy": " and treat yourselves: reserve ahead and go all out.",
+}
+ACTIVITY_TEMPLATES = {
+    "movie": "Settle into a rom-com movie night",
+    "music": "Catch some live music{in_city}",
+    "art": "Wander through a museum or art walk{in_city}",
+    "dance": "Go dancing{in_city}",
+}
+DURATION_TEMPLATES = {
+    "short": " and keep it brief so the whole date fits in 2-3 hours.",
+    "half": ", leaving room to linger over the rest of the evening.",
+    "full": " and let it run long; you have the whole evening.",
+}
+SWEET_TEMPLATES = {
+    "chocolate": "Finish with a chocolate tasting",
+    "dessert": "Finish with a dessert crawl",
+    "cocktail": "Finish with cocktails or mocktails",
+    "coffee": "Finish with a late-night coffee",
+}
+TRANSPORT_TEMPLATES = {
+    "walk": " and walk home together.",
+    "drive": " and take an easy drive home.",
+    "mixed": ", then head home however feels easiest.",
+}
+CLOSING_TEMPLATES = (
+    (0.8, "You two are remarkably in sync, so save this one as a favorite."),
+    (0.5, "Close by choosing one thing to repeat on your next date."),
+    (0.0, "Next time, let whoever compromised more tonight pick first."),
+)
+
+PLAN_QUESTION_IDS = (
+    "mood_choice",
+    "dinner_choice",
+    "budget_choice",
+    "activity_choice",
+    "duration_choice",
+    "sweet_choice",
+    "transport_choice",
+)
+
+
+def _chosen_options(schema, answers_a, answers_b):
+    chosen = {}
+    for question in schema.get("questions", []):
+        question_id = question["id"]
+        if question.get("type") != "single" or question_id not in PLAN_QUESTION_IDS:
+            continue
+        options = question.get("options", [])
+        values = tuple(option["value"] for option in options)
+        labels = {option["value"]: option["label"] for option in options}
+        a = answers_a.get(question_id)
+        b = answers_b.get(question_id)
+        value = compromise_option(question_id, values, a, b)
+        chosen[question_id] = {
+            "value": value,
+            "label": labels.get(value, value or ""),
+            "compromise": bool(a and b and a != b and value not in (a, b)),
+        }
+    return chosen
+
+
+def _phrase(templates, chosen, question_id, default, **context):
+    item = chosen.get(question_id)
+    if not item or not item["value"]:
+        return default.format(label="", **context)
+    template = templates.get(item["value"])
+    if template is None:
+        return default.format(label=item["label"], **context)
+    return template.format(**context)
+
+
+def _notes(answers_a, answers_b):
+    notes = []
+    for answers in (answers_a, answers_b):
+        for key in ("dietary_notes", "accessibility_notes"):
+            value = (answers.get(key) or "").strip()
+            if value and value not in notes:
+                notes.append(value)
+    return notes
+
+
+def _build_steps(schema, answers_a, answers_b, city):
+    chosen = _chosen_options(schema, answers_a, answers_b)
+    in_city = f" in {city}" if city else ""
+
+    opening = _phrase(
+        OPENING_TEMPLATES,
+        chosen,
+        "mood_choice",
+        "Start with a low-pressure meetup to settle into the evening.",
+    )
+    dinner = _phrase(
+        DINNER_TEMPLATES,
+        chosen,
+        "dinner_choice",
+        "Go for dinner: {label}{in_city}",
+        in_city=in_city,
+    ) + _phrase(BUDGET_TEMPLATES, chosen, "budget_choice", ".")
+    activity = _phrase(
+        ACTIVITY_TEMPLATES,
+        chosen,
+        "activity_choice",
+        "Make time for {label}{in_city}",
+        in_city=in_city,
+    ) + _phrase(DURATION_TEMPLATES, chosen, "duration_choice", ".")
+    sweet = _phrase(
+        SWEET_TEMPLATES, chosen, "sweet_choice", "Finish with {label}"
+    ) + _phrase(TRANSPORT_TEMPLATES, chosen, "transport_choice", ".")
+
+    notes = _notes(answers_a, answers_b)
+    if notes:
+        personal = f"Plan around what you both shared: {'; '.join(notes)}."
+    else:
+        personal = "Add one personal romantic touch inspired by your descriptions."
+
+    compromises = [item["label"] for item in chosen.values() if item["compromise"]]
+    if compromises:
+        personal += f" Tonight's middle ground: {', '.join(compromises)}."
+
+    return [opening, dinner, activity, personal, sweet]
+
+
+@functools.lru_cache(maxsize=2048)
+def _cached_itinerary(schema_key, answers_a_key, answers_b_key, city):
+    schema = json.loads(schema_key)
+    answers_a = json.loads(answers_a_key)
+    answers_b = json.loads(answers_b_key)
+    score = overlap_score(schema, answers_a, answers_b)
+    closing = next(text for floor, text in CLOSING_TEMPLATES if score >= floor)
+    return (
+        round(score * 100),
+        tuple(_build_steps(schema, answers_a, answers_b, city)),
+        closing,
+    )
+
+
+def build_local_itinerary(schema, answers_a, answers_b, city: str = ""):
+    """Return ``(overlap_percent, steps, closing)`` for a couple.
+
+    Results depend only on the inputs, so they are memoized for the life of
+    the process.
+    """
+    return _cached_itinerary(
+        json.dumps(schema, sort_keys=True),
+        json.dumps(answers_a or {}, sort_keys=True, default=str),
+        json.dumps(answers_b or {}, sort_keys=True, default=str),
+        (city or "").strip(),
+    )
@@ -0,0 +1,114 @@
+"""Canonical locale and city keys so equivalent prompts collapse together."""
+
+import functools
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+DEFAULT_LOCALE = "en-US"
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "cities.json"
+
+_LANGUAGE_TAG_RE = re.compile(r"^[A-Za-z]{1,8}(?:-[A-Za-z0-9]{1,8})*$")
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+_US_COUNTRY_KEYS = {"us", "usa", "united states", "united states of america"}
+
+
+def _format_tag(tag: str) -> str:
+    parts = tag.replace("_", "-").split("-")
+    formatted = [parts[0].lower()]
+    for part in parts[1:]:
+        if len(part) == 2:
+            formatted.append(part.upper())
+        elif len(part) == 4:
+            formatted.append(part.title())
+        else:
+            formatted.append(part.lower())
+    return "-".join(formatted)
+
+
+@functools.lru_cache(maxsize=1024)
+def canonical_locale(header: str | None) -> str:
+    """Return the preferred language tag from an ``Accept-Language`` value.
+
+    ``"en-US,en;q=0.9"``, ``"en-us"`` and ``"en_US"`` all become ``"en-US"``.
+    Wildcards, malformed tags and ``q=0`` entries are ignored.
+    """
+    best_tag = ""
+    best_quality = 0.0
+    for item in (header or "").split(","):
+        tag, *params = [piece.strip() for piece in item.split(";")]
+        tag = tag.replace("_", "-")
+        if not tag or tag == "*" or not _LANGUAGE_TAG_RE.match(tag):
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # Strictly greater, so earlier entries win ties as browsers intend.
+        if quality > best_quality:
+            best_tag, best_quality = tag, quality
+    return _format_tag(best_tag) if best_tag else DEFAULT_LOCALE
+
+
+def _city_key(text: str) -> str:
+    folded = unicodedata.normalize("NFKC", text).casefold()
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", folded)).strip()
+
+
+@functools.cache
+def _gazetteer():
+    with GAZETTEER_PATH.open(encoding="utf-8") as handle:
+        cities = json.load(handle)
+    aliases = {}
+    for canonical, names in cities.items():
+        for name in [canonical, *names]:
+            aliases.setdefault(_city_key(name), canonical)
+    return aliases
+
+
+def _region_keys(canonical: str):
+    region = canonical.partition(",")[2].strip()
+    keys = {_city_key(region)}
+    if len(region) == 2:
+        keys.update(_US_COUNTRY_KEYS)
+    return keys
+
+
+@functools.lru_cache(maxsize=4096)
+def canonical_city(text: str | None) -> str:
+    """Map free-text city input onto the bundled gazetteer.
+
+    Unknown cities keep the user's text with whitespace and casing tidied, so
+    they still produce a stable key.
+    """
+    cleaned = _SPACE_RE.sub(" ", (text or "").strip())
+    if not cleaned:
+        return ""
+    aliases = _gazetteer()
+    key = _city_key(cleaned)
+    if key in aliases:
+        return aliases[key]
+    # "Chicago, USA" matches Chicago, IL, but "Portland, ME" must not
+    # collapse into Portland, OR.
+    head, _, rest = cleaned.partition(",")
+    canonical = aliases.get(_city_key(head))
+    if canonical and _city_key(rest) in _region_keys(canonical):
+        return canonical
+    return ", ".join(
+        _tidy_part(part, index) for index, part in enumerate(cleaned.split(","))
+    )
+
+
+def _tidy_part(part: str, index: int) -> str:
+    part = part.strip()
+    if part != part.lower():
+        return part
+    if index and len(part) == 2:
+        return part.upper()
+    return part.title()
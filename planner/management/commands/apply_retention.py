@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from planner.retention import (
+    archive_expired_plans,
+    archive_path,
+    clear_expired_sessions,
+    expired_plans,
+    prune_device_links,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive expired plans to gzipped JSONL and delete them in batches, "
+        "then clear expired sessions and stale device links. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Stop after this many plans."
+        )
+        parser.add_argument(
+            "--archive", default=None, help="Archive file (default: dated file)."
+        )
+        parser.add_argument(
+            "--skip-sessions",
+            action="store_true",
+            help="Only archive plans; leave sessions and device links alone.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many plans are expired without changing anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            self.stdout.write(
+                f"expired_plans={expired_plans().count()} "
+                f"archive={options['archive'] or archive_path()}"
+            )
+            return
+
+        stats = archive_expired_plans(
+            path=options["archive"],
+            batch_size=options["batch_size"],
+            limit=options["limit"],
+        )
+        self.stdout.write(
+            f"plans_archived={stats['plans']} rows_deleted={stats['rows_deleted']} "
+            f"chunks={stats['chunks']} seconds={stats['seconds']:.2f} "
+            f"archive={stats['archive']}"
+        )
+        if options["skip_sessions"]:
+            return
+        sessions = clear_expired_sessions(batch_size=options["batch_size"])
+        links = prune_device_links(batch_size=options["batch_size"])
+        self.stdout.write(f"sessions_deleted={sessions} device_links_deleted={links}")
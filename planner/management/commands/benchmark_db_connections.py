@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def _summary(label, samples):
+    samples_ms = [sample * 1000 for sample in samples]
+    p95 = statistics.quantiles(samples_ms, n=20)[-1] if len(samples_ms) > 1 else 0
+    return (
+        f"{label:<10} mean={statistics.fmean(samples_ms):.3f}ms "
+        f"p50={statistics.median(samples_ms):.3f}ms p95={p95:.3f}ms"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare PostgreSQL connection acquisition cost with a fresh "
+        "connection per checkout versus a psycopg pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                f"{options['database']} uses {connection.vendor}; "
+                "connection pooling only applies to PostgreSQL."
+            )
+
+        import psycopg
+        from psycopg_pool import ConnectionPool
+
+        params = connection.get_connection_params()
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        iterations = options["iterations"]
+
+        direct = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            raw = psycopg.connect(**params)
+            raw.execute("SELECT 1")
+            raw.close()
+            direct.append(time.perf_counter() - started)
+
+        pooled = []
+        with ConnectionPool(kwargs=params, min_size=1, max_size=1) as pool:
+            pool.wait()
+            for _ in range(iterations):
+                started = time.perf_counter()
+                with pool.connection() as raw:
+                    raw.execute("SELECT 1")
+                pooled.append(time.perf_counter() - started)
+
+        self.stdout.write(_summary("direct", direct))
+        self.stdout.write(_summary("pooled", pooled))
+        speedup = statistics.fmean(direct) / statistics.fmean(pooled)
+        self.stdout.write(f"pooled checkout is {speedup:.1f}x faster on average")
@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from planner.pagecache import CACHE_STATUS_HEADER
+
+DEFAULT_PAGES = ("planner:login", "planner:signup", "planner:home")
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host not in ("*",) and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure anonymous page throughput with the page cache off and on, "
+        "through the full middleware stack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--page",
+            action="append",
+            dest="pages",
+            help="URL name to request (repeatable).",
+        )
+
+    def _run(self, url, count):
+        client = Client(HTTP_HOST=_host())
+        statuses = set()
+        started = time.perf_counter()
+        for _ in range(count):
+            # A fresh cookie jar per request, like a stream of new visitors.
+            client.cookies.clear()
+            response = client.get(url)
+            statuses.add(response.get(CACHE_STATUS_HEADER, "off"))
+        elapsed = time.perf_counter() - started
+        return count / elapsed, statuses
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        for name in options["pages"] or DEFAULT_PAGES:
+            url = reverse(name)
+            cache.clear()
+            with override_settings(PAGE_CACHE_ENABLED=False):
+                baseline, _statuses = self._run(url, count)
+            with override_settings(PAGE_CACHE_ENABLED=True):
+                cached, statuses = self._run(url, count)
+            self.stdout.write(
+                f"{url:<12} uncached={baseline:8.1f} req/s "
+                f"cached={cached:8.1f} req/s speedup={cached / baseline:4.1f}x "
+                f"({', '.join(sorted(statuses))})"
+            )
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from planner.models import Plan
+from planner.transfer import export_plans, open_dump
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream plans, participants, answers and summaries to JSONL (gzipped "
+        "when the path ends in .gz), ending with a checksum trailer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--since", default=None, help="Only plans created on or after YYYY-MM-DD."
+        )
+        parser.add_argument(
+            "--include-tokens",
+            action="store_true",
+            help=(
+                "Write participant tokens, which open the plan pages, so an "
+                "import restores working links. Keep such dumps private."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        queryset = Plan.objects.all()
+        if options["since"]:
+            queryset = queryset.filter(
+                created_at__date__gte=parse_date(options["since"])
+            )
+        started = time.perf_counter()
+
+        def progress(count):
+            self.stderr.write(f"exported={count}")
+
+        with open_dump(options["path"], "w") as stream:
+            count, checksum = export_plans(
+                stream,
+                queryset,
+                batch_size=options["batch_size"],
+                progress=progress,
+                include_tokens=options["include_tokens"],
+            )
+        self.stdout.write(
+            f"exported={count} sha256={checksum} "
+            f"seconds={time.perf_counter() - started:.2f} path={options['path']}"
+        )
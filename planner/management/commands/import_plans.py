@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.transfer import ChecksumMismatch, import_plans, open_dump, verify_dump
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a dump written by export_plans. The checksum is verified "
+        "first, then plans are bulk-created in batches, one transaction each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with open_dump(options["path"], "r") as stream:
+            try:
+                expected = verify_dump(stream)
+            except ChecksumMismatch as exc:
+                raise CommandError(f"{options['path']}: {exc}") from exc
+        self.stderr.write(f"verified={expected}")
+
+        def progress(imported, skipped):
+            self.stderr.write(f"imported={imported} skipped={skipped} of {expected}")
+
+        with open_dump(options["path"], "r") as stream:
+            imported, skipped = import_plans(
+                stream, batch_size=options["batch_size"], progress=progress
+            )
+        self.stdout.write(
+            f"imported={imported} skipped={skipped} "
+            f"seconds={time.perf_counter() - started:.2f}"
+        )
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from planner.warmup import STAGES, profile_boot, warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the app in a fresh interpreter with -X importtime and report "
+        "the slowest imports, then time each warm-up stage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--stages",
+            default=",".join(settings.WARMUP_STAGES),
+            help=f"Comma-separated warm-up stages ({', '.join(STAGES)}).",
+        )
+
+    def handle(self, *args, **options):
+        boot_seconds, modules = profile_boot()
+        budget = settings.COLD_START_BUDGET_SECONDS
+        status = "within" if boot_seconds <= budget else "OVER"
+        self.stdout.write(
+            f"boot={boot_seconds * 1000:.1f}ms budget={budget * 1000:.0f}ms "
+            f"({status} budget) modules={len(modules)}"
+        )
+
+        packages = {}
+        for module, self_us, _cumulative_us in modules:
+            package = module.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_us
+        self.stdout.write("Slowest packages (self time of all their modules):")
+        for package, self_us in sorted(
+            packages.items(), key=lambda item: item[1], reverse=True
+        )[: options["top"]]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}ms  {package}")
+
+        self.stdout.write("Slowest modules (self):")
+        for module, self_us, _cumulative_us in sorted(
+            modules, key=lambda item: item[1], reverse=True
+        )[: options["top"]]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}ms  {module}")
+
+        stages = [name.strip() for name in options["stages"].split(",") if name.strip()]
+        started = time.perf_counter()
+        timings = warm_up(stages)
+        self.stdout.write(
+            f"Warm-up ({(time.perf_counter() - started) * 1000:.1f}ms total):"
+        )
+        for name, seconds in timings.items():
+            self.stdout.write(f"  {seconds * 1000:8.1f}ms  {name}")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from planner.analytics import rollup_answers
+
+
+class Command(BaseCommand):
+    help = "Apply votes saved or deleted since the last run to the answer rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new votes instead of exiting once caught up.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Seconds to sleep between idle polls when --loop is set.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stats = rollup_answers(options["batch_size"])
+            if any(stats.values()):
+                self.stdout.write(
+                    " ".join(f"{name}={count}" for name, count in stats.items())
+                )
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from planner.question_schema import output_stats
+from planner.schema_library import library_stats
+from planner.signals import describe_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Report question-schema library size and hit rate, and how often "
+        "Gemini's question output was valid, repaired or rejected, and how "
+        "often changed descriptions reset a plan's questions."
+    )
+
+    def handle(self, *args, **options):
+        stats = library_stats()
+        self.stdout.write(
+            f"entries={stats['entries']} hits={stats['hits']} "
+            f"misses={stats['misses']} hit_rate={stats['hit_rate']:.1%}"
+        )
+        output = output_stats()
+        self.stdout.write(
+            f"valid={output['valid']} repaired={output['repaired']} "
+            f"rejected={output['rejected']} usable_rate={output['usable_rate']:.1%}"
+        )
+        describe = describe_stats()
+        self.stdout.write(
+            f"descriptions_changed={describe['changed']} "
+            f"unchanged={describe['unchanged']} "
+            f"votes_cleared={describe['votes_cleared']} "
+            f"summaries_cleared={describe['summaries_cleared']}"
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from planner.outbox import deliver_outbound_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound emails in batches over one mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep draining the outbox instead of exiting when it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between empty polls when --loop is set.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_outbound_emails(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"sent={sent} failed={failed}")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.assets import APP_DIR, FONT_FACES, latin_codepoints
+
+
+def _family_name(font):
+    name_table = font["name"]
+    return str(name_table.getDebugName(16) or name_table.getDebugName(1))
+
+
+class Command(BaseCommand):
+    help = (
+        "Subset TTF/OTF source fonts to Latin and write the WOFF2 files the "
+        "site self-hosts. Requires fonttools and brotli."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sources", nargs="+", help="Static or variable font files.")
+        parser.add_argument("--output", default=str(APP_DIR / "static"))
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+            from fontTools.ttLib import TTFont
+            from fontTools.varLib import instancer
+        except ImportError as exc:
+            raise CommandError("pip install fonttools brotli to subset fonts.") from exc
+
+        output = Path(options["output"])
+        wanted = {
+            (family, weight): path for family, weight, path, _preload in FONT_FACES
+        }
+        written = set()
+        for source in options["sources"]:
+            font = TTFont(source)
+            family = _family_name(font)
+            if "fvar" in font:
+                axis = next(a for a in font["fvar"].axes if a.axisTag == "wght")
+                weights = [
+                    weight
+                    for name, weight in wanted
+                    if name == family and axis.minValue <= weight <= axis.maxValue
+                ]
+            else:
+                weights = [font["OS/2"].usWeightClass]
+
+            for weight in weights:
+                target = wanted.get((family, weight))
+                if target is None or target in written:
+                    continue
+                face = TTFont(source)
+                if "fvar" in face:
+                    face = instancer.instantiateVariableFont(face, {"wght": weight})
+                subsetter = subset.Subsetter(
+                    subset.Options(layout_features=["kern", "liga", "calt"])
+                )
+                subsetter.populate(unicodes=latin_codepoints())
+                subsetter.subset(face)
+                face.flavor = "woff2"
+                path = output / target
+                path.parent.mkdir(parents=True, exist_ok=True)
+                face.save(path)
+                written.add(target)
+                self.stdout.write(f"{path} ({path.stat().st_size / 1024:.1f} KiB)")
+
+        missing = sorted(set(wanted.values()) - written)
+        for path in missing:
+            self.stdout.write(self.style.WARNING(f"No source for {path}"))
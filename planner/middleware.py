@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+
+from .db_routers import request_routing, wrote_during_request
+
+PRIMARY_PIN_SESSION_KEY = "planner_primary_pin_until"
+
+
+class ReadYourWritesMiddleware:
+    """Pin a session to the primary database for a while after it writes.
+
+    Replica lag would otherwise let the redirect after a POST render stale
+    data. Must run after ``SessionMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICA_ALIAS:
+            return self.get_response(request)
+
+        pinned_until = request.session.get(PRIMARY_PIN_SESSION_KEY, 0)
+        with request_routing(pinned=pinned_until > time.time()):
+            response = self.get_response(request)
+            if wrote_during_request():
+                request.session[PRIMARY_PIN_SESSION_KEY] = (
+                    time.time() + settings.DATABASE_REPLICA_PIN_SECONDS
+                )
+        return response
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0006_generatedvote"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SchemaLibraryEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("locale", models.CharField(blank=True, max_length=35)),
+                ("descriptions", models.JSONField(blank=True, default=list)),
+                ("signatures", models.JSONField(blank=True, default=list)),
+                ("generated_questions", models.JSONField(blank=True, default=dict)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "schema library entries",
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0008_outboundemail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DevicePlanLink",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("device_key", models.CharField(max_length=32)),
+                (
+                    "last_seen_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "participant",
+                    models.ForeignKey(
+                        on_delete=models.deletion.CASCADE,
+                        related_name="device_links",
+                        to="planner.participant",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["device_key", "-last_seen_at"], name="device_recent_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("device_key", "participant"),
+                        name="unique_device_participant",
+                    )
+                ],
+            },
+        ),
+    ]
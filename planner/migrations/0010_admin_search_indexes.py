@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0009_deviceplanlink"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="outboundemail",
+            index=models.Index(
+                Upper("to_email"),
+                name="outbox_to_email_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="participant",
+            index=models.Index(
+                Upper("email"),
+                name="participant_email_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plan",
+            index=models.Index(
+                Upper("inviter_email"),
+                name="plan_inviter_email_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plan",
+            index=models.Index(
+                Upper("invitee_email"),
+                name="plan_invitee_email_upper_idx",
+            ),
+        ),
+    ]
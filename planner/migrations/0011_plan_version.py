@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0010_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plan",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,119 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0011_plan_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("city", models.CharField(blank=True, max_length=120)),
+                ("week", models.DateField()),
+                ("question_id", models.CharField(max_length=64)),
+                ("option", models.CharField(max_length=64)),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RolledUpVote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("city", models.CharField(blank=True, max_length=120)),
+                ("week", models.DateField()),
+                ("answers", models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=32, unique=True)),
+                ("submitted_at", models.DateTimeField(blank=True, null=True)),
+                ("last_id", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="generatedvote",
+            index=models.Index(
+                fields=["submitted_at", "id"], name="generated_vote_submitted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vote",
+            index=models.Index(
+                fields=["submitted_at", "id"], name="vote_submitted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answerrollup",
+            index=models.Index(fields=["week", "city"], name="answer_rollup_week_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="answerrollup",
+            constraint=models.UniqueConstraint(
+                fields=("city", "week", "question_id", "option"),
+                name="unique_answer_rollup",
+            ),
+        ),
+        migrations.AddField(
+            model_name="rolledupvote",
+            name="generated_vote",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=models.deletion.SET_NULL,
+                related_name="rollup",
+                to="planner.generatedvote",
+            ),
+        ),
+        migrations.AddField(
+            model_name="rolledupvote",
+            name="vote",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=models.deletion.SET_NULL,
+                related_name="rollup",
+                to="planner.vote",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rolledupvote",
+            index=models.Index(
+                condition=models.Q(
+                    ("generated_vote__isnull", True), ("vote__isnull", True)
+                ),
+                fields=["id"],
+                name="rolled_up_vote_orphan_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0012_answer_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="plan",
+            index=models.Index(
+                Upper("city"),
+                name="plan_city_upper_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0013_plan_city_search_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="rolledupvote",
+            name="rolled_up_vote_orphan_idx",
+        ),
+        migrations.AlterField(
+            model_name="rolledupvote",
+            name="generated_vote",
+            field=models.OneToOneField(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=models.deletion.DO_NOTHING,
+                related_name="rollup",
+                to="planner.generatedvote",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="rolledupvote",
+            name="vote",
+            field=models.OneToOneField(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=models.deletion.DO_NOTHING,
+                related_name="rollup",
+                to="planner.vote",
+            ),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planner", "0014_rollup_links_without_constraints"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="schemalibraryentry",
+            name="descriptions",
+        ),
+    ]
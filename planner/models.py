@@ -2,9 +2,18 @@ import uuid
 
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 User = get_user_model()
 
+# Compare-and-swap attempts before a plan update gives up.
+PLAN_UPDATE_ATTEMPTS = 3
+
+
+class PlanConflict(Exception):
+    """Raised when a plan keeps changing under a compare-and-swap update."""
+
 
 class Plan(models.Model):
     created_by = models.ForeignKey(
@@ -20,10 +29,65 @@ class Plan(models.Model):
     generated_questions = models.JSONField(default=dict, blank=True)
     ai_summary = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by every change to the questions, votes or summary, so slow
+    # writers (AI generation) can detect that their inputs went stale.
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Admin search uses case-insensitive exact matches on emails and city.
+        indexes = [
+            models.Index(Upper("inviter_email"), name="plan_inviter_email_upper_idx"),
+            models.Index(Upper("invitee_email"), name="plan_invitee_email_upper_idx"),
+            models.Index(Upper("city"), name="plan_city_upper_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Date plan {self.pk}: {self.inviter_email} + {self.invitee_email}"
 
+    def compare_and_set(self, **fields) -> bool:
+        """Write ``fields`` only if the plan is still at the version this
+        instance was loaded with, bumping the version.
+
+        Updates the instance and returns ``True`` on success; returns
+        ``False`` without writing if someone else changed the plan first.
+        """
+        updated = Plan.objects.filter(pk=self.pk, version=self.version).update(
+            version=models.F("version") + 1, **fields
+        )
+        if not updated:
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.version += 1
+        return True
+
+    def bump(self, **fields):
+        """Write ``fields`` unconditionally and bump the version, so writers
+        holding an older copy see a conflict. For blind writes that do not
+        depend on the plan's current state; cannot conflict itself."""
+        Plan.objects.filter(pk=self.pk).update(
+            version=models.F("version") + 1, **fields
+        )
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.refresh_from_db(fields=["version"])
+
+    def update_with_retry(self, change, attempts: int = PLAN_UPDATE_ATTEMPTS) -> bool:
+        """Apply ``change(plan)`` with compare-and-swap, reloading the plan and
+        asking again after a conflict.
+
+        ``change`` returns the fields to write, or ``None`` when the current
+        plan needs no write. Returns whether anything was written.
+        """
+        for _attempt in range(attempts):
+            fields = change(self)
+            if not fields:
+                return False
+            if self.compare_and_set(**fields):
+                return True
+            self.refresh_from_db()
+        raise PlanConflict(f"plan {self.pk} kept changing during the update")
+
 
 class Participant(models.Model):
     INVITER = "inviter"
@@ -54,11 +118,40 @@ class Participant(models.Model):
                 fields=["plan", "role"], name="unique_role_per_plan"
             ),
         ]
+        indexes = [
+            models.Index(Upper("email"), name="participant_email_upper_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.get_role_display()} ({self.email})"
 
 
+class DevicePlanLink(models.Model):
+    """A participant link opened on an anonymous browser, keyed by the random
+    device id stored in its session."""
+
+    device_key = models.CharField(max_length=32)
+    participant = models.ForeignKey(
+        Participant, on_delete=models.CASCADE, related_name="device_links"
+    )
+    last_seen_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["device_key", "participant"], name="unique_device_participant"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["device_key", "-last_seen_at"], name="device_recent_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Device {self.device_key[:8]} -> participant {self.participant_id}"
+
+
 class Vote(models.Model):
     DINNER_CHOICES = [
         ("italian", "Cozy Italian spot"),
@@ -120,6 +213,12 @@ class Vote(models.Model):
     accessibility_notes = models.CharField(max_length=200, blank=True)
     submitted_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # The analytics rollup reads new and re-saved rows in this order.
+        indexes = [
+            models.Index(fields=["submitted_at", "id"], name="vote_submitted_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Vote from {self.participant.email}"
 
@@ -133,5 +232,138 @@ class GeneratedVote(models.Model):
     answers = models.JSONField(default=dict, blank=True)
     submitted_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["submitted_at", "id"], name="generated_vote_submitted_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"Generated vote from {self.participant.email}"
+
+
+class SchemaLibraryEntry(models.Model):
+    # Only MinHash signatures of the couple's descriptions are kept, never
+    # the text, so entries hold no user text after retention deletes a plan.
+    locale = models.CharField(max_length=35, blank=True)
+    signatures = models.JSONField(default=list, blank=True)
+    generated_questions = models.JSONField(default=dict, blank=True)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "schema library entries"
+
+    def __str__(self) -> str:
+        return f"Schema library entry {self.pk} ({self.locale or 'any locale'})"
+
+
+class OutboundEmail(models.Model):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    plan = models.ForeignKey(
+        Plan,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="outbound_emails",
+    )
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+            models.Index(Upper("to_email"), name="outbox_to_email_upper_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Email to {self.to_email} ({self.status})"
+
+
+class AnswerRollup(models.Model):
+    """How many votes picked ``option`` for ``question_id`` in a city during
+    the week starting ``week`` (a Monday). Kept up to date by
+    :mod:`planner.analytics`."""
+
+    city = models.CharField(max_length=120, blank=True)
+    week = models.DateField()
+    question_id = models.CharField(max_length=64)
+    option = models.CharField(max_length=64)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["city", "week", "question_id", "option"],
+                name="unique_answer_rollup",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["week", "city"], name="answer_rollup_week_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.city or 'No city'} {self.week}: {self.question_id}={self.option}"
+
+
+class RolledUpVote(models.Model):
+    """What one vote last added to :class:`AnswerRollup`, so a re-saved vote
+    can be swapped out and a deleted one subtracted.
+
+    The links carry no database constraint and are left alone when the vote
+    is deleted, so vote deletes stay single statements; the next rollup run
+    finds rows whose vote is gone, removes their counts and deletes them.
+    """
+
+    generated_vote = models.OneToOneField(
+        GeneratedVote,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="rollup",
+    )
+    vote = models.OneToOneField(
+        Vote,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="rollup",
+    )
+    city = models.CharField(max_length=120, blank=True)
+    week = models.DateField()
+    answers = models.JSONField(default=dict, blank=True)
+
+    def __str__(self) -> str:
+        return f"Rolled-up vote {self.generated_vote_id or self.vote_id}"
+
+
+class RollupWatermark(models.Model):
+    """The last ``(submitted_at, id)`` of a vote table the rollup job has
+    processed."""
+
+    source = models.CharField(max_length=32, unique=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.source} through {self.submitted_at}"
@@ -0,0 +1,95 @@
+"""Transactional email outbox drained by a background worker."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def queue_email(to_email: str, subject: str, body: str, plan=None):
+    """Record an email for the worker; call inside the caller's transaction."""
+    return OutboundEmail.objects.create(
+        plan=plan,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+    )
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _record_failure(email, exc, now):
+    email.last_error = str(exc)[:1000]
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboundEmail.FAILED
+    else:
+        email.next_attempt_at = now + _retry_delay(email.attempts)
+
+
+def deliver_outbound_emails(batch_size: int | None = None, connection=None):
+    """Send one batch of due emails over a single mail connection.
+
+    Rows are locked with ``SKIP LOCKED`` where the database supports it, so
+    several workers can drain the outbox without double-sending. Failed
+    messages are retried with exponential backoff until
+    ``OUTBOX_MAX_ATTEMPTS``; when the connection cannot be opened, that
+    counts as a failed attempt for the whole batch. Returns
+    ``(sent, failed)`` counts.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    sent = failed = 0
+
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        connection = connection or get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            for email in batch:
+                email.attempts += 1
+                _record_failure(email, exc, now)
+            failed = len(batch)
+        else:
+            try:
+                for email in batch:
+                    message = EmailMessage(
+                        subject=email.subject,
+                        body=email.body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[email.to_email],
+                        connection=connection,
+                    )
+                    email.attempts += 1
+                    try:
+                        connection.send_messages([message])
+                    except Exception as exc:
+                        failed += 1
+                        _record_failure(email, exc, now)
+                    else:
+                        sent += 1
+                        email.status = OutboundEmail.SENT
+                        email.sent_at = timezone.now()
+                        email.last_error = ""
+            finally:
+                connection.close()
+
+        OutboundEmail.objects.bulk_update(
+            batch,
+            ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+        )
+    return sent, failed
@@ -0,0 +1,127 @@
+"""Whole-page cache for pages that look the same to most visitors."""
+
+import functools
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.response import SimpleTemplateResponse
+from django.utils.translation import get_language
+
+from .views import SESSION_DEVICE_KEY, SESSION_TOKEN_KEY
+
+CSRF_PLACEHOLDER = "__planner_csrf_token__"
+CACHE_STATUS_HEADER = "X-Page-Cache"
+
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+_STORED_HEADERS = (
+    "Content-Type",
+    "Content-Language",
+    "Cache-Control",
+    "Expires",
+    "X-Frame-Options",
+)
+
+
+def _bypass_reason(request, allow_authenticated):
+    if request.method not in ("GET", "HEAD"):
+        return "method"
+    if request.user.is_authenticated and not allow_authenticated:
+        return "authenticated"
+    if len(get_messages(request)):
+        return "messages"
+    if SESSION_DEVICE_KEY in request.session or SESSION_TOKEN_KEY in request.session:
+        return "saved-plans"
+    return ""
+
+
+def _cache_key(request):
+    # The static manifest hash changes on every deploy that touches assets,
+    # so cached pages never point at fingerprinted files that are gone.
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    parts = [
+        settings.PAGE_CACHE_VERSION,
+        getattr(staticfiles_storage, "manifest_hash", ""),
+        get_language() or "",
+        str(user),
+        request.get_host(),
+        request.get_full_path(),
+    ]
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return f"planner:page:{digest}"
+
+
+def _from_cache(request, entry):
+    content, status, headers = entry
+    # Each visitor gets a fresh CSRF token; get_token also makes the CSRF
+    # middleware set the cookie that goes with it.
+    response = HttpResponse(
+        content.replace(CSRF_PLACEHOLDER, get_token(request)), status=status
+    )
+    for name, value in headers.items():
+        response[name] = value
+    response[CACHE_STATUS_HEADER] = "hit"
+    return response
+
+
+def cache_anonymous_page(view=None, *, allow_authenticated=False):
+    """Serve GETs of ``view`` from the cache for anonymous visitors.
+
+    Requests with flashed messages or saved planner links always render,
+    as do signed-in users unless ``allow_authenticated`` (the key then
+    includes the user). CSRF tokens are swapped for a placeholder before
+    storing and refilled per request.
+    """
+    if view is None:
+        return functools.partial(
+            cache_anonymous_page, allow_authenticated=allow_authenticated
+        )
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.PAGE_CACHE_ENABLED:
+            return view(request, *args, **kwargs)
+        reason = _bypass_reason(request, allow_authenticated)
+        if reason:
+            response = view(request, *args, **kwargs)
+            response[CACHE_STATUS_HEADER] = f"bypass ({reason})"
+            return response
+
+        key = _cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            return _from_cache(request, entry)
+
+        response = view(request, *args, **kwargs)
+        if isinstance(response, SimpleTemplateResponse):
+            response.render()
+        cacheable = (
+            response.status_code == 200
+            and not response.streaming
+            # csrf_protect views set the CSRF cookie themselves; anything
+            # else means the page was personalised.
+            and set(response.cookies) <= {settings.CSRF_COOKIE_NAME}
+            and not len(get_messages(request))
+        )
+        if cacheable:
+            content = _CSRF_INPUT_RE.sub(
+                rf"\g<1>{CSRF_PLACEHOLDER}\g<2>",
+                response.content.decode(response.charset),
+            )
+            headers = {
+                name: response[name] for name in _STORED_HEADERS if name in response
+            }
+            cache.set(
+                key,
+                (content, response.status_code, headers),
+                settings.PAGE_CACHE_SECONDS,
+            )
+        response[CACHE_STATUS_HEADER] = "miss" if cacheable else "bypass (response)"
+        return response
+
+    return wrapper
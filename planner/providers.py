@@ -0,0 +1,255 @@
+"""Ordered, optionally hedged chain of AI models with per-model stats.
+
+A provider is any ``call(model, prompt, timeout) -> str``; services.py
+passes one that talks to Gemini and the tests pass local fakes.
+"""
+
+import collections
+import concurrent.futures
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+
+from .deadlines import (
+    DeadlineExceeded,
+    call_timeout,
+    is_timeout,
+    record_call,
+    remaining,
+)
+
+# Most recent calls kept per model, whatever the window.
+MAX_SAMPLES = 500
+
+_stats = {}
+_stats_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def parse_models(entries):
+    """``["model", "model:seconds"]`` -> ``[(model, timeout or None)]``."""
+    models = []
+    for entry in entries:
+        name, _sep, timeout = entry.partition(":")
+        models.append((name.strip(), float(timeout) if timeout.strip() else None))
+    return models
+
+
+def _quantile(values, fraction):
+    if not values:
+        return None
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class ModelStats:
+    """Latency and outcome of a model's calls in the last
+    ``AI_MODEL_STATS_WINDOW_SECONDS``, local to this process."""
+
+    def __init__(self):
+        self._calls = collections.deque(maxlen=MAX_SAMPLES)
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.monotonic() - settings.AI_MODEL_STATS_WINDOW_SECONDS
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self._calls.append((time.monotonic(), seconds, ok))
+            self._expire()
+
+    def snapshot(self):
+        with self._lock:
+            self._expire()
+            calls = list(self._calls)
+        latencies = sorted(seconds for _at, seconds, ok in calls if ok)
+        errors = len(calls) - len(latencies)
+        return {
+            "calls": len(calls),
+            "errors": errors,
+            "error_rate": errors / len(calls) if calls else 0.0,
+            "p50": _quantile(latencies, 0.5),
+            "p90": _quantile(latencies, 0.9),
+        }
+
+
+def model_stats(model: str) -> ModelStats:
+    with _stats_lock:
+        stats = _stats.get(model)
+        if stats is None:
+            stats = _stats[model] = ModelStats()
+        return stats
+
+
+def provider_stats():
+    with _stats_lock:
+        models = list(_stats)
+    return {model: model_stats(model).snapshot() for model in models}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _failing(snapshot) -> bool:
+    return (
+        snapshot["calls"] >= settings.AI_MODEL_STATS_MIN_SAMPLES
+        and snapshot["error_rate"] > settings.AI_MODEL_DEMOTE_ERROR_RATE
+    )
+
+
+def breaker_open(models=None) -> bool:
+    """True when every configured model is failing in this process, so any
+    AI call would end in the local fallback."""
+    if models is None:
+        models = parse_models(settings.AI_MODELS)
+    return bool(models) and all(
+        _failing(model_stats(model).snapshot()) for model, _cap in models
+    )
+
+
+def ordered_models(models):
+    """``models`` in configured order, except that models failing more than
+    ``AI_MODEL_DEMOTE_ERROR_RATE`` of their recent calls go to the back, and
+    models whose p90 latency exceeds what is left of the request budget go
+    behind those that can still answer in time.
+
+    Demotion lapses once a model's failures age out of the stats window.
+    """
+    left = remaining()
+
+    def rank(item):
+        snapshot = model_stats(item[0]).snapshot()
+        if snapshot["calls"] < settings.AI_MODEL_STATS_MIN_SAMPLES:
+            return (0, 0.0)
+        if _failing(snapshot):
+            return (2, snapshot["error_rate"])
+        if left is not None and snapshot["p90"] is not None and snapshot["p90"] > left:
+            return (1, snapshot["p90"])
+        return (0, 0.0)
+
+    return sorted(models, key=rank)
+
+
+def hedge_delay(model: str):
+    """The model's p90 latency, or ``None`` until it has enough samples."""
+    snapshot = model_stats(model).snapshot()
+    if snapshot["calls"] - snapshot["errors"] < settings.AI_MODEL_STATS_MIN_SAMPLES:
+        return None
+    return snapshot["p90"]
+
+
+def _attempt(call, model, cap, prompt):
+    try:
+        timeout = call_timeout(cap)
+    except DeadlineExceeded:
+        record_call("skipped")
+        raise
+    started = time.monotonic()
+    try:
+        text = call(model, prompt, timeout)
+    except Exception as exc:
+        elapsed = time.monotonic() - started
+        model_stats(model).record(elapsed, ok=False)
+        record_call("timeout" if is_timeout(exc) else "error", elapsed)
+        raise
+    elapsed = time.monotonic() - started
+    model_stats(model).record(elapsed, ok=True)
+    record_call("ok", elapsed)
+    return text
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(settings.AI_MAX_CONCURRENT_CALLS, 4) * 2,
+                thread_name_prefix="ai-hedge",
+            )
+        return _executor
+
+
+def _generate_hedged(call, prompt, models):
+    attempts = collections.deque(models)
+    if len(attempts) == 1:
+        # A single model is hedged with a second attempt at it.
+        attempts.append(attempts[0])
+    pending = {}
+    hedged = False
+    error = None
+
+    def start():
+        model, cap = attempts.popleft()
+        # Run in a copy of this context so the attempt sees the request's
+        # deadline and counts against its budget.
+        context = contextvars.copy_context()
+        future = _get_executor().submit(context.run, _attempt, call, model, cap, prompt)
+        pending[future] = model
+
+    while attempts or pending:
+        if not pending:
+            start()
+        delay = None
+        if not hedged and attempts:
+            delay = hedge_delay(next(iter(pending.values())))
+        left = remaining()
+        wait_for = min(
+            (value for value in (delay, left) if value is not None), default=None
+        )
+        done, _ = concurrent.futures.wait(
+            pending, timeout=wait_for, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if not done:
+            if delay is not None and (left is None or delay < left):
+                hedged = True
+                start()
+                continue
+            # The budget ran out; abandon the attempts still in flight.
+            raise error or DeadlineExceeded("no reply within the request budget")
+        for future in done:
+            del pending[future]
+            try:
+                return future.result()
+            except DeadlineExceeded as exc:
+                error = error or exc
+                attempts.clear()
+            except Exception as exc:
+                error = exc
+    raise error
+
+
+def generate(call, prompt: str, models=None, hedge=None) -> str:
+    """Return the first reply from ``call(model, prompt, timeout)`` down the
+    model chain.
+
+    Each attempt's timeout is the model's own, cut to what is left of the
+    request budget. A failed model falls through to the next. With
+    hedging, a second attempt (the next model, or the same one again) starts
+    when the first has not answered by its p90 latency, and the first reply
+    wins. Raises the last error when every model fails.
+    """
+    if models is None:
+        models = parse_models(settings.AI_MODELS)
+    if hedge is None:
+        hedge = settings.AI_HEDGE_ENABLED
+    if not models:
+        raise ValueError("AI_MODELS is empty")
+    models = ordered_models(models)
+    if hedge:
+        return _generate_hedged(call, prompt, models)
+
+    error = None
+    for model, cap in models:
+        try:
+            return _attempt(call, model, cap, prompt)
+        except DeadlineExceeded as exc:
+            raise error or exc
+        except Exception as exc:
+            error = exc
+    raise error
@@ -0,0 +1,211 @@
+"""Response schema, validator and local repair for generated vote questions."""
+
+import copy
+
+from django.core.cache import cache
+
+from .constants import DEFAULT_GENERATED_QUESTIONS
+from .counters import incr_counter
+
+MIN_OPTIONS = 2
+MAX_OPTIONS = 5
+
+VALID_CACHE_KEY = "planner:question-schema:valid"
+REPAIRED_CACHE_KEY = "planner:question-schema:repaired"
+REJECTED_CACHE_KEY = "planner:question-schema:rejected"
+
+_DEFAULT_QUESTIONS = DEFAULT_GENERATED_QUESTIONS["questions"]
+_DEFAULT_BY_ID = {question["id"]: question for question in _DEFAULT_QUESTIONS}
+# (id, type, keys) per question in order, built once so validating a stored
+# or freshly generated schema is a single pass with no copies.
+_SPEC = tuple(
+    (question["id"], question["type"], frozenset(question))
+    for question in _DEFAULT_QUESTIONS
+)
+
+_OPTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"value": {"type": "STRING"}, "label": {"type": "STRING"}},
+    "required": ["value", "label"],
+}
+_QUESTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "id": {"type": "STRING", "enum": [question_id for question_id, *_ in _SPEC]},
+        "text": {"type": "STRING"},
+        "type": {"type": "STRING", "enum": ["single", "text"]},
+        "required": {"type": "BOOLEAN"},
+        "options": {"type": "ARRAY", "items": _OPTION_SCHEMA},
+        "placeholder": {"type": "STRING"},
+    },
+    "required": ["id", "text", "type", "required"],
+}
+# Gemini response_schema declarations (OpenAPI subset) for one couple and
+# for a micro-batch of couples.
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"questions": {"type": "ARRAY", "items": _QUESTION_SCHEMA}},
+    "required": ["questions"],
+}
+BATCH_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "plans": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "key": {"type": "STRING"},
+                    "questions": RESPONSE_SCHEMA["properties"]["questions"],
+                },
+                "required": ["key", "questions"],
+            },
+        }
+    },
+    "required": ["plans"],
+}
+
+
+def _clean(value) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _option_valid(option) -> bool:
+    return (
+        isinstance(option, dict)
+        and option.keys() == {"value", "label"}
+        and all(
+            isinstance(option[key], str)
+            and option[key]
+            and option[key] == option[key].strip()
+            for key in ("value", "label")
+        )
+    )
+
+
+def is_valid_schema(schema) -> bool:
+    """True when ``schema`` is already in the exact shape :func:`repair_schema`
+    produces, so it can be used without copying."""
+    if not isinstance(schema, dict):
+        return False
+    questions = schema.get("questions")
+    if not isinstance(questions, list) or len(questions) != len(_SPEC):
+        return False
+    for question, (question_id, question_type, keys) in zip(questions, _SPEC):
+        if not isinstance(question, dict) or question.keys() != keys:
+            return False
+        if question["id"] != question_id or question["type"] != question_type:
+            return False
+        text = question["text"]
+        if not isinstance(text, str) or not text or text != text.strip():
+            return False
+        if question["required"] != _DEFAULT_BY_ID[question_id]["required"]:
+            return False
+        if question_type == "single":
+            options = question["options"]
+            if not isinstance(options, list) or not (
+                MIN_OPTIONS <= len(options) <= MAX_OPTIONS
+            ):
+                return False
+            if not all(_option_valid(option) for option in options):
+                return False
+        elif question_type == "text":
+            placeholder = question["placeholder"]
+            if not isinstance(placeholder, str) or placeholder != placeholder.strip():
+                return False
+    return True
+
+
+def _repair_options(raw_options):
+    options = []
+    seen = set()
+    for raw in raw_options if isinstance(raw_options, list) else []:
+        if isinstance(raw, str):
+            # A bare label; derive a value from it.
+            label = _clean(raw)
+            value = "_".join(label.lower().split())
+        elif isinstance(raw, dict):
+            value = _clean(raw.get("value"))
+            label = _clean(raw.get("label"))
+            value = value or "_".join(label.lower().split())
+            label = label or value
+        else:
+            continue
+        if value and label and value not in seen:
+            seen.add(value)
+            options.append({"value": value, "label": label})
+    return options[:MAX_OPTIONS]
+
+
+def repair_schema(schema):
+    """Coerce model output into a valid schema, keeping every usable part.
+
+    Unknown ids, duplicate questions and bad options are dropped; missing
+    questions and options fall back to the defaults. Accepts a bare list of
+    questions. Returns ``None`` when nothing usable is left.
+    """
+    if isinstance(schema, dict):
+        questions = schema.get("questions")
+    else:
+        questions = schema
+    if not isinstance(questions, list):
+        return None
+
+    by_id = {}
+    for item in questions:
+        if isinstance(item, dict) and item.get("id") in _DEFAULT_BY_ID:
+            by_id.setdefault(item["id"], item)
+
+    repaired = []
+    customised = False
+    for question_id, question_type, _keys in _SPEC:
+        base = copy.deepcopy(_DEFAULT_BY_ID[question_id])
+        item = by_id.get(question_id)
+        if item is not None:
+            text = _clean(item.get("text"))
+            if text:
+                base["text"] = text
+                customised = True
+            if question_type == "single":
+                options = _repair_options(item.get("options"))
+                if len(options) >= MIN_OPTIONS:
+                    base["options"] = options
+                    customised = True
+            elif question_type == "text" and isinstance(item.get("placeholder"), str):
+                base["placeholder"] = item["placeholder"].strip()
+        repaired.append(base)
+    return {"questions": repaired} if customised else None
+
+
+def accept_schema(schema):
+    """Validate model output, repairing it locally when needed.
+
+    Returns the schema or ``None``, and counts which path it took.
+    """
+    if is_valid_schema(schema):
+        incr_counter(VALID_CACHE_KEY)
+        return schema
+    repaired = repair_schema(schema)
+    incr_counter(REPAIRED_CACHE_KEY if repaired else REJECTED_CACHE_KEY)
+    return repaired
+
+
+def normalize_schema(schema):
+    """A valid schema for display: ``schema`` itself when valid, else its
+    repair, else a copy of the defaults."""
+    if is_valid_schema(schema):
+        return schema
+    return repair_schema(schema) or copy.deepcopy(DEFAULT_GENERATED_QUESTIONS)
+
+
+def output_stats():
+    valid = cache.get(VALID_CACHE_KEY, 0)
+    repaired = cache.get(REPAIRED_CACHE_KEY, 0)
+    rejected = cache.get(REJECTED_CACHE_KEY, 0)
+    total = valid + repaired + rejected
+    return {
+        "valid": valid,
+        "repaired": repaired,
+        "rejected": rejected,
+        "usable_rate": (valid + repaired) / total if total else 0.0,
+    }
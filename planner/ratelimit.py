@@ -0,0 +1,145 @@
+"""Sliding-window rate limits and a concurrency cap for AI calls."""
+
+import contextlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .counters import incr_counter
+
+GENERATE = "generate"
+REFINE = "refine"
+CREATE_INVITE = "create_invite"
+
+IN_FLIGHT_CACHE_KEY = "planner:ai:in-flight"
+
+
+class AdmissionRejected(Exception):
+    """Raised when too many AI calls are already in flight."""
+
+
+def parse_rate(value: str):
+    """Parse ``"<tokens>/<seconds>"`` into ``(capacity, refill_per_second)``."""
+    tokens, _, seconds = (value or "").partition("/")
+    capacity = int(tokens)
+    period = float(seconds or 60)
+    return capacity, capacity / period if period > 0 else 0.0
+
+
+def client_ip(request) -> str:
+    """The address the outermost trusted proxy saw the request come from.
+
+    Each of the ``RATE_LIMIT_TRUSTED_PROXIES`` proxies appends one hop to
+    ``X-Forwarded-For``, so the client is that many hops from the right;
+    values further left are whatever the client sent.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies > 0:
+        hops = [
+            hop.strip()
+            for hop in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if hop.strip()
+        ]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _scopes(request, plan=None):
+    scopes = []
+    session_key = getattr(getattr(request, "session", None), "session_key", None)
+    if session_key:
+        scopes.append(("session", session_key))
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        scopes.append(("user", user.pk))
+    ip = client_ip(request)
+    if ip:
+        scopes.append(("ip", ip))
+    if plan is not None:
+        scopes.append(("plan", plan.pk))
+    return scopes
+
+
+def _bucket_key(bucket, scope, ident, window):
+    return f"planner:ratelimit:{bucket}:{scope}:{ident}:{window}"
+
+
+def check_rate_limit(request, bucket: str, plan=None) -> int:
+    """Count one request against every scope's sliding window.
+
+    Each scope keeps a counter per fixed window of the bucket's period; the
+    current count plus the previous window's count, weighted by how much of
+    it still overlaps the last period, must stay within the capacity. Only
+    atomic cache ``incr``/``decr`` calls are used, so the limit holds across
+    workers and instances sharing the cache.
+
+    Returns 0 when the request is admitted, otherwise the number of seconds
+    until every exhausted scope would admit it. A rejected request gives its
+    count back to every scope.
+    """
+    if not settings.RATE_LIMIT_ENABLED or bucket not in settings.RATE_LIMITS:
+        return 0
+    capacity, refill_rate = parse_rate(settings.RATE_LIMITS[bucket])
+    if capacity <= 0 or refill_rate <= 0:
+        return 0
+    period = capacity / refill_rate
+
+    now = time.time()
+    window = int(now // period)
+    elapsed = now - window * period
+    overlap = 1 - elapsed / period
+    scopes = _scopes(request, plan)
+    previous = cache.get_many(
+        [_bucket_key(bucket, scope, ident, window - 1) for scope, ident in scopes]
+    )
+
+    taken = []
+    retry_after = 0.0
+    for scope, ident in scopes:
+        key = _bucket_key(bucket, scope, ident, window)
+        count = incr_counter(key, timeout=math.ceil(2 * period))
+        taken.append(key)
+        earlier = previous.get(_bucket_key(bucket, scope, ident, window - 1), 0)
+        estimate = earlier * overlap + count
+        if estimate <= capacity:
+            continue
+        if count > capacity:
+            wait = period - elapsed
+        else:
+            # The previous window's share decays linearly to zero.
+            wait = (estimate - capacity) * period / earlier
+        retry_after = max(retry_after, wait)
+
+    if retry_after:
+        for key in taken:
+            with contextlib.suppress(ValueError):
+                cache.decr(key)
+        return max(1, math.ceil(retry_after))
+    return 0
+
+
+@contextlib.contextmanager
+def ai_call_slot():
+    """Hold one of ``AI_MAX_CONCURRENT_CALLS`` slots for an AI request.
+
+    Raises ``AdmissionRejected`` instead of queuing when every slot is taken,
+    so callers can shed load to the local fallback.
+    """
+    limit = settings.AI_MAX_CONCURRENT_CALLS
+    if limit <= 0:
+        yield
+        return
+
+    in_flight = incr_counter(
+        IN_FLIGHT_CACHE_KEY, timeout=settings.AI_SLOT_TIMEOUT_SECONDS
+    )
+    try:
+        if in_flight > limit:
+            raise AdmissionRejected(f"{in_flight - 1} AI calls already in flight")
+        yield
+    finally:
+        with contextlib.suppress(ValueError):
+            cache.decr(IN_FLIGHT_CACHE_KEY)
@@ -0,0 +1,218 @@
+"""Archive and delete plans nobody has touched in a long time."""
+
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import DevicePlanLink, GeneratedVote, Participant, Plan, Vote
+
+
+def expired_plans(now=None):
+    """Plans whose last activity is older than their retention policy.
+
+    Activity is the newest of creation, any vote and any device visit.
+    Plans linked to an account use ``RETENTION_ACCOUNT_PLAN_DAYS``, where
+    ``0`` keeps them forever.
+    """
+    now = now or timezone.now()
+    plans = Plan.objects.annotate(
+        last_activity=Greatest(
+            "created_at",
+            Coalesce(Max("participants__generated_vote__submitted_at"), "created_at"),
+            Coalesce(Max("participants__vote__submitted_at"), "created_at"),
+            Coalesce(Max("participants__device_links__last_seen_at"), "created_at"),
+        ),
+        has_account=Q(created_by__isnull=False)
+        | Exists(Participant.objects.filter(plan=OuterRef("pk"), user__isnull=False)),
+    )
+    expired = Q(
+        has_account=False,
+        last_activity__lt=now - timedelta(days=settings.RETENTION_PLAN_DAYS),
+    )
+    if settings.RETENTION_ACCOUNT_PLAN_DAYS:
+        expired |= Q(
+            has_account=True,
+            last_activity__lt=now
+            - timedelta(days=settings.RETENTION_ACCOUNT_PLAN_DAYS),
+        )
+    return plans.filter(expired)
+
+
+def _answers(participant):
+    try:
+        return participant.generated_vote.answers
+    except GeneratedVote.DoesNotExist:
+        pass
+    try:
+        vote = participant.vote
+    except Vote.DoesNotExist:
+        return None
+    return {
+        field.name: getattr(vote, field.name)
+        for field in Vote._meta.concrete_fields
+        if field.name not in ("id", "participant", "submitted_at")
+    }
+
+
+def _participant_record(person, include_tokens):
+    record = {
+        "role": person.role,
+        "email": person.email,
+        "user_id": person.user_id,
+        "ideal_date": person.ideal_date,
+        "answers": _answers(person),
+    }
+    if include_tokens:
+        record["token"] = person.token
+    return record
+
+
+def plan_record(plan, include_tokens=False):
+    """A self-contained JSON-ready dict for one plan and its participants.
+
+    Participant tokens are bearer credentials for the plan pages, so they
+    are left out unless ``include_tokens`` is set for a round-trip restore.
+    """
+    return {
+        "id": plan.id,
+        "created_by_id": plan.created_by_id,
+        "inviter_email": plan.inviter_email,
+        "invitee_email": plan.invitee_email,
+        "city": plan.city,
+        "generated_questions": plan.generated_questions,
+        "ai_summary": plan.ai_summary,
+        "created_at": plan.created_at.isoformat(),
+        "participants": [
+            _participant_record(person, include_tokens)
+            for person in plan.participants.all()
+        ],
+    }
+
+
+def _append_chunk(path: Path, records):
+    # Each chunk is its own gzip member, fsynced before the rows are
+    # deleted, so an interrupted run never loses archived data.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for record in records:
+                line = json.dumps(record, cls=DjangoJSONEncoder, sort_keys=True)
+                archive.write(line.encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def read_archive(path):
+    """Yield archived plan records, skipping repeats left by a crashed run."""
+    seen = set()
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            record = json.loads(line)
+            if record["id"] not in seen:
+                seen.add(record["id"])
+                yield record
+
+
+def archive_path(now=None):
+    now = now or timezone.now()
+    return Path(settings.RETENTION_ARCHIVE_DIR) / f"plans-{now:%Y%m%d}.jsonl.gz"
+
+
+def archive_expired_plans(path=None, batch_size=None, limit=None, now=None):
+    """Archive expired plans to ``path`` and delete them, one chunk per
+    transaction.
+
+    Safe to re-run or interrupt: deleted plans no longer match, so the next
+    run picks up where the last one stopped. Returns counts and timings.
+    """
+    now = now or timezone.now()
+    path = Path(path or archive_path(now))
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    stats = {"plans": 0, "rows_deleted": 0, "chunks": 0, "archive": str(path)}
+    started = time.perf_counter()
+    last_id = 0
+
+    while limit is None or stats["plans"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats["plans"])
+        with transaction.atomic():
+            ids = list(
+                expired_plans(now)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:size]
+            )
+            if not ids:
+                break
+            plans = Plan.objects.filter(id__in=ids).prefetch_related(
+                "participants__generated_vote", "participants__vote"
+            )
+            _append_chunk(path, [plan_record(plan) for plan in plans])
+            deleted, _per_model = Plan.objects.filter(id__in=ids).delete()
+        last_id = ids[-1]
+        stats["plans"] += len(ids)
+        stats["rows_deleted"] += deleted
+        stats["chunks"] += 1
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def prune_device_links(now=None, batch_size=None):
+    """Delete the links of devices whose session has expired.
+
+    A session outlives its device's newest link by at most
+    ``SESSION_COOKIE_AGE`` plus ``DEVICE_LINK_TOUCH_SECONDS``, so a device
+    with any link seen since then keeps all of its links: its session may
+    still list every one of them on the dashboard.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    cutoff = now - timedelta(
+        seconds=settings.SESSION_COOKIE_AGE + settings.DEVICE_LINK_TOUCH_SECONDS
+    )
+    recently_seen = DevicePlanLink.objects.filter(
+        device_key=OuterRef("device_key"), last_seen_at__gte=cutoff
+    )
+    return _delete_in_batches(
+        DevicePlanLink.objects.filter(last_seen_at__lt=cutoff).exclude(
+            Exists(recently_seen)
+        ),
+        batch_size,
+    )
+
+
+def clear_expired_sessions(now=None, batch_size=None):
+    """Delete expired database sessions in batches.
+
+    Other session engines clean up after themselves and report ``0``.
+    """
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(store, "get_model_class"):
+        store.clear_expired()
+        return 0
+    now = now or timezone.now()
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    return _delete_in_batches(
+        store.get_model_class().objects.filter(expire_date__lt=now), batch_size
+    )
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        keys = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        count, _per_model = queryset.model.objects.filter(pk__in=keys).delete()
+        deleted += count
@@ -0,0 +1,206 @@
+"""Reuse validated question schemas for couples with similar descriptions."""
+
+import copy
+import itertools
+import random
+import re
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .counters import incr_counter
+from .models import SchemaLibraryEntry
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+HITS_CACHE_KEY = "planner:schema-library:hits"
+MISSES_CACHE_KEY = "planner:schema-library:misses"
+
+
+def _shingles(text: str):
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    shingles = set(tokens)
+    shingles.update(f"{left} {right}" for left, right in itertools.pairwise(tokens))
+    return {zlib.crc32(shingle.encode()) for shingle in shingles}
+
+
+def _permutations(count: int):
+    rng = random.Random(20240214)
+    return [
+        (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+        for _ in range(count)
+    ]
+
+
+def minhash(text: str, permutations) -> list[int]:
+    """Return the MinHash signature of a description's word shingles."""
+    hashes = _shingles(text)
+    if not hashes:
+        return [_MAX_HASH] * len(permutations)
+    return [
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+        for a, b in permutations
+    ]
+
+
+def estimated_similarity(left, right) -> float:
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def couple_similarity(signatures, other) -> float:
+    """Score two couples, letting either description match either role."""
+    if len(signatures) != 2 or len(other) != 2:
+        return 0.0
+    same_order = (
+        estimated_similarity(signatures[0], other[0])
+        + estimated_similarity(signatures[1], other[1])
+    ) / 2
+    swapped = (
+        estimated_similarity(signatures[0], other[1])
+        + estimated_similarity(signatures[1], other[0])
+    ) / 2
+    return max(same_order, swapped)
+
+
+class SchemaLibrary:
+    """In-memory LSH index over ``SchemaLibraryEntry`` rows.
+
+    Each description signature is split into bands; entries sharing any band
+    with either description are candidates, and the best candidate above
+    ``SCHEMA_LIBRARY_THRESHOLD`` is reused. Rows are loaded lazily and new
+    rows written by other workers are picked up every
+    ``SCHEMA_LIBRARY_REFRESH_SECONDS``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._permutations = _permutations(settings.SCHEMA_LIBRARY_NUM_PERM)
+        self._rows_per_band = max(
+            1, settings.SCHEMA_LIBRARY_NUM_PERM // settings.SCHEMA_LIBRARY_BANDS
+        )
+        self._entries = {}
+        self._buckets = {}
+        self._last_loaded_id = 0
+        self._loaded_at = None
+
+    def _band_keys(self, locale, signature):
+        rows = self._rows_per_band
+        for start in range(0, len(signature) - rows + 1, rows):
+            yield (locale, start, tuple(signature[start : start + rows]))
+
+    def _index(self, entry_id, locale, signatures, schema):
+        self._entries[entry_id] = (locale, signatures, schema)
+        for signature in signatures:
+            for key in self._band_keys(locale, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+
+    def _forget(self, entry_id):
+        locale, signatures, _schema = self._entries.pop(entry_id, (None, [], None))
+        for signature in signatures:
+            for key in self._band_keys(locale, signature):
+                self._buckets.get(key, set()).discard(entry_id)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if (
+            self._loaded_at is not None
+            and now - self._loaded_at < settings.SCHEMA_LIBRARY_REFRESH_SECONDS
+        ):
+            return
+        self._loaded_at = now
+        rows = SchemaLibraryEntry.objects.filter(
+            pk__gt=self._last_loaded_id
+        ).values_list("pk", "locale", "signatures", "generated_questions")
+        for entry_id, locale, signatures, schema in rows.order_by("pk"):
+            if len(signatures) == 2:
+                self._index(entry_id, locale, signatures, schema)
+            self._last_loaded_id = max(self._last_loaded_id, entry_id)
+
+    def signatures(self, descriptions):
+        return [minhash(text, self._permutations) for text in descriptions]
+
+    def lookup(self, descriptions, locale: str = ""):
+        """Return a stored schema for a similar couple, or ``None``."""
+        if not settings.SCHEMA_LIBRARY_ENABLED or len(descriptions) != 2:
+            return None
+        signatures = self.signatures(descriptions)
+
+        with self._lock:
+            self._refresh()
+            candidates = set()
+            for signature in signatures:
+                for key in self._band_keys(locale, signature):
+                    candidates.update(self._buckets.get(key, ()))
+            ranked = sorted(
+                (
+                    (
+                        couple_similarity(signatures, self._entries[entry_id][1]),
+                        entry_id,
+                    )
+                    for entry_id in candidates
+                ),
+                reverse=True,
+            )
+
+        for score, entry_id in ranked:
+            if score < settings.SCHEMA_LIBRARY_THRESHOLD:
+                break
+            updated = SchemaLibraryEntry.objects.filter(pk=entry_id).update(
+                hits=F("hits") + 1, last_used_at=timezone.now()
+            )
+            if not updated:
+                with self._lock:
+                    self._forget(entry_id)
+                continue
+            incr_counter(HITS_CACHE_KEY)
+            with self._lock:
+                return copy.deepcopy(self._entries.get(entry_id, (None, None, None))[2])
+
+        incr_counter(MISSES_CACHE_KEY)
+        return None
+
+    def remember(self, descriptions, locale: str, schema):
+        if not settings.SCHEMA_LIBRARY_ENABLED or len(descriptions) != 2:
+            return None
+        signatures = self.signatures(descriptions)
+        entry = SchemaLibraryEntry.objects.create(
+            locale=locale,
+            signatures=signatures,
+            generated_questions=schema,
+        )
+        with self._lock:
+            self._index(entry.pk, locale, signatures, schema)
+        return entry
+
+
+def library_stats():
+    hits = cache.get(HITS_CACHE_KEY, 0)
+    misses = cache.get(MISSES_CACHE_KEY, 0)
+    lookups = hits + misses
+    return {
+        "entries": SchemaLibraryEntry.objects.count(),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_schema_library():
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = SchemaLibrary()
+        return _library
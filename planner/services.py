@@ -1,16 +1,48 @@
 import copy
+import functools
 import importlib
 import json
 import os
 import re
+import threading
 
+from django.conf import settings
+
+from .batching import MicroBatcher
+from .compatibility import aggregate_compatibility, plan_compatibility
 from .constants import DEFAULT_GENERATED_QUESTIONS
+from .deadlines import is_timeout
+from .itinerary import build_local_itinerary
+from .localization import canonical_city, canonical_locale
 from .models import Vote
-
+from .providers import generate as generate_with_fallback
+from .question_schema import (
+    BATCH_RESPONSE_SCHEMA,
+    RESPONSE_SCHEMA,
+    accept_schema,
+    normalize_schema,
+)
+from .ratelimit import AdmissionRejected, ai_call_slot
+from .schema_library import get_schema_library
 
 _NUMBERED_STEP_RE = re.compile(
     r"^\s*(?:\d+[\.)]|[ivxlcdm]+[\.)])\s+(.*)$", re.IGNORECASE
 )
+_QUESTION_IDS_LINE = (
+    "Use exactly these ids in this order: dinner_choice, activity_choice, "
+    "sweet_choice, budget_choice, mood_choice, duration_choice, "
+    "transport_choice, dietary_notes, accessibility_notes.\n"
+)
+_QUESTION_TYPES_LINE = (
+    "dietary_notes and accessibility_notes are type=text, required=false, with "
+    "a placeholder; every other id is type=single, required=true, with 3-5 "
+    "options that each have a value and a label.\n"
+)
+
+_schema_batcher = None
+_schema_batcher_lock = threading.Lock()
+_gemini_clients = {}
+_gemini_clients_lock = threading.Lock()
 
 
 def _clean_line(line: str) -> str:
@@ -102,17 +134,61 @@ def _extract_json_object(text: str):
     return parsed if isinstance(parsed, dict) else {}
 
 
-def _gemini_generate(prompt: str, api_key: str):
-    genai = importlib.import_module("google.genai")
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
+@functools.cache
+def _genai():
+    # google.genai takes longer to import than the rest of the app, so load
+    # it on the first AI call rather than at worker boot.
+    return importlib.import_module("google.genai")
+
+
+def _gemini_client(api_key: str):
+    # Clients hold an HTTP connection pool and are safe to share between
+    # threads, so build one per key instead of one per request.
+    with _gemini_clients_lock:
+        client = _gemini_clients.get(api_key)
+        if client is None:
+            client = _gemini_clients[api_key] = _genai().Client(api_key=api_key)
+        return client
+
+
+def _call_gemini(api_key: str, response_schema, model: str, prompt: str, timeout):
+    # The SDK takes its HTTP timeout in milliseconds.
+    config = {"http_options": {"timeout": int(timeout * 1000)}}
+    if response_schema is not None:
+        # With a response schema Gemini answers in JSON mode, constrained to it.
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = response_schema
+    response = _gemini_client(api_key).models.generate_content(
+        model=model,
         contents=prompt,
+        config=config,
     )
     return (response.text or "").strip()
 
 
+def _gemini_generate(prompt: str, api_key: str, response_schema=None):
+    # One slot per request, shared by its fallbacks and hedged attempts.
+    with ai_call_slot():
+        return generate_with_fallback(
+            functools.partial(_call_gemini, api_key, response_schema), prompt
+        )
+
+
+def _parse_json(text: str):
+    # JSON mode output parses directly; the brace scan is only for replies
+    # that still arrive wrapped in prose or code fences.
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return _extract_json_object(text)
+    return parsed if isinstance(parsed, dict) else {}
+
+
 def _normalize_gemini_error(exc: Exception) -> str:
+    if isinstance(exc, AdmissionRejected):
+        return "AI is busy right now"
+    if is_timeout(exc):
+        return "Gemini timed out"
     lowered = str(exc).lower()
     if "resource_exhausted" in lowered or "quota" in lowered or "429" in lowered:
         return "Gemini quota exceeded"
@@ -121,94 +197,134 @@ def _normalize_gemini_error(exc: Exception) -> str:
     return "Gemini unavailable"
 
 
-def _normalize_schema(schema):
-    default = copy.deepcopy(DEFAULT_GENERATED_QUESTIONS)
-    if not isinstance(schema, dict):
-        return default
-    questions = schema.get("questions")
-    if not isinstance(questions, list):
-        return default
+def _gemini_api_key():
+    return os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 
-    default_by_id = {item["id"]: item for item in default["questions"]}
-    normalized = []
-    for item in questions:
-        if not isinstance(item, dict):
-            continue
-        question_id = item.get("id")
-        if question_id not in default_by_id:
-            continue
-        base = copy.deepcopy(default_by_id[question_id])
-
-        text = item.get("text")
-        if isinstance(text, str) and text.strip():
-            base["text"] = text.strip()
-
-        if base.get("type") == "single":
-            options = []
-            if isinstance(item.get("options"), list):
-                for raw_option in item["options"]:
-                    if not isinstance(raw_option, dict):
-                        continue
-                    value = raw_option.get("value")
-                    label = raw_option.get("label")
-                    if isinstance(value, str) and isinstance(label, str):
-                        if value.strip() and label.strip():
-                            options.append(
-                                {"value": value.strip(), "label": label.strip()}
-                            )
-            if len(options) >= 2:
-                base["options"] = options[:5]
-
-        if base.get("type") == "text":
-            placeholder = item.get("placeholder")
-            if isinstance(placeholder, str):
-                base["placeholder"] = placeholder.strip()
-
-        normalized.append(base)
-
-    if len(normalized) != len(default["questions"]):
-        return default
-    return {"questions": normalized}
 
+def _ideal_dates(plan):
+    participants = sorted(
+        plan.participants.all(),
+        key=lambda person: person.role != person.INVITER,
+    )
+    return [
+        (participant, (participant.ideal_date or "").strip())
+        for participant in participants
+        if (participant.ideal_date or "").strip()
+    ]
 
-def generate_vote_questions(plan, locale_hint: str = "en-US"):
-    default = copy.deepcopy(DEFAULT_GENERATED_QUESTIONS)
-    people = []
-    for participant in plan.participants.all():
-        description = (participant.ideal_date or "").strip()
-        if description:
-            people.append(
-                f"- {participant.get_role_display()} ideal date: {description}"
-            )
 
-    if len(people) < 2:
-        return default
+def _question_people(ideal_dates):
+    return [
+        f"- {participant.get_role_display()} ideal date: {description}"
+        for participant, description in ideal_dates
+    ]
 
-    gemini_api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-    if not gemini_api_key:
-        return default
 
+def _generate_single_schema(people, locale_hint: str, api_key: str):
     prompt = (
         "You are helping a couple plan one date night. "
-        "Generate personalized voting questions and answer options. "
-        'Return JSON only with this shape: {"questions":[...]}\n'
+        "Generate personalized voting questions and answer options.\n"
         f"Locale preference: {locale_hint}\n"
-        "Use exactly these ids in this order: dinner_choice, activity_choice, sweet_choice, budget_choice, mood_choice, duration_choice, transport_choice, dietary_notes, accessibility_notes.\n"
-        "For single-choice ids, include 3-5 options with value and label.\n"
-        "For text ids, keep type=text and include placeholder.\n\n"
+        f"{_QUESTION_IDS_LINE}"
+        f"{_QUESTION_TYPES_LINE}\n"
         f"Couple descriptions:\n{'\n'.join(people)}"
     )
 
     try:
-        parsed = _extract_json_object(_gemini_generate(prompt, gemini_api_key))
-        return _normalize_schema(parsed)
+        parsed = _parse_json(_gemini_generate(prompt, api_key, RESPONSE_SCHEMA))
     except Exception:
+        return None
+    return accept_schema(parsed)
+
+
+def _generate_schema_batch(jobs):
+    api_key = _gemini_api_key()
+    if not api_key:
+        return {}
+    if len(jobs) == 1:
+        [(key, (people, locale_hint))] = jobs.items()
+        return {
+            key: normalize_schema(_generate_single_schema(people, locale_hint, api_key))
+        }
+
+    couples = []
+    for key, (people, locale_hint) in jobs.items():
+        couples.append(
+            f"Couple key={key} (locale preference: {locale_hint}):\n"
+            + "\n".join(people)
+        )
+    prompt = (
+        "You are helping several couples each plan one date night. "
+        "Generate personalized voting questions and answer options for every couple below.\n"
+        "Copy each couple's key exactly and write each couple's questions in its locale.\n"
+        f"{_QUESTION_IDS_LINE}"
+        f"{_QUESTION_TYPES_LINE}\n"
+        f"{'\n\n'.join(couples)}"
+    )
+
+    parsed = _parse_json(_gemini_generate(prompt, api_key, BATCH_RESPONSE_SCHEMA))
+    items = parsed.get("plans")
+    if not isinstance(items, list):
+        return {}
+
+    keys_by_text = {str(key): key for key in jobs}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        key = keys_by_text.get(str(item.get("key")))
+        if key is None or key in results:
+            continue
+        schema = accept_schema({"questions": item.get("questions")})
+        if schema:
+            results[key] = schema
+    return results
+
+
+def _get_schema_batcher():
+    global _schema_batcher
+    with _schema_batcher_lock:
+        if _schema_batcher is None:
+            _schema_batcher = MicroBatcher(
+                _generate_schema_batch,
+                window_seconds=settings.QUESTION_BATCH_WINDOW_MS / 1000,
+                max_batch_size=settings.QUESTION_BATCH_MAX_SIZE,
+            )
+        return _schema_batcher
+
+
+def generate_vote_questions(plan, locale_hint: str = "en-US"):
+    default = copy.deepcopy(DEFAULT_GENERATED_QUESTIONS)
+    locale_hint = canonical_locale(locale_hint)
+    ideal_dates = _ideal_dates(plan)
+    if len(ideal_dates) < 2:
         return default
 
+    descriptions = [description for _participant, description in ideal_dates]
+    library = get_schema_library()
+    schema = library.lookup(descriptions, locale_hint)
+    if schema:
+        return schema
 
-def _collect_answer_lines(plan):
-    schema = _normalize_schema(plan.generated_questions)
-    lines = []
+    gemini_api_key = _gemini_api_key()
+    if not gemini_api_key:
+        return default
+
+    people = _question_people(ideal_dates)
+    schema = None
+    if settings.QUESTION_BATCH_WINDOW_MS > 0:
+        schema = _get_schema_batcher().submit(plan.pk, (people, locale_hint))
+    if not schema:
+        schema = _generate_single_schema(people, locale_hint, gemini_api_key)
+    if not schema or schema == default:
+        return default
+
+    library.remember(descriptions, locale_hint, schema)
+    return schema
+
+
+def _collect_answers(plan):
+    collected = []
     for participant in plan.participants.all():
         generated = getattr(participant, "generated_vote", None)
         answers = getattr(generated, "answers", None)
@@ -228,9 +344,17 @@ def _collect_answer_lines(plan):
                 }
             except Vote.DoesNotExist:
                 answers = None
-        if not answers:
-            continue
+        if answers:
+            collected.append((participant, answers))
+    return collected
+
 
+def _collect_answer_lines(plan, collected=None):
+    schema = normalize_schema(plan.generated_questions)
+    lines = []
+    for participant, answers in (
+        _collect_answers(plan) if collected is None else collected
+    ):
         answer_parts = []
         for question in schema["questions"]:
             question_id = question["id"]
@@ -256,27 +380,89 @@ def _collect_answer_lines(plan):
     return lines
 
 
+def _couple_answers(collected):
+    """``(inviter_answers, invitee_answers)``, or ``None`` until both voted."""
+    if len(collected) < 2:
+        return None
+    collected = sorted(collected, key=lambda item: item[0].role != item[0].INVITER)
+    return collected[0][1], collected[1][1]
+
+
+def compatibility_report(plan):
+    """Agreement, weighted score and compromises for a plan's two sets of
+    answers (see :func:`compatibility.plan_compatibility`), or ``None``
+    until both partners have voted."""
+    couple = _couple_answers(_collect_answers(plan))
+    if couple is None:
+        return None
+    return plan_compatibility(normalize_schema(plan.generated_questions), *couple)
+
+
+def compatibility_overview(plans):
+    """:func:`compatibility.aggregate_compatibility` over every plan in
+    ``plans`` where both partners have voted."""
+    plans = plans.prefetch_related("participants__generated_vote", "participants__vote")
+
+    def couples():
+        for plan in plans:
+            couple = _couple_answers(_collect_answers(plan))
+            if couple is not None:
+                yield normalize_schema(plan.generated_questions), *couple
+
+    return aggregate_compatibility(couples())
+
+
+def _compatibility_lines(plan, answers_a, answers_b):
+    # One line per question instead of every question once per partner.
+    schema = normalize_schema(plan.generated_questions)
+    report = plan_compatibility(schema, answers_a, answers_b, compromises=1)
+    lines = [f"Overall compatibility: {report['percent']}%"]
+    for question in report["questions"]:
+        mine, theirs = question["answers"]
+        if mine["value"] == theirs["value"]:
+            lines.append(f"- {question['text']} Both: {mine['label']}")
+            continue
+        line = (
+            f"- {question['text']} Inviter: {mine['label']}; invitee: {theirs['label']}"
+        )
+        if question["compromises"]:
+            line += f"; middle ground: {question['compromises'][0]['label']}"
+        lines.append(line)
+    notes = []
+    for question in schema["questions"]:
+        if question.get("type") != "text":
+            continue
+        for answers in (answers_a, answers_b):
+            value = str(answers.get(question["id"]) or "").strip()
+            if value and value not in notes:
+                notes.append(value)
+    if notes:
+        lines.append(f"- Notes: {'; '.join(notes)}")
+    return lines
+
+
 def _build_local_itinerary(plan, note: str = "") -> str:
-    lines = _collect_answer_lines(plan)
-    if len(lines) < 2:
+    couple = _couple_answers(_collect_answers(plan))
+    if couple is None:
         return "Waiting for both votes before creating a shared date plan."
 
-    intro = "Local fallback plan (AI unavailable right now)."
+    answers_a, answers_b = couple
+    overlap, steps, closing = build_local_itinerary(
+        normalize_schema(plan.generated_questions),
+        answers_a,
+        answers_b,
+        canonical_city(plan.city),
+    )
+
+    intro = (
+        f"Local fallback plan (AI unavailable right now). "
+        f"Your answers overlap {overlap}%."
+    )
     if note:
         intro = f"{intro} Reason: {note}"
 
     return _clean_generated_plan(
-        "\n".join(
-            [
-                intro,
-                "- Start with a low-pressure meetup to settle into the evening.",
-                "- Pick dinner that best matches your shared food and budget preferences.",
-                "- Do one activity that fits your overlap in mood and pace.",
-                "- Add one personal romantic touch inspired by your descriptions.",
-                "- End with a sweet stop and a calm ride or walk home.",
-                "Close by choosing one thing to repeat on your next date.",
-            ]
-        )
+        "\n".join([intro, *(f"- {step}" for step in steps), closing])
     )
 
 
@@ -286,11 +472,17 @@ def generate_date_plan(
     feedback: str = "",
     previous_summary: str = "",
 ) -> str:
-    gemini_api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    gemini_api_key = _gemini_api_key()
     gemini_reason = ""
 
-    vote_lines = _collect_answer_lines(plan)
-    city_hint = (plan.city or "").strip()
+    collected = _collect_answers(plan)
+    couple = _couple_answers(collected)
+    if couple is not None:
+        vote_lines = _compatibility_lines(plan, *couple)
+    else:
+        vote_lines = _collect_answer_lines(plan, collected)
+    locale_hint = canonical_locale(locale_hint)
+    city_hint = canonical_city(plan.city)
     locality_line = (
         f"Locality: {city_hint}. Tailor suggestions to places and vibes common in this area."
         if city_hint
@@ -0,0 +1,33 @@
+"""Change events for plans, sent once the change has committed."""
+
+from django.core.cache import cache
+from django.dispatch import Signal, receiver
+
+from .counters import incr_counter
+
+DESCRIBE_CACHE_PREFIX = "planner:describe"
+
+# Sent with ``plan``, ``participant``, ``votes_cleared`` (rows deleted),
+# ``vote_ids`` (deleted ids per vote table: "generated" and "legacy") and
+# ``summary_cleared`` after a participant's ideal date changes. Consumers:
+# the counters below and the answer rollups in ``planner.analytics``.
+description_changed = Signal()
+
+
+def record_unchanged_description():
+    incr_counter(f"{DESCRIBE_CACHE_PREFIX}:unchanged")
+
+
+@receiver(description_changed)
+def _count_description_change(sender, votes_cleared, summary_cleared, **kwargs):
+    incr_counter(f"{DESCRIBE_CACHE_PREFIX}:changed")
+    if votes_cleared:
+        incr_counter(f"{DESCRIBE_CACHE_PREFIX}:votes_cleared", votes_cleared)
+    if summary_cleared:
+        incr_counter(f"{DESCRIBE_CACHE_PREFIX}:summaries_cleared")
+
+
+def describe_stats():
+    names = ("changed", "unchanged", "votes_cleared", "summaries_cleared")
+    values = cache.get_many([f"{DESCRIBE_CACHE_PREFIX}:{name}" for name in names])
+    return {name: values.get(f"{DESCRIBE_CACHE_PREFIX}:{name}", 0) for name in names}
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .assets import minify, used_tokens
+
+
+class MinifiedCompressedManifestStaticFilesStorage(
+    CompressedManifestStaticFilesStorage
+):
+    """Purge and minify ``STATIC_MINIFY_CSS`` before whitenoise fingerprints
+    the files and writes their gzip and brotli variants."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            tokens = used_tokens()
+            for name in paths:
+                if name in settings.STATIC_MINIFY_CSS:
+                    path = Path(self.path(name))
+                    css = path.read_text(encoding="utf-8")
+                    path.write_text(minify(css, tokens), encoding="utf-8")
+                    # Hash and compress the minified copy, not the source.
+                    paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
@@ -0,0 +1,47 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from planner.assets import (
+    GOOGLE_FONTS_URL,
+    LATIN_UNICODE_RANGE,
+    available_font_faces,
+    critical_css,
+)
+
+register = template.Library()
+
+
+@register.simple_tag
+def font_preloads():
+    """Preload hints for self-hosted fonts, or the Google Fonts stylesheet
+    while none have been built."""
+    faces = available_font_faces()
+    if not faces:
+        return format_html(
+            '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+            '<link rel="preload" href="{url}" as="style" '
+            "onload=\"this.onload=null;this.rel='stylesheet'\">\n"
+            '<noscript><link rel="stylesheet" href="{url}"></noscript>',
+            url=GOOGLE_FONTS_URL,
+        )
+    return format_html_join(
+        "\n",
+        '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>',
+        ((static(path),) for _family, _weight, path, preload in faces if preload),
+    )
+
+
+@register.simple_tag
+def inline_styles():
+    """``@font-face`` rules for self-hosted fonts plus the critical CSS."""
+    faces = "".join(
+        f"@font-face{{font-family:'{family}';font-style:normal;"
+        f"font-weight:{weight};font-display:swap;"
+        f"src:url({static(path)}) format('woff2');"
+        f"unicode-range:{LATIN_UNICODE_RANGE}}}"
+        for family, weight, path, _preload in available_font_faces()
+    )
+    # Both parts come from the app's own stylesheet and font list.
+    return mark_safe(faces + critical_css())
@@ -0,0 +1,152 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from planner.admin import EstimatedCountPaginator, answer_distribution
+from planner.models import GeneratedVote, Participant, Plan, Vote
+
+User = get_user_model()
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="test-pass-123"
+        )
+        self.client.force_login(self.admin)
+
+    def _plans(self, count, start=0):
+        for number in range(start, start + count):
+            plan = Plan.objects.create(
+                inviter_email="me@example.com",
+                invitee_email=f"Partner{number}@example.com",
+                city="Seattle, WA" if number % 2 else "Portland, OR",
+            )
+            inviter = Participant.objects.create(
+                plan=plan, email=plan.inviter_email, role=Participant.INVITER
+            )
+            invitee = Participant.objects.create(
+                plan=plan, email=plan.invitee_email, role=Participant.INVITEE
+            )
+            GeneratedVote.objects.create(
+                participant=inviter,
+                answers={"dinner_choice": "sushi" if number % 3 else "italian"},
+            )
+            Vote.objects.create(
+                participant=invitee,
+                dinner_choice="sushi",
+                activity_choice="music",
+                sweet_choice="coffee",
+                budget_choice="cozy",
+            )
+
+    def _changelist_queries(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f"admin:planner_{name}_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        self._plans(2)
+        few = {
+            name: self._changelist_queries(name)
+            for name in ("participant", "vote", "generatedvote")
+        }
+
+        self._plans(20, start=2)
+        many = {
+            name: self._changelist_queries(name)
+            for name in ("participant", "vote", "generatedvote")
+        }
+
+        self.assertEqual(few, many)
+
+    def test_search_matches_emails_exactly_and_tokens(self):
+        self._plans(3)
+        invitee = Participant.objects.get(email="Partner1@example.com")
+        url = reverse("admin:planner_participant_changelist")
+
+        by_email = self.client.get(url, {"q": "partner1@EXAMPLE.com"})
+        by_token = self.client.get(url, {"q": str(invitee.token)})
+        partial = self.client.get(url, {"q": "partner"})
+
+        self.assertEqual(list(by_email.context["cl"].result_list), [invitee])
+        self.assertEqual(list(by_token.context["cl"].result_list), [invitee])
+        self.assertEqual(partial.context["cl"].result_count, 0)
+
+    def test_plan_search_matches_city_case_insensitively(self):
+        self._plans(2)
+        url = reverse("admin:planner_plan_changelist")
+
+        by_city = self.client.get(url, {"q": "portland, or"})
+        partial = self.client.get(url, {"q": "Portland"})
+
+        self.assertEqual(
+            list(by_city.context["cl"].result_list),
+            list(Plan.objects.filter(city="Portland, OR")),
+        )
+        self.assertEqual(partial.context["cl"].result_count, 0)
+
+    def test_analytics_dashboard_aggregates_generated_and_legacy_answers(self):
+        self._plans(6)
+
+        self.assertEqual(
+            answer_distribution("dinner_choice"), {"sushi": 10, "italian": 2}
+        )
+        response = self.client.get(reverse("admin:planner_plan_analytics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Sushi and candlelight")
+        self.assertContains(response, "83%")
+        self.assertContains(response, "Portland, OR")
+
+    def test_analytics_dashboard_scores_recent_couples_in_bulk(self):
+        self._plans(3)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("admin:planner_plan_analytics"))
+        self._plans(3, start=3)
+
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("admin:planner_plan_analytics"))
+
+        compatibility = response.context["compatibility"]
+        dinner = next(
+            row
+            for row in compatibility["rows"]
+            if row["text"] == "What dinner vibe sounds best?"
+        )
+        self.assertEqual(compatibility["couples"], 6)
+        self.assertEqual(dinner["match_percent"], 67)
+        self.assertEqual(len(few), len(many))
+
+    def test_analytics_dashboard_is_staff_only(self):
+        self.client.logout()
+
+        response = self.client.get(reverse("admin:planner_plan_analytics"))
+
+        self.assertEqual(response.status_code, 302)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_uses_estimate_only_for_large_unfiltered_postgres_tables(self):
+        Plan.objects.create(
+            inviter_email="a@example.com", invitee_email="b@example.com"
+        )
+
+        with (
+            patch.object(connection, "vendor", "postgresql"),
+            patch("planner.admin._estimated_rows", return_value=5_000_000),
+        ):
+            unfiltered = EstimatedCountPaginator(Plan.objects.order_by("id"), 10)
+            filtered = EstimatedCountPaginator(
+                Plan.objects.filter(city="").order_by("id"), 10
+            )
+            self.assertEqual(unfiltered.count, 5_000_000)
+            self.assertEqual(filtered.count, 1)
+
+        small = EstimatedCountPaginator(Plan.objects.order_by("id"), 10)
+        self.assertEqual(small.count, 1)
@@ -0,0 +1,199 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from planner.analytics import answer_trends, rollup_answers, week_start
+from planner.models import (
+    AnswerRollup,
+    GeneratedVote,
+    Participant,
+    Plan,
+    RolledUpVote,
+    Vote,
+)
+
+User = get_user_model()
+
+VOTE = {
+    "dinner_choice": "italian",
+    "activity_choice": "movie",
+    "sweet_choice": "dessert",
+    "budget_choice": "mid",
+    "mood_choice": "classic",
+    "duration_choice": "half",
+    "transport_choice": "mixed",
+    "dietary_notes": "",
+    "accessibility_notes": "",
+}
+
+
+@override_settings(RATE_LIMIT_ENABLED=False, MONITORING_TOKEN="secret")
+class AnswerRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.inviter, self.invitee = self._plan("Austin, TX")
+
+    def _plan(self, city):
+        plan = Plan.objects.create(
+            inviter_email="inviter@example.com",
+            invitee_email="invitee@example.com",
+            city=city,
+        )
+        return [
+            Participant.objects.create(
+                plan=plan, email=email, role=role, ideal_date="Dinner and music"
+            )
+            for email, role in (
+                (plan.inviter_email, Participant.INVITER),
+                (plan.invitee_email, Participant.INVITEE),
+            )
+        ]
+
+    def _counts(self, question_id="dinner_choice"):
+        return dict(
+            AnswerRollup.objects.filter(question_id=question_id, count__gt=0)
+            .values("option")
+            .annotate(total=Sum("count"))
+            .values_list("option", "total")
+        )
+
+    def _catch_up(self, **kwargs):
+        return rollup_answers(now=timezone.now() + timedelta(hours=1), **kwargs)
+
+    def test_saved_vote_is_counted_straight_away(self):
+        self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+
+        rollup = AnswerRollup.objects.get(question_id="dinner_choice")
+        self.assertEqual(
+            (rollup.city, rollup.option, rollup.count), ("Austin, TX", "italian", 1)
+        )
+        self.assertEqual(rollup.week, week_start(timezone.now()))
+        self.assertEqual(self._counts("dietary_notes"), {})
+
+    def test_resaved_vote_replaces_its_old_answers(self):
+        url = reverse("planner:vote", args=[self.inviter.token])
+        self.client.post(url, VOTE)
+        self.client.post(url, {**VOTE, "dinner_choice": "sushi"})
+
+        self.assertEqual(self._counts(), {"sushi": 1})
+        self.assertEqual(self._catch_up()["generated"], 1)
+        self.assertEqual(self._counts(), {"sushi": 1})
+
+    @override_settings(ANALYTICS_ROLLUP_ON_SAVE=False)
+    def test_job_counts_new_rows_from_both_vote_tables_once(self):
+        GeneratedVote.objects.create(participant=self.inviter, answers=VOTE)
+        Vote.objects.create(
+            participant=self.invitee, **{**VOTE, "dinner_choice": "sushi"}
+        )
+
+        self.assertEqual(rollup_answers(), {"generated": 0, "legacy": 0, "removed": 0})
+        self.assertEqual(self._catch_up(), {"generated": 1, "legacy": 1, "removed": 0})
+        self.assertEqual(self._catch_up(), {"generated": 0, "legacy": 0, "removed": 0})
+        self.assertEqual(self._counts(), {"italian": 1, "sushi": 1})
+
+    @override_settings(ANALYTICS_ROLLUP_ON_SAVE=False)
+    def test_batches_resume_from_the_watermark(self):
+        other_inviter, _other_invitee = self._plan("Denver, CO")
+        for participant in (self.inviter, self.invitee, other_inviter):
+            GeneratedVote.objects.create(participant=participant, answers=VOTE)
+
+        first = self._catch_up(batch_size=2)
+        second = self._catch_up(batch_size=2)
+
+        self.assertEqual((first["generated"], second["generated"]), (2, 1))
+        self.assertEqual(self._counts(), {"italian": 3})
+
+    def test_deleted_votes_are_subtracted_by_the_job(self):
+        self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+
+        self.inviter.plan.delete()
+
+        self.assertEqual(self._catch_up()["removed"], 1)
+        self.assertEqual(self._counts(), {})
+
+    def test_deleting_votes_leaves_the_rollup_links_alone(self):
+        self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+
+        with CaptureQueriesContext(connection) as queries:
+            GeneratedVote.objects.filter(participant__plan=self.inviter.plan).delete()
+
+        self.assertFalse(
+            [query for query in queries if "rolledupvote" in query["sql"].lower()]
+        )
+        self.assertEqual(RolledUpVote.objects.count(), 1)
+        self.assertEqual(self._catch_up()["removed"], 1)
+        self.assertFalse(RolledUpVote.objects.exists())
+
+    def test_spellings_of_a_city_share_one_rollup(self):
+        other_inviter, _other_invitee = self._plan("austin tx")
+        self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+        self.client.post(reverse("planner:vote", args=[other_inviter.token]), VOTE)
+
+        rollup = AnswerRollup.objects.get(question_id="dinner_choice")
+        self.assertEqual((rollup.city, rollup.count), ("Austin, TX", 2))
+        self.assertEqual(len(answer_trends(city="Austin, Texas")["trends"]), 7)
+
+    def test_new_description_subtracts_cleared_votes_straight_away(self):
+        url = reverse("planner:vote", args=[self.inviter.token])
+        self.client.post(url, VOTE)
+        self.client.post(reverse("planner:vote", args=[self.invitee.token]), VOTE)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"action": "describe", "ideal_date": "Picnic"})
+
+        self.assertEqual(self._counts(), {})
+        self.assertFalse(RolledUpVote.objects.exists())
+        self.assertEqual(self._catch_up()["removed"], 0)
+
+    def test_trends_report_the_winner_and_are_cached(self):
+        other_inviter, _other_invitee = self._plan("Austin, TX")
+        self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+        self.client.post(reverse("planner:vote", args=[self.invitee.token]), VOTE)
+        self.client.post(
+            reverse("planner:vote", args=[other_inviter.token]),
+            {**VOTE, "dinner_choice": "sushi"},
+        )
+        url = reverse("answer_trend_stats")
+        headers = {"Authorization": "Bearer secret"}
+
+        response = self.client.get(url, {"city": "Austin, TX"}, headers=headers)
+        with self.assertNumQueries(0):
+            answer_trends(city="Austin, TX")
+
+        dinner = next(
+            group
+            for group in response.json()["trends"]
+            if group["question"] == "dinner_choice"
+        )
+        self.assertEqual(dinner["winner"], "italian")
+        self.assertEqual(dinner["options"], {"italian": 2, "sushi": 1})
+        self.assertEqual(dinner["total"], 3)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_new_votes_invalidate_cached_trends(self):
+        answer_trends()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+
+        self.assertTrue(answer_trends()["trends"])
+
+    def test_admin_trends_page_shows_weekly_winners(self):
+        self.client.post(reverse("planner:vote", args=[self.inviter.token]), VOTE)
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="test-pass-123")
+        )
+
+        response = self.client.get(
+            reverse("admin:planner_plan_trends"), {"city": "Austin, TX"}
+        )
+
+        self.assertContains(response, "Cozy Italian spot")
+        self.assertContains(response, "100% of 1")
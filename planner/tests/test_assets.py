@@ -0,0 +1,172 @@
+import importlib.util
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from planner.assets import critical_css, minify
+
+CSS = """
+/* theme */
+:root { --ink: #2f1b20; }
+body { font-family: 'Nunito', sans-serif; }
+body::before { content: '\\2665 \\A'; }
+input[type='text'] { border: 1px solid red; }
+.card, .unused-widget > p { padding: 2rem; }
+.only-unused { color: red; }
+@media (max-width: 600px) {
+  .only-unused { color: blue; }
+  .card { padding: 1rem; }
+}
+@keyframes pulse { from { opacity: 0; } to { opacity: 1; } }
+@keyframes orphan { from { opacity: 0; } to { opacity: 1; } }
+.card:hover { animation: pulse 1s ease; }
+"""
+
+
+class MinifyTests(SimpleTestCase):
+    def test_minify_strips_comments_and_whitespace_but_not_strings(self):
+        css = minify(CSS)
+
+        self.assertNotIn("/*", css)
+        self.assertNotIn("\n", css)
+        self.assertIn(":root{--ink:#2f1b20}", css)
+        self.assertIn("content:'\\2665 \\A'", css)
+        self.assertIn("@media (max-width:600px){", css)
+
+    def test_purge_drops_rules_for_unknown_classes(self):
+        css = minify(CSS, tokens={"card"})
+
+        self.assertIn(".card{padding:2rem}", css)
+        self.assertIn("@media (max-width:600px){.card{padding:1rem}}", css)
+        self.assertIn("input[type='text']{", css)
+        self.assertIn("@keyframes pulse", css)
+        self.assertNotIn("only-unused", css)
+        self.assertNotIn("unused-widget", css)
+        self.assertNotIn("orphan", css)
+
+    def test_tag_matching_keeps_only_shell_elements(self):
+        css = minify(CSS, tokens={"card", "body"}, match_tags=True)
+
+        self.assertIn("body{font-family:'Nunito',sans-serif}", css)
+        self.assertIn(":root{", css)
+        self.assertNotIn("input", css)
+
+    def test_critical_css_covers_the_page_shell(self):
+        css = critical_css()
+
+        self.assertIn(".top-nav{", css)
+        self.assertIn(".page-wrap{", css)
+        self.assertLess(len(css), 14 * 1024)
+
+
+class BaseTemplateAssetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_inline_critical_css_and_load_stylesheet_async(self):
+        response = self.client.get(reverse("planner:home"))
+
+        self.assertContains(response, ".top-nav{")
+        self.assertContains(response, 'rel="preload"')
+        self.assertContains(response, "<noscript>")
+
+    @patch("planner.templatetags.planner_assets.available_font_faces", return_value=())
+    def test_google_fonts_load_without_blocking_until_fonts_are_built(self, _faces):
+        response = self.client.get(reverse("planner:home"))
+
+        self.assertContains(response, 'href="https://fonts.googleapis.com/css2?', 2)
+        self.assertContains(
+            response, 'rel="preconnect" href="https://fonts.gstatic.com"'
+        )
+        self.assertNotContains(response, "@font-face")
+
+    @patch(
+        "planner.templatetags.planner_assets.available_font_faces",
+        return_value=(("Nunito", 400, "planner/fonts/nunito-latin-400.woff2", True),),
+    )
+    def test_self_hosted_fonts_are_declared_and_preloaded(self, _faces):
+        response = self.client.get(reverse("planner:home"))
+
+        self.assertContains(
+            response,
+            '<link rel="preload" href="/static/planner/fonts/nunito-latin-400.woff2" '
+            'as="font" type="font/woff2" crossorigin>',
+            html=False,
+        )
+        self.assertContains(response, "@font-face{font-family:'Nunito'")
+        self.assertContains(response, "font-display:swap")
+        self.assertNotContains(response, "fonts.googleapis.com")
+
+
+class CollectStaticTests(SimpleTestCase):
+    def test_collectstatic_emits_minified_fingerprinted_compressed_css(self):
+        with tempfile.TemporaryDirectory() as root:
+            storages = {
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {
+                    "BACKEND": (
+                        "planner.storage.MinifiedCompressedManifestStaticFilesStorage"
+                    )
+                },
+            }
+            with override_settings(STATIC_ROOT=root, STORAGES=storages):
+                call_command(
+                    "collectstatic",
+                    interactive=False,
+                    ignore_patterns=["admin"],
+                    verbosity=0,
+                )
+
+            manifest = json.loads((Path(root) / "staticfiles.json").read_text())
+            hashed = Path(root) / manifest["paths"]["planner/style.css"]
+            css = hashed.read_text()
+
+            self.assertNotIn("\n", css.strip())
+            self.assertTrue(hashed.with_name(hashed.name + ".gz").exists())
+            self.assertTrue(hashed.with_name(hashed.name + ".br").exists())
+
+
+@skipUnless(importlib.util.find_spec("fontTools"), "fonttools is not installed")
+class SubsetFontsTests(SimpleTestCase):
+    def _build_font(self, path, family, weight):
+        from fontTools.fontBuilder import FontBuilder
+        from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+        builder = FontBuilder(1000, isTTF=True)
+        glyphs = [".notdef", "A", "han"]
+        builder.setupGlyphOrder(glyphs)
+        builder.setupCharacterMap({0x41: "A", 0x4E00: "han"})
+        pen = TTGlyphPen(None)
+        pen.moveTo((0, 0))
+        pen.lineTo((0, 500))
+        pen.lineTo((500, 0))
+        pen.closePath()
+        glyph = pen.glyph()
+        builder.setupGlyf({name: glyph for name in glyphs})
+        builder.setupHorizontalMetrics({name: (600, 0) for name in glyphs})
+        builder.setupHorizontalHeader(ascent=800, descent=-200)
+        builder.setupNameTable({"familyName": family, "styleName": "Regular"})
+        builder.setupOS2(usWeightClass=weight)
+        builder.setupPost()
+        builder.save(path)
+
+    def test_subsets_matching_faces_to_latin_woff2(self):
+        from fontTools.ttLib import TTFont
+
+        with tempfile.TemporaryDirectory() as root:
+            source = Path(root) / "Nunito-Regular.ttf"
+            self._build_font(source, "Nunito", 400)
+
+            call_command("subset_fonts", str(source), output=root, stdout=StringIO())
+
+            font = TTFont(Path(root) / "planner/fonts/nunito-latin-400.woff2")
+            self.assertEqual(font.flavor, "woff2")
+            self.assertEqual(set(font.getBestCmap()), {0x41})
@@ -0,0 +1,114 @@
+import json
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from planner import services
+from planner.batching import MicroBatcher
+from planner.constants import DEFAULT_GENERATED_QUESTIONS
+from planner.models import Participant, Plan
+
+
+def _schema_payload(dinner_label="Ramen bar"):
+    questions = json.loads(json.dumps(DEFAULT_GENERATED_QUESTIONS["questions"]))
+    questions[0]["options"] = [
+        {"value": "ramen", "label": dinner_label},
+        {"value": "tacos", "label": "Street tacos"},
+    ]
+    return questions
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_submissions_share_one_batch(self):
+        calls = []
+
+        def send_batch(payloads):
+            calls.append(dict(payloads))
+            return {key: payload.upper() for key, payload in payloads.items()}
+
+        batcher = MicroBatcher(send_batch, window_seconds=5, max_batch_size=3)
+        results = {}
+
+        def submit(key):
+            results[key] = batcher.submit(key, f"job-{key}")
+
+        threads = [threading.Thread(target=submit, args=(key,)) for key in (1, 2, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, {1: "JOB-1", 2: "JOB-2", 3: "JOB-3"})
+
+    def test_failed_batch_resolves_every_job_to_none(self):
+        def send_batch(_payloads):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(send_batch, window_seconds=0, max_batch_size=4)
+
+        self.assertIsNone(batcher.submit("plan", "payload"))
+
+
+class SchemaBatchTests(TestCase):
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}, clear=True)
+    @patch("planner.services._gemini_generate")
+    def test_batch_splits_results_and_drops_invalid_items(self, gemini_generate):
+        gemini_generate.return_value = json.dumps(
+            {
+                "plans": [
+                    {"key": "1", "questions": _schema_payload()},
+                    {"key": "2", "questions": [{"id": "dinner_choice"}]},
+                ]
+            }
+        )
+
+        results = services._generate_schema_batch(
+            {
+                1: (["- You ideal date: ramen", "- Partner ideal date: jazz"], "en"),
+                2: (["- You ideal date: hike", "- Partner ideal date: picnic"], "fr"),
+            }
+        )
+
+        self.assertEqual(gemini_generate.call_count, 1)
+        prompt = gemini_generate.call_args[0][0]
+        self.assertIn("Couple key=1", prompt)
+        self.assertIn("Couple key=2", prompt)
+        self.assertEqual(results[1]["questions"][0]["options"][0]["label"], "Ramen bar")
+        self.assertNotIn(2, results)
+
+    @override_settings(QUESTION_BATCH_WINDOW_MS=1)
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}, clear=True)
+    @patch("planner.services._gemini_generate")
+    def test_generate_vote_questions_falls_back_when_batch_item_missing(
+        self, gemini_generate
+    ):
+        plan = Plan.objects.create(
+            inviter_email="inviter@example.com",
+            invitee_email="invitee@example.com",
+        )
+        Participant.objects.create(
+            plan=plan,
+            email=plan.inviter_email,
+            ideal_date="Ramen and a jazz bar.",
+            role=Participant.INVITER,
+        )
+        Participant.objects.create(
+            plan=plan,
+            email=plan.invitee_email,
+            ideal_date="Quiet dinner and a walk.",
+            role=Participant.INVITEE,
+        )
+        gemini_generate.return_value = json.dumps(
+            {"questions": _schema_payload("Individual ramen")}
+        )
+        batcher = MicroBatcher(lambda _payloads: {}, window_seconds=0, max_batch_size=4)
+
+        with patch("planner.services._get_schema_batcher", return_value=batcher):
+            schema = services.generate_vote_questions(plan)
+
+        self.assertEqual(gemini_generate.call_count, 1)
+        self.assertEqual(
+            schema["questions"][0]["options"][0]["label"], "Individual ramen"
+        )
@@ -0,0 +1,194 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from planner import services
+from planner.batching import MicroBatcher
+from planner.constants import DEFAULT_GENERATED_QUESTIONS
+from planner.localization import canonical_city, canonical_locale
+from planner.models import GeneratedVote, Participant, Plan
+from planner.ratelimit import (
+    GENERATE,
+    AdmissionRejected,
+    ai_call_slot,
+    check_rate_limit,
+)
+from planner.services import generate_date_plan
+
+THREADS = 16
+
+ANSWERS = {
+    "dinner_choice": "italian",
+    "activity_choice": "movie",
+    "sweet_choice": "dessert",
+    "budget_choice": "mid",
+    "mood_choice": "classic",
+    "duration_choice": "half",
+    "transport_choice": "mixed",
+    "dietary_notes": "",
+    "accessibility_notes": "",
+}
+
+
+def _hammer(func, count=THREADS * 4):
+    """Run ``func(index)`` from ``THREADS`` threads, released together."""
+    barrier = threading.Barrier(THREADS)
+    started = threading.local()
+
+    def call(index):
+        if not getattr(started, "value", False):
+            started.value = True
+            barrier.wait(timeout=10)
+        try:
+            return func(index)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(call, range(count)))
+
+
+class ThreadedServiceTests(TransactionTestCase):
+    """Exercise the shared in-process state the gthread workers rely on."""
+
+    def setUp(self):
+        cache.clear()
+        self.plan = Plan.objects.create(
+            inviter_email="inviter@example.com",
+            invitee_email="invitee@example.com",
+            city="Chicago",
+        )
+        for role, email in (
+            (Participant.INVITER, self.plan.inviter_email),
+            (Participant.INVITEE, self.plan.invitee_email),
+        ):
+            participant = Participant.objects.create(
+                plan=self.plan, email=email, role=role
+            )
+            GeneratedVote.objects.create(participant=participant, answers=ANSWERS)
+
+    def test_local_fallback_is_identical_across_threads(self):
+        plans = _hammer(lambda _index: generate_date_plan(self.plan))
+
+        self.assertEqual(len(set(plans)), 1)
+        self.assertIn("Local fallback plan", plans[0])
+
+    def test_canonicalization_is_stable_across_threads(self):
+        results = _hammer(
+            lambda index: (
+                canonical_locale(f"en-us,en;q=0.{index % 9 + 1}"),
+                canonical_city(" chicago ,  il "),
+            )
+        )
+
+        self.assertEqual(set(results), {("en-US", "Chicago, IL")})
+
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"})
+    @patch("planner.services.importlib.import_module")
+    def test_gemini_client_is_built_once_per_key(self, import_module):
+        services._genai.cache_clear()
+        services._gemini_clients.clear()
+        self.addCleanup(services._genai.cache_clear)
+        self.addCleanup(services._gemini_clients.clear)
+        genai = import_module.return_value
+        genai.Client.return_value.models.generate_content.return_value.text = "Plan"
+
+        results = _hammer(lambda _index: services._gemini_generate("p", "test-key"))
+
+        self.assertEqual(set(results), {"Plan"})
+        genai.Client.assert_called_once_with(api_key="test-key")
+
+    def test_batcher_answers_every_thread(self):
+        batcher = MicroBatcher(
+            lambda jobs: {key: payload * 2 for key, payload in jobs.items()},
+            window_seconds=0.01,
+            max_batch_size=5,
+        )
+
+        results = _hammer(lambda index: batcher.submit(f"job-{index}", index))
+
+        self.assertEqual(results, [index * 2 for index in range(len(results))])
+
+    @override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={GENERATE: "5/3600"})
+    def test_rate_limit_admits_exactly_capacity_under_contention(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="203.0.113.7")
+
+        retries = _hammer(lambda _index: check_rate_limit(request, GENERATE))
+
+        self.assertEqual(retries.count(0), 5)
+
+    @override_settings(AI_MAX_CONCURRENT_CALLS=3)
+    def test_ai_slots_never_exceed_the_cap(self):
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+        release = threading.Event()
+
+        def hold(_index):
+            try:
+                with ai_call_slot():
+                    with lock:
+                        state["current"] += 1
+                        state["peak"] = max(state["peak"], state["current"])
+                    release.wait(0.05)
+                    with lock:
+                        state["current"] -= 1
+                return True
+            except AdmissionRejected:
+                return False
+
+        admitted = _hammer(hold, count=THREADS)
+
+        self.assertLessEqual(state["peak"], 3)
+        self.assertGreater(admitted.count(True), 0)
+        self.assertEqual(cache.get("planner:ai:in-flight"), 0)
+
+
+# The in-memory SQLite test database locks whole tables on concurrent
+# writes, so keep session saves out of it; PostgreSQL has no such limit.
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache")
+class ThreadedViewTests(TransactionTestCase):
+    """Many clients hitting the read-heavy pages at once."""
+
+    def setUp(self):
+        cache.clear()
+        self.plan = Plan.objects.create(
+            inviter_email="inviter@example.com",
+            invitee_email="invitee@example.com",
+            generated_questions=DEFAULT_GENERATED_QUESTIONS,
+        )
+        self.participants = []
+        for role, email in (
+            (Participant.INVITER, self.plan.inviter_email),
+            (Participant.INVITEE, self.plan.invitee_email),
+        ):
+            participant = Participant.objects.create(
+                plan=self.plan,
+                email=email,
+                role=role,
+                ideal_date="Dinner and a walk by the river.",
+            )
+            GeneratedVote.objects.create(participant=participant, answers=ANSWERS)
+            self.participants.append(participant)
+
+    def test_results_and_vote_pages_serve_concurrently(self):
+        def fetch(index):
+            participant = self.participants[index % 2]
+            name = "planner:results" if index % 3 else "planner:vote"
+            response = Client().get(reverse(name, args=[participant.token]))
+            return response.status_code
+
+        statuses = _hammer(fetch)
+
+        self.assertEqual(set(statuses), {200})
+
+    def test_home_page_serves_concurrently(self):
+        statuses = _hammer(
+            lambda _index: Client().get(reverse("planner:home")).status_code
+        )
+
+        self.assertEqual(set(statuses), {200})
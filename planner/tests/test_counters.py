@@ -0,0 +1,24 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from planner.counters import incr_counter
+
+
+class IncrCounterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_counts_from_zero_and_returns_the_new_value(self):
+        self.assertEqual(incr_counter("counter"), 1)
+        self.assertEqual(incr_counter("counter", 4), 5)
+        self.assertEqual(cache.get("counter"), 5)
+
+    def test_timeout_applies_when_the_counter_is_created(self):
+        with patch.object(cache, "add", wraps=cache.add) as add:
+            incr_counter("counter", timeout=30)
+            incr_counter("counter", timeout=30)
+
+        add.assert_called_once_with("counter", 0, timeout=30)
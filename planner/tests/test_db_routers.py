@@ -0,0 +1,167 @@
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from planner import db_routers
+from planner.db_routers import PrimaryReplicaRouter, replica_reads, request_routing
+from planner.middleware import PRIMARY_PIN_SESSION_KEY
+from planner.models import Participant, Plan
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    databases = frozenset({"default"})
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        patcher = patch("planner.db_routers._replica_available", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_use_replica_only_when_opted_in(self):
+        with request_routing(pinned=False):
+            self.assertEqual(self.router.db_for_read(Plan), "default")
+            with replica_reads():
+                self.assertEqual(self.router.db_for_read(Plan), "replica")
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        with request_routing(pinned=False), replica_reads():
+            self.assertEqual(self.router.db_for_write(Plan), "default")
+            self.assertEqual(self.router.db_for_read(Plan), "default")
+
+        with request_routing(pinned=False), replica_reads():
+            self.assertEqual(self.router.db_for_read(Plan), "replica")
+
+    def test_pinned_session_and_open_transaction_read_primary(self):
+        with request_routing(pinned=True), replica_reads():
+            self.assertEqual(self.router.db_for_read(Plan), "default")
+
+        with request_routing(pinned=False), replica_reads(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Plan), "default")
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_without_replica_everything_reads_primary(self):
+        with request_routing(pinned=False), replica_reads():
+            self.assertEqual(self.router.db_for_read(Plan), "default")
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="unreachable")
+class UnreachableReplicaTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        # A second, separate database that cannot be opened. Registered only
+        # on this thread, so the test runner neither creates nor flushes it.
+        connections.settings["unreachable"] = {
+            **connections.settings["default"],
+            "NAME": str(Path(tempfile.gettempdir()) / "missing-dir" / "replica.db"),
+            "TEST": {},
+        }
+        replica = connections.create_connection("unreachable")
+        del connections.settings["unreachable"]
+        connections["unreachable"] = replica
+        self.addCleanup(connections.__delitem__, "unreachable")
+        self.addCleanup(setattr, db_routers, "_replica_down_until", 0.0)
+        plan = Plan.objects.create(
+            inviter_email="me@example.com", invitee_email="you@example.com"
+        )
+        self.inviter = Participant.objects.create(
+            plan=plan, email="me@example.com", role="inviter"
+        )
+        Participant.objects.create(plan=plan, email="you@example.com", role="invitee")
+
+    def _repeat_results_visit(self):
+        url = reverse("planner:results", args=[self.inviter.token])
+        self.client.get(url)
+        # The first visit records the device link and pins the session.
+        session = self.client.session
+        session.pop(PRIMARY_PIN_SESSION_KEY, None)
+        session.save()
+        return self.client.get(url)
+
+    def test_reads_fall_back_to_primary_and_skip_the_replica_for_a_while(self):
+        response = self._repeat_results_visit()
+
+        self.assertEqual(response.status_code, 200)
+        with (
+            patch.object(connections["unreachable"], "ensure_connection") as connect,
+            request_routing(pinned=False),
+            replica_reads(),
+        ):
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Plan), "default")
+        connect.assert_not_called()
+
+    @override_settings(DATABASE_REPLICA_RETRY_SECONDS=0)
+    def test_replica_is_tried_again_after_the_retry_interval(self):
+        self._repeat_results_visit()
+
+        with (
+            patch.object(connections["unreachable"], "ensure_connection") as connect,
+            request_routing(pinned=False),
+            replica_reads(),
+        ):
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Plan), "unreachable")
+        connect.assert_called_once()
+
+
+@skipUnless(
+    settings.DATABASE_REPLICA_ALIAS,
+    "set DATABASE_REPLICA_URL to run replica routing tests",
+)
+class ReplicaRoutingIntegrationTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="me@example.com",
+            email="me@example.com",
+            password="test-pass-123",
+        )
+        plan = Plan.objects.create(
+            inviter_email="me@example.com", invitee_email="you@example.com"
+        )
+        Participant.objects.create(
+            plan=plan, user=self.user, email="me@example.com", role="inviter"
+        )
+        Participant.objects.create(plan=plan, email="you@example.com", role="invitee")
+        self.client.force_login(self.user)
+
+    def _replica_queries(self, method, *args, **kwargs):
+        with CaptureQueriesContext(connections["replica"]) as captured:
+            method(*args, **kwargs)
+        return len(captured)
+
+    def test_dashboard_reads_replica_until_session_writes(self):
+        self.assertGreater(
+            self._replica_queries(self.client.get, reverse("planner:home")), 0
+        )
+
+        self.client.post(
+            reverse("planner:home"),
+            {"inviter_email": "me@example.com", "invitee_email": "new@example.com"},
+        )
+
+        self.assertEqual(
+            self._replica_queries(self.client.get, reverse("planner:home")), 0
+        )
+
+    def test_repeat_results_visit_reads_replica(self):
+        token = Participant.objects.get(role="inviter").token
+        url = reverse("planner:results", args=[token])
+        self.client.get(url)
+        # Stand in for the pin from the first visit's link expiring.
+        session = self.client.session
+        session.pop(PRIMARY_PIN_SESSION_KEY, None)
+        session.save()
+
+        self.assertGreater(self._replica_queries(self.client.get, url), 0)
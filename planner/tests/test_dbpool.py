@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from config import settings as project_settings
+from planner.dbpool import pool_stats
+
+
+class DatabasePoolConfigTests(SimpleTestCase):
+    @patch.object(project_settings, "DATABASE_POOL", True)
+    def test_postgres_url_gets_pool_options_without_persistent_connections(self):
+        config = project_settings._database_config("postgres://u:p@db:5432/app")
+
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(
+            config["OPTIONS"]["pool"],
+            {
+                "min_size": project_settings.DATABASE_POOL_MIN_SIZE,
+                "max_size": project_settings.DATABASE_POOL_MAX_SIZE,
+                "timeout": project_settings.DATABASE_POOL_TIMEOUT,
+            },
+        )
+
+    @patch.object(project_settings, "DATABASE_POOL", True)
+    def test_sqlite_url_ignores_pool_mode(self):
+        config = project_settings._database_config("sqlite:///local.sqlite3")
+
+        self.assertNotIn("pool", config.get("OPTIONS", {}))
+        self.assertEqual(config["CONN_MAX_AGE"], 600)
+
+
+class PoolStatsTests(TestCase):
+    def test_sqlite_reports_unpooled(self):
+        self.assertEqual(pool_stats()["default"], {"pooled": False, "vendor": "sqlite"})
+
+    @override_settings(MONITORING_TOKEN="secret-token")
+    def test_endpoint_requires_monitoring_token(self):
+        url = reverse("db_pool_stats")
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret-token")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["default"]["pooled"])
+
+    def test_benchmark_requires_postgres(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_db_connections", iterations=1)
@@ -0,0 +1,163 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from planner import providers, services
+from planner.deadlines import (
+    DeadlineExceeded,
+    call_timeout,
+    deadline,
+    deadline_stats,
+    remaining,
+)
+from planner.models import GeneratedVote, Participant, Plan
+
+User = get_user_model()
+
+BUDGETS = {"vote": 0.3, "results": 0.3}
+
+
+class _SlowModels:
+    """Stands in for ``genai.Client().models``: answers after ``delay``
+    seconds, or times out like the SDK when the request timeout is shorter."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.timeouts = []
+
+    def generate_content(self, model, contents, config):
+        timeout = config["http_options"]["timeout"] / 1000
+        self.timeouts.append(timeout)
+        if self.delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Request timed out")
+        time.sleep(self.delay)
+        return SimpleNamespace(text="A slow but lovely plan")
+
+
+class _FakeGenaiMixin:
+    delay = 0
+
+    def setUp(self):
+        cache.clear()
+        providers.reset_stats()
+        services._genai.cache_clear()
+        services._gemini_clients.clear()
+        self.addCleanup(services._genai.cache_clear)
+        self.addCleanup(services._gemini_clients.clear)
+        self.models = _SlowModels(self.delay)
+        genai = SimpleNamespace(
+            Client=lambda api_key: SimpleNamespace(models=self.models)
+        )
+        # Patch the environment first: patch() itself resolves targets with
+        # importlib.import_module.
+        for patcher in (
+            patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}),
+            patch("planner.services.importlib.import_module", return_value=genai),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+@override_settings(
+    AI_REQUEST_BUDGETS=BUDGETS, AI_CALL_TIMEOUT_SECONDS=30, AI_MIN_CALL_SECONDS=0.05
+)
+class DeadlineTests(SimpleTestCase):
+    def test_nested_deadlines_never_extend_the_outer_one(self):
+        self.assertIsNone(remaining())
+        with deadline("results", 0.5):
+            with deadline("inner", 10):
+                self.assertLessEqual(remaining(), 0.5)
+            with deadline("inner", 0.1):
+                self.assertLessEqual(remaining(), 0.1)
+        self.assertIsNone(remaining())
+
+    def test_call_timeout_is_capped_and_refuses_exhausted_budgets(self):
+        self.assertEqual(call_timeout(), 30)
+        with deadline("results", 0.2):
+            self.assertLessEqual(call_timeout(), 0.2)
+        with deadline("results", 0.01), self.assertRaises(DeadlineExceeded):
+            call_timeout()
+
+
+@override_settings(
+    AI_REQUEST_BUDGETS=BUDGETS, AI_CALL_TIMEOUT_SECONDS=30, AI_MIN_CALL_SECONDS=0.05
+)
+class SlowGeminiTests(_FakeGenaiMixin, SimpleTestCase):
+    delay = 1
+
+    def test_gemini_gets_the_remaining_budget_as_its_timeout(self):
+        with deadline("results", 0.2), self.assertRaises(TimeoutError):
+            services._gemini_generate("prompt", "test-key")
+
+        self.assertLessEqual(self.models.timeouts[0], 0.2)
+        self.assertEqual(deadline_stats()["results"]["timeout"], 1)
+        self.assertEqual(deadline_stats()["results"]["latency"]["0.5"], 1)
+
+    def test_exhausted_budget_skips_the_call(self):
+        with deadline("vote", 0.01), self.assertRaises(DeadlineExceeded):
+            services._gemini_generate("prompt", "test-key")
+
+        self.assertEqual(self.models.timeouts, [])
+        self.assertEqual(deadline_stats()["vote"]["skipped"], 1)
+
+    def test_fast_calls_are_recorded_as_ok(self):
+        self.models.delay = 0
+
+        with deadline("results", 5):
+            text = services._gemini_generate("prompt", "test-key")
+
+        self.assertEqual(text, "A slow but lovely plan")
+        self.assertEqual(deadline_stats()["results"]["ok"], 1)
+        self.assertNotIn("vote", deadline_stats())
+
+
+@override_settings(
+    ENABLE_AI=True,
+    AI_REQUEST_BUDGETS=BUDGETS,
+    AI_CALL_TIMEOUT_SECONDS=30,
+    AI_MIN_CALL_SECONDS=0.05,
+)
+class ResultsBudgetTests(_FakeGenaiMixin, TestCase):
+    delay = 5
+
+    def test_results_fall_back_to_local_plan_when_budget_runs_out(self):
+        plan = Plan.objects.create(
+            inviter_email="inviter@example.com", invitee_email="invitee@example.com"
+        )
+        for role, email, dinner in (
+            (Participant.INVITER, plan.inviter_email, "italian"),
+            (Participant.INVITEE, plan.invitee_email, "sushi"),
+        ):
+            participant = Participant.objects.create(plan=plan, email=email, role=role)
+            GeneratedVote.objects.create(
+                participant=participant, answers={"dinner_choice": dinner}
+            )
+
+        started = time.monotonic()
+        response = self.client.post(
+            reverse("planner:results", args=[participant.token])
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertLess(time.monotonic() - started, 2)
+        plan.refresh_from_db()
+        self.assertIn("Local fallback plan", plan.ai_summary)
+        self.assertIn("Gemini timed out", plan.ai_summary)
+        self.assertLessEqual(self.models.timeouts[0], BUDGETS["results"])
+
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse("ai_deadline_stats")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff = User.objects.create_user("ops", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        with deadline("results", 0.1), self.assertRaises(TimeoutError):
+            services._gemini_generate("prompt", "test-key")
+
+        self.assertEqual(self.client.get(url).json()["results"]["timeout"], 1)
@@ -0,0 +1,112 @@
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from planner import health, providers
+
+
+@override_settings(
+    READINESS_CACHE_SECONDS=5,
+    ENABLE_AI=True,
+    AI_MODELS=["primary", "backup"],
+    AI_MODEL_STATS_MIN_SAMPLES=2,
+)
+class HealthProbeTests(TestCase):
+    def setUp(self):
+        health._readiness = None
+        providers.reset_stats()
+        self.addCleanup(providers.reset_stats)
+
+    def test_liveness_does_not_touch_dependencies(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("liveness"))
+
+        self.assertEqual(response.content, b"ok")
+
+    def test_readiness_reports_each_dependency_with_latency(self):
+        response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["ready"])
+        self.assertEqual(set(body["checks"]), {"database", "cache", "migrations", "ai"})
+        for check in body["checks"].values():
+            self.assertTrue(check["ok"])
+            self.assertGreaterEqual(check["latency_ms"], 0)
+        self.assertEqual(body["checks"]["ai"]["state"], "closed")
+
+    def test_readiness_results_are_reused_between_probes(self):
+        first = self.client.get(reverse("readiness")).json()
+
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("readiness")).json()
+
+        self.assertEqual(first["checked_at"], second["checked_at"])
+
+    def test_database_failure_is_unready_without_leaking_details(self):
+        with patch(
+            "planner.health._check_database",
+            side_effect=OperationalError("password authentication failed"),
+        ):
+            response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 503)
+        database = response.json()["checks"]["database"]
+        self.assertEqual(database["error"], "OperationalError")
+
+    @override_settings(DATABASE_REPLICA_ALIAS="replica")
+    def test_failing_replica_is_reported_without_failing_readiness(self):
+        health._migrations_applied = True
+
+        def check(alias):
+            if alias == "replica":
+                raise OperationalError("replica unreachable")
+
+        with (
+            patch("planner.health.connections", ["default", "replica"]),
+            patch("planner.health._check_database", side_effect=check),
+            patch("planner.health.mark_replica_down") as mark_replica_down,
+        ):
+            response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 200)
+        replica = response.json()["checks"]["database:replica"]
+        self.assertEqual((replica["ok"], replica["required"]), (False, False))
+        mark_replica_down.assert_called_once_with()
+
+    @override_settings(CACHE_REQUIRE_SHARED=True)
+    def test_per_process_cache_is_unready_when_a_shared_one_is_required(self):
+        response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response.json()["checks"]["cache"]["error"],
+            "cache is per-process; set REDIS_URL",
+        )
+
+    def test_pending_migrations_are_unready(self):
+        health._migrations_applied = False
+        with patch("planner.health.MigrationExecutor") as executor:
+            executor.return_value.migration_plan.return_value = [object(), object()]
+            response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response.json()["checks"]["migrations"]["error"], "2 unapplied migrations"
+        )
+
+    def test_open_ai_breaker_is_unready_only_when_ai_is_required(self):
+        for model in ("primary", "backup"):
+            for _ in range(2):
+                providers.model_stats(model).record(1, ok=False)
+
+        degraded = self.client.get(reverse("readiness"))
+        health._readiness = None
+        with override_settings(READINESS_REQUIRE_AI=True):
+            unready = self.client.get(reverse("readiness"))
+
+        self.assertEqual(unready.status_code, 503)
+        self.assertEqual(degraded.status_code, 200)
+        self.assertEqual(degraded.json()["checks"]["ai"]["state"], "open")
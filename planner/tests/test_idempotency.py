@@ -0,0 +1,145 @@
+import threading
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from planner.idempotency import PENDING, _cache_key, fingerprint
+from planner.models import GeneratedVote, Participant, Plan
+
+
+@override_settings(ENABLE_AI=True, RATE_LIMIT_ENABLED=False)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.plan = Plan.objects.create(
+            inviter_email="inviter@example.com", invitee_email="invitee@example.com"
+        )
+        self.inviter = Participant.objects.create(
+            plan=self.plan,
+            email=self.plan.inviter_email,
+            role=Participant.INVITER,
+            ideal_date="Jazz and tapas",
+        )
+        self.invitee = Participant.objects.create(
+            plan=self.plan,
+            email=self.plan.invitee_email,
+            role=Participant.INVITEE,
+            ideal_date="Museum and ramen",
+        )
+        for participant, dinner in ((self.inviter, "italian"), (self.invitee, "sushi")):
+            GeneratedVote.objects.create(
+                participant=participant, answers={"dinner_choice": dinner}
+            )
+        self.results_url = reverse("planner:results", args=[self.inviter.token])
+
+    def test_forms_carry_a_fresh_key_per_render(self):
+        first = self.client.get(self.results_url)
+        second = self.client.get(self.results_url)
+
+        self.assertContains(first, 'name="idempotency_key"')
+        self.assertNotEqual(
+            first.context["idempotency_key"], second.context["idempotency_key"]
+        )
+
+    @patch("planner.views.generate_date_plan", return_value="Fresh AI plan")
+    def test_replayed_generate_returns_the_original_redirect(self, generate):
+        data = {"action": "generate", "idempotency_key": "abc123"}
+
+        first = self.client.post(self.results_url, data)
+        replay = self.client.post(self.results_url, data)
+
+        self.assertRedirects(replay, first["Location"], fetch_redirect_response=False)
+        generate.assert_called_once()
+
+    @patch("planner.views.generate_date_plan", return_value="Fresh AI plan")
+    def test_keys_are_scoped_to_the_action(self, generate):
+        self.client.post(
+            self.results_url, {"action": "generate", "idempotency_key": "abc123"}
+        )
+        self.client.post(
+            self.results_url,
+            {"action": "refine", "feedback": "Slower", "idempotency_key": "abc123"},
+        )
+
+        self.assertEqual(generate.call_count, 2)
+
+    @patch("planner.views.generate_date_plan", return_value="Refined plan")
+    def test_form_errors_are_not_remembered(self, generate):
+        self.plan.ai_summary = "Initial plan"
+        self.plan.save(update_fields=["ai_summary"])
+        data = {"action": "refine", "feedback": "", "idempotency_key": "abc123"}
+
+        invalid = self.client.post(self.results_url, data)
+        valid = self.client.post(self.results_url, {**data, "feedback": "Slower"})
+
+        self.assertEqual(invalid.status_code, 200)
+        self.assertEqual(valid.status_code, 302)
+        generate.assert_called_once()
+
+    @patch("planner.views.generate_date_plan")
+    def test_concurrent_duplicate_waits_for_the_first_request(self, generate):
+        cache_key = _cache_key(str(self.inviter.token), "generate", "abc123")
+        cache.set(cache_key, PENDING)
+        data = {"action": "generate", "idempotency_key": "abc123"}
+        outcome = ("/done/", fingerprint(QueryDict(urlencode(data))))
+        finished = threading.Timer(0.2, cache.set, [cache_key, outcome])
+        finished.start()
+        self.addCleanup(finished.cancel)
+
+        response = self.client.post(self.results_url, data)
+
+        self.assertRedirects(response, "/done/", fetch_redirect_response=False)
+        generate.assert_not_called()
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0.1)
+    @patch("planner.views.generate_date_plan")
+    def test_duplicate_gives_up_waiting_without_redoing_work(self, generate):
+        cache.set(_cache_key(str(self.inviter.token), "generate", "abc123"), PENDING)
+
+        response = self.client.post(
+            self.results_url, {"action": "generate", "idempotency_key": "abc123"}
+        )
+
+        self.assertRedirects(response, self.results_url, fetch_redirect_response=False)
+        generate.assert_not_called()
+
+    def test_replayed_describe_does_not_reset_votes_again(self):
+        vote_url = reverse("planner:vote", args=[self.inviter.token])
+        data = {
+            "action": "describe",
+            "ideal_date": "Jazz, tapas and a walk",
+            "idempotency_key": "abc123",
+        }
+
+        self.client.post(vote_url, data)
+        GeneratedVote.objects.create(
+            participant=self.invitee, answers={"dinner_choice": "sushi"}
+        )
+        self.client.post(vote_url, data)
+
+        self.assertTrue(GeneratedVote.objects.filter(participant=self.invitee).exists())
+
+    def test_reused_key_with_changed_answers_is_saved(self):
+        vote_url = reverse("planner:vote", args=[self.inviter.token])
+        self.inviter.generated_vote.delete()
+        answers = {
+            "dinner_choice": "italian",
+            "activity_choice": "movie",
+            "sweet_choice": "dessert",
+            "budget_choice": "mid",
+            "mood_choice": "classic",
+            "duration_choice": "half",
+            "transport_choice": "mixed",
+            "idempotency_key": "abc123",
+        }
+
+        self.client.post(vote_url, answers)
+        # The vote page comes back from the back/forward cache with its key.
+        self.client.post(vote_url, {**answers, "dinner_choice": "sushi"})
+
+        vote = GeneratedVote.objects.get(participant=self.inviter)
+        self.assertEqual(vote.answers["dinner_choice"], "sushi")
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+
+from planner.localization import canonical_city, canonical_locale
+from planner.models import Plan
+from planner.services import generate_date_plan
+
+
+class CanonicalLocaleTests(SimpleTestCase):
+    def test_equivalent_headers_collapse_to_one_locale(self):
+        for header in ("en-US,en;q=0.9", "en-US", "en-us", "en_US"):
+            with self.subTest(header=header):
+                self.assertEqual(canonical_locale(header), "en-US")
+
+    def test_highest_quality_tag_wins(self):
+        self.assertEqual(canonical_locale("fr;q=0.5, de-de"), "de-DE")
+        self.assertEqual(canonical_locale("es-MX,es;q=0.9,en;q=0.8"), "es-MX")
+
+    def test_missing_or_wildcard_header_uses_default(self):
+        self.assertEqual(canonical_locale(""), "en-US")
+        self.assertEqual(canonical_locale("*"), "en-US")
+        self.assertEqual(canonical_locale("en;q=0"), "en-US")
+
+
+class CanonicalCityTests(SimpleTestCase):
+    def test_known_city_aliases_collapse(self):
+        for text in ("chicago", "Chicago, IL", "CHICAGO illinois", "Chicago, USA"):
+            with self.subTest(text=text):
+                self.assertEqual(canonical_city(text), "Chicago, IL")
+
+    def test_same_name_in_other_region_is_not_merged(self):
+        self.assertEqual(canonical_city("portland, me"), "Portland, ME")
+
+    def test_unknown_city_is_tidied(self):
+        self.assertEqual(canonical_city("  naperville,il "), "Naperville, IL")
+        self.assertEqual(canonical_city(""), "")
+
+
+class PromptNormalizationTests(TestCase):
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}, clear=True)
+    @patch("planner.services._gemini_generate", return_value="A story")
+    def test_equivalent_requests_build_identical_prompts(self, gemini_generate):
+        prompts = []
+        for header, city in (("en-US,en;q=0.9", "chicago"), ("en-US", "Chicago, IL")):
+            plan = Plan.objects.create(
+                inviter_email="inviter@example.com",
+                invitee_email="invitee@example.com",
+                city=city,
+            )
+            generate_date_plan(plan, locale_hint=header)
+            prompts.append(gemini_generate.call_args[0][0])
+
+        self.assertEqual(prompts[0], prompts[1])
+        self.assertIn("Locality: Chicago, IL.", prompts[0])
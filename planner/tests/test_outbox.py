@@ -0,0 +1,104 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from planner.models import OutboundEmail, Participant
+from planner.outbox import deliver_outbound_emails, queue_email
+
+
+class FlakyBackend(EmailBackend):
+    def send_messages(self, messages):
+        if any(message.to == ["broken@example.com"] for message in messages):
+            raise OSError("mailbox unavailable")
+        return super().send_messages(messages)
+
+
+class UnreachableBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("smtp host down")
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_home_post_queues_invite_without_sending_inline(self):
+        response = self.client.post(
+            reverse("planner:home"),
+            {
+                "inviter_email": "me@example.com",
+                "invitee_email": "partner@example.com",
+                "city": "",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboundEmail.objects.get()
+        invitee = Participant.objects.get(role=Participant.INVITEE)
+        self.assertEqual(email.to_email, "partner@example.com")
+        self.assertIn(str(invitee.token), email.body)
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for index in range(3):
+            queue_email(f"person{index}@example.com", "Invite", "Open the link")
+
+        with patch.object(
+            EmailBackend, "open", autospec=True, side_effect=EmailBackend.open
+        ) as open_connection:
+            sent, failed = deliver_outbound_emails()
+
+        self.assertEqual((sent, failed), (3, 0))
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(
+            OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists()
+        )
+        self.assertEqual(deliver_outbound_emails(), (0, 0))
+
+    @override_settings(
+        EMAIL_BACKEND="planner.tests.test_outbox.FlakyBackend",
+        OUTBOX_MAX_ATTEMPTS=2,
+        OUTBOX_RETRY_BASE_SECONDS=60,
+    )
+    def test_failed_messages_back_off_then_give_up(self):
+        queue_email("ok@example.com", "Invite", "Link")
+        broken = queue_email("broken@example.com", "Invite", "Link")
+
+        self.assertEqual(deliver_outbound_emails(), (1, 1))
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, OutboundEmail.PENDING)
+        self.assertEqual(broken.attempts, 1)
+        self.assertGreater(broken.next_attempt_at, timezone.now())
+        self.assertIn("mailbox unavailable", broken.last_error)
+
+        self.assertEqual(deliver_outbound_emails(), (0, 0))
+
+        OutboundEmail.objects.filter(pk=broken.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(deliver_outbound_emails(), (0, 1))
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, OutboundEmail.FAILED)
+
+    @override_settings(
+        EMAIL_BACKEND="planner.tests.test_outbox.UnreachableBackend",
+        OUTBOX_RETRY_BASE_SECONDS=60,
+    )
+    def test_unreachable_mail_server_backs_off_the_whole_batch(self):
+        for index in range(2):
+            queue_email(f"person{index}@example.com", "Invite", "Link")
+
+        self.assertEqual(deliver_outbound_emails(), (0, 2))
+
+        for email in OutboundEmail.objects.all():
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertIn("smtp host down", email.last_error)
+        self.assertEqual(deliver_outbound_emails(), (0, 0))
@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.contrib.messages import constants
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from planner.models import Participant, Plan
+from planner.pagecache import CACHE_STATUS_HEADER, CSRF_PLACEHOLDER
+
+User = get_user_model()
+
+
+def _csrf_value(response):
+    content = response.content.decode()
+    marker = 'name="csrfmiddlewaretoken" value="'
+    start = content.index(marker) + len(marker)
+    return content[start : content.index('"', start)]
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_second_anonymous_visit_is_served_from_cache(self):
+        first = self.client.get(reverse("planner:login"))
+        second = Client().get(reverse("planner:login"))
+
+        self.assertEqual(first[CACHE_STATUS_HEADER], "miss")
+        self.assertEqual(second[CACHE_STATUS_HEADER], "hit")
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "Log in")
+
+    def test_cached_pages_carry_a_working_csrf_token_per_visitor(self):
+        User.objects.create_user(
+            username="someone@example.com",
+            email="someone@example.com",
+            password="test-pass-123",
+        )
+        Client().get(reverse("planner:login"))
+        client = Client(enforce_csrf_checks=True)
+
+        page = client.get(reverse("planner:login"))
+        token = _csrf_value(page)
+        response = client.post(
+            reverse("planner:login"),
+            {
+                "username": "someone@example.com",
+                "password": "test-pass-123",
+                "csrfmiddlewaretoken": token,
+            },
+        )
+
+        self.assertEqual(page[CACHE_STATUS_HEADER], "hit")
+        self.assertNotEqual(token, CSRF_PLACEHOLDER)
+        self.assertIn("csrftoken", page.cookies)
+        self.assertEqual(response.status_code, 302)
+
+    def test_pending_messages_bypass_the_cache(self):
+        self.client.get(reverse("planner:signup"))
+        storage = CookieStorage(self.client.request().wsgi_request)
+        storage.add(constants.SUCCESS, "Invite created.")
+        self.client.cookies[storage.cookie_name] = storage._encode(
+            storage._queued_messages
+        )
+
+        response = self.client.get(reverse("planner:signup"))
+
+        self.assertEqual(response[CACHE_STATUS_HEADER], "bypass (messages)")
+        self.assertContains(response, "Invite created.")
+
+    def test_home_with_saved_plans_renders_the_dashboard(self):
+        plan = Plan.objects.create(
+            inviter_email="inviter@example.com",
+            invitee_email="invitee@example.com",
+        )
+        inviter = Participant.objects.create(
+            plan=plan, email=plan.inviter_email, role=Participant.INVITER
+        )
+        Participant.objects.create(
+            plan=plan, email=plan.invitee_email, role=Participant.INVITEE
+        )
+        Client().get(reverse("planner:home"))
+        self.client.get(reverse("planner:vote", args=[inviter.token]))
+
+        response = self.client.get(reverse("planner:home"))
+
+        self.assertEqual(response[CACHE_STATUS_HEADER], "bypass (saved-plans)")
+        self.assertContains(response, "invitee@example.com")
+
+    def test_signed_in_users_are_not_served_anonymous_pages(self):
+        user = User.objects.create_user(
+            username="someone@example.com",
+            email="someone@example.com",
+            password="test-pass-123",
+        )
+        Client().get(reverse("planner:home"))
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("planner:home"))
+
+        self.assertEqual(response[CACHE_STATUS_HEADER], "bypass (authenticated)")
+        self.assertContains(response, "someone@example.com")
+
+    def test_password_done_page_is_cached_per_user(self):
+        first = User.objects.create_user(
+            username="first@example.com", email="first@example.com", password="x"
+        )
+        second = User.objects.create_user(
+            username="second@example.com", email="second@example.com", password="x"
+        )
+        url = reverse("planner:password_change_done")
+        self.client.force_login(first)
+        self.client.get(url)
+        other = Client()
+        other.force_login(second)
+
+        repeat = self.client.get(url)
+        response = other.get(url)
+
+        self.assertEqual(repeat[CACHE_STATUS_HEADER], "hit")
+        self.assertEqual(response[CACHE_STATUS_HEADER], "miss")
+        self.assertContains(response, "second@example.com")
+        self.assertNotContains(response, "first@example.com")
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_cache_can_be_disabled(self):
+        self.client.get(reverse("planner:login"))
+        response = self.client.get(reverse("planner:login"))
+
+        self.assertNotIn(CACHE_STATUS_HEADER, response)
@@ -0,0 +1,173 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from planner import providers, services
+from planner.deadlines import deadline
+from planner.providers import generate, ordered_models, parse_models, provider_stats
+
+
+class FakeProvider:
+    """Local stand-in for a model API: ``replies`` maps a model to a list of
+    ``(delay, reply)`` steps, where a reply that is an exception is raised.
+    The last step repeats."""
+
+    def __init__(self, **replies):
+        self.replies = replies
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, model, prompt, timeout):
+        with self._lock:
+            self.calls.append((model, timeout))
+            steps = self.replies[model]
+            delay, reply = steps.pop(0) if len(steps) > 1 else steps[0]
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Request timed out")
+        time.sleep(delay)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def _prime(model, seconds, ok=True, count=3):
+    for _ in range(count):
+        providers.model_stats(model).record(seconds, ok=ok)
+
+
+@override_settings(
+    AI_MODEL_STATS_MIN_SAMPLES=3,
+    AI_MODEL_DEMOTE_ERROR_RATE=0.5,
+    AI_CALL_TIMEOUT_SECONDS=30,
+    AI_MIN_CALL_SECONDS=0.05,
+)
+class ProviderChainTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        providers.reset_stats()
+
+    def test_parse_models_reads_optional_timeouts(self):
+        self.assertEqual(
+            parse_models(["gemini-2.0-flash:20", "gemini-2.0-flash-lite"]),
+            [("gemini-2.0-flash", 20.0), ("gemini-2.0-flash-lite", None)],
+        )
+
+    def test_failed_model_falls_through_to_the_next(self):
+        fake = FakeProvider(
+            primary=[(0, RuntimeError("429 RESOURCE_EXHAUSTED"))],
+            backup=[(0, "backup plan")],
+        )
+
+        text = generate(fake, "prompt", [("primary", None), ("backup", 5)])
+
+        self.assertEqual(text, "backup plan")
+        self.assertEqual(fake.calls, [("primary", 30), ("backup", 5)])
+        self.assertEqual(provider_stats()["primary"]["errors"], 1)
+        self.assertEqual(provider_stats()["backup"]["calls"], 1)
+
+    def test_every_model_failing_raises_the_last_error(self):
+        fake = FakeProvider(a=[(0, RuntimeError("a"))], b=[(0, RuntimeError("b"))])
+
+        with self.assertRaisesMessage(RuntimeError, "b"):
+            generate(fake, "prompt", [("a", None), ("b", None)])
+
+    def test_per_model_timeout_is_cut_to_the_request_budget(self):
+        fake = FakeProvider(slow=[(1, "late")], fast=[(0, "quick")])
+
+        with deadline("results", 0.3):
+            text = generate(fake, "prompt", [("slow", 0.1), ("fast", 10)])
+
+        self.assertEqual(text, "quick")
+        self.assertEqual(fake.calls[0], ("slow", 0.1))
+        self.assertLessEqual(fake.calls[1][1], 0.2)
+
+    def test_exhausted_budget_stops_the_chain(self):
+        fake = FakeProvider(a=[(1, "late")], b=[(0, "quick")])
+
+        with deadline("results", 0.1), self.assertRaises(TimeoutError):
+            generate(fake, "prompt", [("a", None), ("b", None)])
+
+        self.assertEqual([model for model, _timeout in fake.calls], ["a"])
+
+    def test_failing_and_slow_models_are_tried_last(self):
+        models = [("flaky", None), ("slow", None), ("steady", None)]
+        _prime("flaky", 0.1, ok=False)
+        _prime("slow", 4)
+        _prime("steady", 0.5)
+
+        self.assertEqual(ordered_models(models), models[1:] + models[:1])
+        with deadline("results", 2):
+            self.assertEqual(
+                [model for model, _timeout in ordered_models(models)],
+                ["steady", "slow", "flaky"],
+            )
+
+    def test_demotion_lapses_with_the_stats_window(self):
+        _prime("flaky", 0.1, ok=False)
+
+        with override_settings(AI_MODEL_STATS_WINDOW_SECONDS=0):
+            self.assertEqual(
+                ordered_models([("flaky", None), ("steady", None)])[0][0], "flaky"
+            )
+
+    def test_hedge_fires_at_p90_and_the_first_reply_wins(self):
+        _prime("primary", 0.05)
+        fake = FakeProvider(primary=[(2, "slow plan")], backup=[(0, "fast plan")])
+
+        started = time.monotonic()
+        text = generate(fake, "prompt", [("primary", None), ("backup", None)], True)
+
+        self.assertEqual(text, "fast plan")
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_single_model_is_hedged_with_a_second_attempt(self):
+        _prime("only", 0.05)
+        fake = FakeProvider(only=[(2, "stuck"), (0, "retried")])
+
+        text = generate(fake, "prompt", [("only", None)], hedge=True)
+
+        self.assertEqual(text, "retried")
+        self.assertEqual(len(fake.calls), 2)
+
+    def test_no_hedge_without_enough_samples(self):
+        fake = FakeProvider(primary=[(0.1, "first")], backup=[(0, "second")])
+
+        text = generate(fake, "prompt", [("primary", None), ("backup", None)], True)
+
+        self.assertEqual(text, "first")
+        self.assertEqual(len(fake.calls), 1)
+
+    def test_hedged_wait_is_bounded_by_the_budget(self):
+        _prime("primary", 0.05)
+        fake = FakeProvider(primary=[(5, "late")], backup=[(5, "late")])
+
+        started = time.monotonic()
+        with deadline("results", 0.3), self.assertRaises(TimeoutError):
+            generate(fake, "prompt", [("primary", 60), ("backup", 60)], hedge=True)
+
+        self.assertLess(time.monotonic() - started, 1)
+
+    @override_settings(AI_MODELS=["primary", "backup:5"], AI_HEDGE_ENABLED=False)
+    @patch("planner.services._gemini_client")
+    def test_gemini_falls_back_to_the_next_configured_model(self, gemini_client):
+        generate_content = gemini_client.return_value.models.generate_content
+        generate_content.side_effect = [
+            RuntimeError("429 RESOURCE_EXHAUSTED"),
+            type("Response", (), {"text": " Backup plan "})(),
+        ]
+
+        text = services._gemini_generate("prompt", "test-key")
+
+        self.assertEqual(text, "Backup plan")
+        self.assertEqual(
+            [call.kwargs["model"] for call in generate_content.call_args_list],
+            ["primary", "backup"],
+        )
+        self.assertEqual(
+            generate_content.call_args.kwargs["config"]["http_options"],
+            {"timeout": 5000},
+        )
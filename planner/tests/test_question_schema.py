@@ -0,0 +1,101 @@
+import copy
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from planner import services
+from planner.constants import DEFAULT_GENERATED_QUESTIONS
+from planner.question_schema import (
+    RESPONSE_SCHEMA,
+    is_valid_schema,
+    normalize_schema,
+    output_stats,
+    repair_schema,
+)
+
+
+class QuestionSchemaTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_valid_schemas_are_used_without_copying(self):
+        schema = copy.deepcopy(DEFAULT_GENERATED_QUESTIONS)
+
+        self.assertTrue(is_valid_schema(schema))
+        self.assertIs(normalize_schema(schema), schema)
+
+    def test_repair_keeps_usable_parts_and_fills_the_rest(self):
+        raw = [
+            {
+                "id": "dinner_choice",
+                "text": "  Ramen or tacos? ",
+                "options": [
+                    "Ramen bar",
+                    {"value": "tacos", "label": "Taco truck"},
+                    {"value": "tacos", "label": "Duplicate"},
+                    {"label": ""},
+                    7,
+                ],
+            },
+            {"id": "dinner_choice", "text": "Ignored duplicate"},
+            {"id": "mystery", "text": "Unknown id"},
+            {"id": "activity_choice", "options": [{"value": "only-one"}]},
+            {"id": "dietary_notes", "text": "Allergies?", "placeholder": " Nuts "},
+            "not a question",
+        ]
+
+        repaired = repair_schema({"questions": raw})
+
+        self.assertTrue(is_valid_schema(repaired))
+        dinner, activity = repaired["questions"][:2]
+        self.assertEqual(dinner["text"], "Ramen or tacos?")
+        self.assertEqual(
+            dinner["options"],
+            [
+                {"value": "ramen_bar", "label": "Ramen bar"},
+                {"value": "tacos", "label": "Taco truck"},
+            ],
+        )
+        self.assertEqual(activity, DEFAULT_GENERATED_QUESTIONS["questions"][1])
+        self.assertEqual(repaired["questions"][7]["placeholder"], "Nuts")
+        self.assertEqual(repair_schema(repaired), repaired)
+
+    def test_repair_gives_up_when_nothing_is_usable(self):
+        self.assertIsNone(repair_schema({"questions": [{"id": "dinner_choice"}]}))
+        self.assertIsNone(repair_schema("questions"))
+        self.assertEqual(normalize_schema({}), DEFAULT_GENERATED_QUESTIONS)
+
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}, clear=True)
+    @patch("planner.services._gemini_generate")
+    def test_partial_gemini_output_is_repaired_instead_of_discarded(
+        self, gemini_generate
+    ):
+        gemini_generate.return_value = json.dumps(
+            {"questions": [{"id": "sweet_choice", "text": "Dessert or a nightcap?"}]}
+        )
+
+        schema = services._generate_single_schema(["- You ideal date: jazz"], "en", "k")
+
+        self.assertEqual(gemini_generate.call_args[0][2], RESPONSE_SCHEMA)
+        self.assertEqual(schema["questions"][2]["text"], "Dessert or a nightcap?")
+        self.assertEqual(output_stats()["repaired"], 1)
+
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"})
+    @patch("planner.services.importlib.import_module")
+    def test_schema_requests_use_json_mode(self, import_module):
+        services._genai.cache_clear()
+        services._gemini_clients.clear()
+        self.addCleanup(services._genai.cache_clear)
+        self.addCleanup(services._gemini_clients.clear)
+        generate_content = (
+            import_module.return_value.Client.return_value.models.generate_content
+        )
+        generate_content.return_value.text = json.dumps(DEFAULT_GENERATED_QUESTIONS)
+
+        services._gemini_generate("prompt", "test-key", RESPONSE_SCHEMA)
+
+        config = generate_content.call_args.kwargs["config"]
+        self.assertEqual(config["response_mime_type"], "application/json")
+        self.assertIs(config["response_schema"], RESPONSE_SCHEMA)
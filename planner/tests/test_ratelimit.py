@@ -0,0 +1,138 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from planner.models import GeneratedVote, Participant, Plan
+from planner.ratelimit import (
+    GENERATE,
+    AdmissionRejected,
+    ai_call_slot,
+    check_rate_limit,
+    client_ip,
+)
+from planner.services import generate_date_plan
+
+ANSWERS = {
+    "dinner_choice": "italian",
+    "activity_choice": "movie",
+    "sweet_choice": "dessert",
+    "budget_choice": "mid",
+    "mood_choice": "classic",
+    "duration_choice": "half",
+    "transport_choice": "mixed",
+    "dietary_notes": "",
+    "accessibility_notes": "",
+}
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _create_voted_plan(self):
+        plan = Plan.objects.create(
+            inviter_email="inviter@example.com",
+            invitee_email="invitee@example.com",
+        )
+        for role, email in (
+            (Participant.INVITER, plan.inviter_email),
+            (Participant.INVITEE, plan.invitee_email),
+        ):
+            participant = Participant.objects.create(plan=plan, email=email, role=role)
+            GeneratedVote.objects.create(participant=participant, answers=ANSWERS)
+        return plan, plan.participants.get(role=Participant.INVITER)
+
+    @override_settings(RATE_LIMITS={GENERATE: "2/60"})
+    @patch("planner.ratelimit.time.time", return_value=600.0)
+    def test_window_admits_capacity_then_reports_retry_after(self, _time):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(check_rate_limit(request, GENERATE), 0)
+        self.assertEqual(check_rate_limit(request, GENERATE), 0)
+        self.assertEqual(check_rate_limit(request, GENERATE), 60)
+
+        other_client = RequestFactory().post("/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(check_rate_limit(other_client, GENERATE), 0)
+
+    @override_settings(RATE_LIMITS={GENERATE: "2/60"})
+    def test_previous_window_decays_instead_of_resetting(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        with patch("planner.ratelimit.time.time", return_value=600.0):
+            check_rate_limit(request, GENERATE)
+            check_rate_limit(request, GENERATE)
+
+        with patch("planner.ratelimit.time.time", return_value=675.0):
+            self.assertEqual(check_rate_limit(request, GENERATE), 15)
+        with patch("planner.ratelimit.time.time", return_value=690.0):
+            self.assertEqual(check_rate_limit(request, GENERATE), 0)
+
+    @override_settings(RATE_LIMITS={GENERATE: "1/60"})
+    def test_rejected_requests_do_not_use_up_other_scopes(self):
+        plan, _inviter = self._create_voted_plan()
+        first = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        second = RequestFactory().post("/", REMOTE_ADDR="10.0.0.2")
+
+        check_rate_limit(first, GENERATE, plan=plan)
+        self.assertGreater(check_rate_limit(second, GENERATE, plan=plan), 0)
+
+        self.assertEqual(check_rate_limit(second, GENERATE), 0)
+
+    @override_settings(RATE_LIMIT_TRUSTED_PROXIES=1)
+    def test_client_ip_ignores_client_supplied_forwarded_hops(self):
+        spoofed = RequestFactory().post(
+            "/", REMOTE_ADDR="10.0.0.9", HTTP_X_FORWARDED_FOR="1.2.3.4, 203.0.113.7"
+        )
+        direct = RequestFactory().post("/", REMOTE_ADDR="10.0.0.9")
+
+        self.assertEqual(client_ip(spoofed), "203.0.113.7")
+        self.assertEqual(client_ip(direct), "10.0.0.9")
+
+    @override_settings(RATE_LIMITS={"create_invite": "1/3600"})
+    @patch("planner.ratelimit.time.time", return_value=36000.0)
+    def test_home_post_returns_429_when_invites_are_exhausted(self, _time):
+        data = {
+            "inviter_email": "me@example.com",
+            "invitee_email": "partner@example.com",
+            "city": "",
+        }
+
+        self.client.post(reverse("planner:home"), data)
+        response = self.client.post(reverse("planner:home"), data)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "3600")
+        self.assertEqual(Plan.objects.count(), 1)
+
+    @override_settings(ENABLE_AI=True, RATE_LIMITS={GENERATE: "1/600"})
+    @patch("planner.views.generate_date_plan", return_value="Fresh AI plan")
+    def test_generate_is_limited_per_plan(self, generate_date_plan):
+        _plan, inviter = self._create_voted_plan()
+        url = reverse("planner:results", args=[inviter.token])
+
+        first = self.client.post(url, REMOTE_ADDR="10.0.0.1")
+        second = self.client.post(url, REMOTE_ADDR="10.0.0.2")
+
+        self.assertEqual(first.status_code, 302)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn("Retry-After", second)
+        generate_date_plan.assert_called_once()
+
+    @override_settings(AI_MAX_CONCURRENT_CALLS=1)
+    def test_concurrency_cap_sheds_instead_of_queuing(self):
+        with ai_call_slot(), self.assertRaises(AdmissionRejected), ai_call_slot():
+            pass
+        with ai_call_slot():
+            pass
+
+    @override_settings(AI_MAX_CONCURRENT_CALLS=1)
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}, clear=True)
+    def test_generation_falls_back_locally_when_ai_is_saturated(self):
+        plan, _inviter = self._create_voted_plan()
+
+        with ai_call_slot():
+            text = generate_date_plan(plan)
+
+        self.assertIn("Local fallback plan", text)
+        self.assertIn("AI is busy right now", text)
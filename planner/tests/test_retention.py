@@ -0,0 +1,145 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from planner.models import DevicePlanLink, GeneratedVote, Participant, Plan
+from planner.retention import (
+    archive_expired_plans,
+    expired_plans,
+    prune_device_links,
+    read_archive,
+)
+
+User = get_user_model()
+
+
+@override_settings(RETENTION_PLAN_DAYS=30, RETENTION_ACCOUNT_PLAN_DAYS=0)
+class RetentionTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive = Path(directory.name) / "plans.jsonl.gz"
+
+    def _plan(self, email, age_days, user=None):
+        plan = Plan.objects.create(
+            created_by=user, inviter_email="me@example.com", invitee_email=email
+        )
+        Plan.objects.filter(pk=plan.pk).update(
+            created_at=timezone.now() - timedelta(days=age_days)
+        )
+        inviter = Participant.objects.create(
+            plan=plan, email=plan.inviter_email, role=Participant.INVITER
+        )
+        Participant.objects.create(
+            plan=plan, email=plan.invitee_email, role=Participant.INVITEE
+        )
+        return plan, inviter
+
+    def test_archives_and_deletes_only_expired_guest_plans(self):
+        stale, inviter = self._plan("stale@example.com", 90)
+        GeneratedVote.objects.create(participant=inviter, answers={"dinner": "sushi"})
+        GeneratedVote.objects.filter(participant=inviter).update(
+            submitted_at=timezone.now() - timedelta(days=80)
+        )
+        self._plan("fresh@example.com", 5)
+        _voted, voted_inviter = self._plan("voted@example.com", 90)
+        GeneratedVote.objects.create(participant=voted_inviter, answers={})
+        user = User.objects.create_user(username="owner", password="test-pass-123")
+        self._plan("account@example.com", 90, user=user)
+
+        stats = archive_expired_plans(path=self.archive)
+
+        self.assertEqual(stats["plans"], 1)
+        self.assertEqual(stats["rows_deleted"], 4)
+        self.assertFalse(Plan.objects.filter(pk=stale.pk).exists())
+        self.assertEqual(
+            sorted(Plan.objects.values_list("invitee_email", flat=True)),
+            ["account@example.com", "fresh@example.com", "voted@example.com"],
+        )
+        (record,) = read_archive(self.archive)
+        self.assertEqual(record["invitee_email"], "stale@example.com")
+        self.assertEqual(record["participants"][0]["answers"], {"dinner": "sushi"})
+
+    @override_settings(RETENTION_ACCOUNT_PLAN_DAYS=60)
+    def test_account_plans_follow_their_own_policy(self):
+        user = User.objects.create_user(username="owner", password="test-pass-123")
+        self._plan("old@example.com", 90, user=user)
+        self._plan("recent@example.com", 45, user=user)
+
+        self.assertEqual(
+            list(expired_plans().values_list("invitee_email", flat=True)),
+            ["old@example.com"],
+        )
+
+    def test_interrupted_runs_resume_without_duplicates(self):
+        for number in range(3):
+            self._plan(f"stale{number}@example.com", 90)
+
+        first = archive_expired_plans(path=self.archive, batch_size=1, limit=1)
+        second = archive_expired_plans(path=self.archive, batch_size=1)
+        third = archive_expired_plans(path=self.archive, batch_size=1)
+
+        self.assertEqual((first["plans"], second["plans"]), (1, 2))
+        self.assertEqual((second["chunks"], third["plans"]), (2, 0))
+        self.assertEqual(Plan.objects.count(), 0)
+        self.assertEqual(
+            sorted(record["invitee_email"] for record in read_archive(self.archive)),
+            [f"stale{number}@example.com" for number in range(3)],
+        )
+
+    def test_command_clears_expired_sessions_and_stale_device_links(self):
+        _plan, inviter = self._plan("fresh@example.com", 1)
+        DevicePlanLink.objects.create(
+            device_key="a" * 32,
+            participant=inviter,
+            last_seen_at=timezone.now() - timedelta(days=400),
+        )
+        Session.objects.create(
+            session_key="expired",
+            session_data="",
+            expire_date=timezone.now() - timedelta(days=1),
+        )
+        Session.objects.create(
+            session_key="active",
+            session_data="",
+            expire_date=timezone.now() + timedelta(days=1),
+        )
+        out = StringIO()
+
+        call_command(
+            "apply_retention", archive=str(self.archive), batch_size=1, stdout=out
+        )
+
+        self.assertIn("plans_archived=0", out.getvalue())
+        self.assertIn("sessions_deleted=1 device_links_deleted=1", out.getvalue())
+        self.assertEqual(list(Session.objects.values_list("pk", flat=True)), ["active"])
+        self.assertTrue(Participant.objects.filter(pk=inviter.pk).exists())
+
+    def test_old_links_of_a_device_still_in_use_are_kept(self):
+        _plan, old_inviter = self._plan("old@example.com", 1)
+        _plan, new_inviter = self._plan("new@example.com", 1)
+        now = timezone.now()
+        for device_key, participant, days in (
+            ("a" * 32, old_inviter, 400),
+            ("a" * 32, new_inviter, 1),
+            ("b" * 32, old_inviter, 400),
+        ):
+            DevicePlanLink.objects.create(
+                device_key=device_key,
+                participant=participant,
+                last_seen_at=now - timedelta(days=days),
+            )
+
+        self.assertEqual(prune_device_links(), 1)
+        self.assertEqual(
+            set(DevicePlanLink.objects.values_list("device_key", flat=True)),
+            {"a" * 32},
+        )
+        self.assertEqual(DevicePlanLink.objects.count(), 2)
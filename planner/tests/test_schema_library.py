@@ -0,0 +1,110 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from planner import services
+from planner.constants import DEFAULT_GENERATED_QUESTIONS
+from planner.models import Participant, Plan, SchemaLibraryEntry
+from planner.schema_library import SchemaLibrary, library_stats
+
+
+def _custom_schema():
+    schema = json.loads(json.dumps(DEFAULT_GENERATED_QUESTIONS))
+    schema["questions"][0]["options"] = [
+        {"value": "ramen", "label": "Ramen bar"},
+        {"value": "tacos", "label": "Street tacos"},
+    ]
+    return schema
+
+
+class SchemaLibraryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.library = SchemaLibrary()
+
+    def test_similar_couple_reuses_stored_schema(self):
+        self.library.remember(
+            [
+                "A cozy ramen dinner followed by a small jazz bar downtown",
+                "Quiet evening, good food, maybe live music and a long walk",
+            ],
+            "en-US",
+            _custom_schema(),
+        )
+
+        schema = self.library.lookup(
+            [
+                "Quiet evening, good food, maybe live music and a walk",
+                "A cozy ramen dinner followed by a jazz bar downtown",
+            ],
+            "en-US",
+        )
+
+        self.assertEqual(schema, _custom_schema())
+        self.assertEqual(SchemaLibraryEntry.objects.get().hits, 1)
+        self.assertEqual(library_stats()["hits"], 1)
+
+    def test_novel_couple_or_other_locale_misses(self):
+        descriptions = ["Sushi and karaoke all night", "Board games at home"]
+        self.library.remember(descriptions, "en-US", _custom_schema())
+
+        self.assertIsNone(
+            self.library.lookup(["Hiking at sunrise", "Picnic by the lake"], "en-US")
+        )
+        self.assertIsNone(self.library.lookup(descriptions, "fr-FR"))
+        self.assertEqual(library_stats()["misses"], 2)
+
+    def test_entries_keep_signatures_but_not_the_descriptions(self):
+        self.library.remember(
+            ["Sushi and karaoke all night", "Board games at home"],
+            "en-US",
+            _custom_schema(),
+        )
+
+        stored = json.dumps(
+            list(SchemaLibraryEntry.objects.values())[0], default=str
+        ).lower()
+        self.assertNotIn("karaoke", stored)
+        self.assertNotIn("board games", stored)
+
+    @override_settings(SCHEMA_LIBRARY_THRESHOLD=1.01)
+    def test_threshold_above_one_disables_reuse(self):
+        descriptions = ["Sushi and karaoke all night", "Board games at home"]
+        self.library.remember(descriptions, "en-US", _custom_schema())
+
+        self.assertIsNone(self.library.lookup(descriptions, "en-US"))
+
+    @patch.dict("os.environ", {"GEMINI_API_KEY": "test-key"}, clear=True)
+    @patch("planner.services._gemini_generate")
+    def test_generate_vote_questions_only_calls_gemini_for_novel_couples(
+        self, gemini_generate
+    ):
+        gemini_generate.return_value = json.dumps(_custom_schema())
+        plans = []
+        for _ in range(2):
+            plan = Plan.objects.create(
+                inviter_email="inviter@example.com",
+                invitee_email="invitee@example.com",
+            )
+            Participant.objects.create(
+                plan=plan,
+                email=plan.inviter_email,
+                ideal_date="Tapas, wine and dancing until late",
+                role=Participant.INVITER,
+            )
+            Participant.objects.create(
+                plan=plan,
+                email=plan.invitee_email,
+                ideal_date="A rooftop dinner with a view of the city",
+                role=Participant.INVITEE,
+            )
+            plans.append(plan)
+
+        with patch("planner.services.get_schema_library", return_value=self.library):
+            first = services.generate_vote_questions(plans[0])
+            second = services.generate_vote_questions(plans[1])
+
+        self.assertEqual(gemini_generate.call_count, 1)
+        self.assertEqual(first, second)
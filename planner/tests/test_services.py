@@ -2,6 +2,13 @@ from unittest.mock import patch
 
 from django.test import TestCase
 
+from planner.compatibility import (
+    aggregate_compatibility,
+    compromise_option,
+    overlap_score,
+    plan_compatibility,
+)
+from planner.constants import DEFAULT_GENERATED_QUESTIONS
 from planner.models import GeneratedVote, Participant, Plan, Vote
 from planner.services import _build_local_itinerary, generate_date_plan
 
@@ -125,6 +132,8 @@ class ServicesTests(TestCase):
         self.assertEqual(text, "A generated story")
         prompt = gemini_generate.call_args[0][0]
         self.assertIn("Locale preference: fr-FR", prompt)
+        self.assertIn("Overall compatibility:", prompt)
+        self.assertEqual(prompt.count("Cozy Italian spot"), 1)
 
     @patch.dict("os.environ", {"GEMINI_API_KEY": "gemini-key"}, clear=True)
     @patch("planner.services._gemini_generate", side_effect=RuntimeError("quota"))
@@ -168,3 +177,75 @@ class ServicesTests(TestCase):
         self.assertIn("Original plan text", prompt)
         self.assertIn("Refinement request from couple", prompt)
         self.assertIn("Less travel and quieter places", prompt)
+
+    def test_build_local_itinerary_tailors_steps_to_answers(self):
+        plan = self._create_plan_with_votes()
+
+        text = _build_local_itinerary(plan, "Gemini unavailable")
+
+        lines = text.splitlines()
+        self.assertIn("Reason: Gemini unavailable", lines[0])
+        self.assertEqual(len([line for line in lines if line.startswith("- ")]), 5)
+        self.assertIn("tapas", text)
+        self.assertIn("Austin, TX", text)
+
+    def test_build_local_itinerary_is_deterministic(self):
+        plan = self._create_plan_with_votes()
+
+        self.assertEqual(_build_local_itinerary(plan), _build_local_itinerary(plan))
+
+
+class CompatibilityTests(TestCase):
+    def test_compromise_prefers_option_both_partners_tolerate(self):
+        values = ("cozy", "mid", "fancy")
+
+        self.assertEqual(
+            compromise_option("budget_choice", values, "cozy", "fancy"), "mid"
+        )
+        self.assertEqual(
+            compromise_option("budget_choice", values, "mid", "mid"), "mid"
+        )
+
+    def test_overlap_score_is_one_for_identical_answers(self):
+        answers = {"dinner_choice": "sushi", "budget_choice": "mid"}
+
+        self.assertEqual(
+            overlap_score(DEFAULT_GENERATED_QUESTIONS, answers, dict(answers)), 1.0
+        )
+
+    def test_plan_compatibility_reports_agreement_and_compromises(self):
+        report = plan_compatibility(
+            DEFAULT_GENERATED_QUESTIONS,
+            {"budget_choice": "cozy", "dinner_choice": "sushi"},
+            {"budget_choice": "fancy", "dinner_choice": "sushi"},
+        )
+
+        questions = {question["id"]: question for question in report["questions"]}
+        self.assertEqual(questions["dinner_choice"]["agreement"], 1.0)
+        self.assertEqual(questions["dinner_choice"]["compromises"], [])
+        budget = questions["budget_choice"]
+        self.assertLess(budget["agreement"], 1.0)
+        self.assertEqual(budget["compromises"][0]["value"], "mid")
+        self.assertEqual(report["percent"], round(report["score"] * 100))
+
+    def test_aggregate_matches_per_couple_scores(self):
+        couples = [
+            (
+                DEFAULT_GENERATED_QUESTIONS,
+                {"budget_choice": "cozy", "dinner_choice": "sushi"},
+                {"budget_choice": "fancy", "dinner_choice": "italian"},
+            ),
+            (
+                DEFAULT_GENERATED_QUESTIONS,
+                {"budget_choice": "fancy", "dinner_choice": "sushi"},
+                {"budget_choice": "cozy", "dinner_choice": "sushi"},
+            ),
+        ]
+
+        summary = aggregate_compatibility(couples)
+
+        expected = sum(overlap_score(*couple) for couple in couples) / 2
+        self.assertEqual(summary["couples"], 2)
+        self.assertAlmostEqual(summary["mean_score"], round(expected, 3))
+        self.assertEqual(summary["questions"]["dinner_choice"]["match_rate"], 0.5)
+        self.assertEqual(summary["questions"]["budget_choice"]["couples"], 2)
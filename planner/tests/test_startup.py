@@ -0,0 +1,46 @@
+import os
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from planner import services
+from planner.warmup import profile_boot, warm_up
+
+
+class ColdStartTests(SimpleTestCase):
+    def test_boot_does_not_import_the_ai_sdk(self):
+        _boot_seconds, modules = profile_boot()
+
+        imported = {module for module, _self_us, _cumulative_us in modules}
+        self.assertIn("config.wsgi", imported)
+        self.assertNotIn("google.genai", imported)
+        self.assertFalse(
+            {module for module in imported if module.startswith("google.")}
+        )
+
+    # Wall-clock timing depends on the machine, so it only runs on request.
+    @skipUnless(
+        os.getenv("CHECK_COLD_START_BUDGET"),
+        "set CHECK_COLD_START_BUDGET=1 to time the boot",
+    )
+    def test_boot_stays_within_budget(self):
+        boot_seconds, _modules = profile_boot()
+
+        self.assertLess(boot_seconds, settings.COLD_START_BUDGET_SECONDS)
+
+    @override_settings(WARMUP_STAGES=["urls", "gazetteer"])
+    def test_warm_up_runs_configured_stages_in_order(self):
+        self.assertEqual(list(warm_up()), ["urls", "gazetteer"])
+        self.assertEqual(list(warm_up(["templates", "missing"])), ["templates"])
+
+    @patch("planner.services.importlib.import_module")
+    def test_genai_is_imported_on_first_use_only(self, import_module):
+        services._genai.cache_clear()
+        self.addCleanup(services._genai.cache_clear)
+
+        self.assertIs(services._genai(), import_module.return_value)
+        services._genai()
+
+        import_module.assert_called_once_with("google.genai")
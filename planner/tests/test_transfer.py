@@ -0,0 +1,164 @@
+import gzip
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from planner.models import GeneratedVote, Participant, Plan, Vote
+from planner.transfer import export_plans, import_plans
+
+
+class PlanTransferTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        for number in range(5):
+            plan = Plan.objects.create(
+                inviter_email="me@example.com",
+                invitee_email=f"partner{number}@example.com",
+                city="Seattle, WA",
+                ai_summary=f"Summary {number}",
+            )
+            inviter = Participant.objects.create(
+                plan=plan, email=plan.inviter_email, role=Participant.INVITER
+            )
+            invitee = Participant.objects.create(
+                plan=plan, email=plan.invitee_email, role=Participant.INVITEE
+            )
+            GeneratedVote.objects.create(participant=inviter, answers={"n": number})
+            if number == 0:
+                Vote.objects.create(
+                    participant=invitee,
+                    dinner_choice="sushi",
+                    activity_choice="music",
+                    sweet_choice="coffee",
+                    budget_choice="cozy",
+                )
+        self.old_created_at = timezone.now() - timedelta(days=400)
+        Plan.objects.update(created_at=self.old_created_at)
+
+    def _snapshot(self):
+        return sorted(
+            (
+                plan.invitee_email,
+                plan.ai_summary,
+                plan.created_at,
+                tuple(
+                    sorted(
+                        (str(person.token), person.role)
+                        for person in plan.participants.all()
+                    )
+                ),
+            )
+            for plan in Plan.objects.prefetch_related("participants")
+        )
+
+    def test_gzip_round_trip_restores_plans_answers_and_dates(self):
+        path = self.directory / "plans.jsonl.gz"
+        before = self._snapshot()
+        out = StringIO()
+
+        call_command(
+            "export_plans",
+            str(path),
+            batch_size=2,
+            include_tokens=True,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        Plan.objects.all().delete()
+        call_command(
+            "import_plans", str(path), batch_size=2, stdout=out, stderr=StringIO()
+        )
+
+        self.assertIn("exported=5", out.getvalue())
+        self.assertIn("imported=5 skipped=0", out.getvalue())
+        self.assertEqual(self._snapshot(), before)
+        legacy = GeneratedVote.objects.get(participant__email="partner0@example.com")
+        self.assertEqual(legacy.answers["dinner_choice"], "sushi")
+        self.assertEqual(GeneratedVote.objects.count(), 6)
+
+    def test_export_leaves_tokens_out_by_default(self):
+        path = self.directory / "plans.jsonl"
+        tokens = [
+            str(token) for token in Participant.objects.values_list("token", flat=True)
+        ]
+
+        call_command("export_plans", str(path), stdout=StringIO(), stderr=StringIO())
+        Plan.objects.all().delete()
+        out = StringIO()
+        call_command("import_plans", str(path), stdout=out, stderr=StringIO())
+
+        dump = path.read_text()
+        self.assertNotIn('"token"', dump)
+        self.assertFalse(any(token in dump for token in tokens))
+        self.assertIn("imported=5 skipped=0", out.getvalue())
+        self.assertEqual(Participant.objects.count(), 10)
+        self.assertFalse(Participant.objects.filter(token__in=tokens).exists())
+
+    def test_reimport_skips_plans_that_already_exist(self):
+        for include_tokens in (False, True):
+            with self.subTest(include_tokens=include_tokens):
+                path = self.directory / f"plans-{include_tokens}.jsonl"
+                call_command(
+                    "export_plans",
+                    str(path),
+                    include_tokens=include_tokens,
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+                out = StringIO()
+
+                call_command("import_plans", str(path), stdout=out, stderr=StringIO())
+
+                self.assertIn("imported=0 skipped=5", out.getvalue())
+                self.assertEqual(Plan.objects.count(), 5)
+
+    def test_repeated_plan_within_a_batch_is_imported_once(self):
+        for include_tokens in (False, True):
+            with self.subTest(include_tokens=include_tokens):
+                path = self.directory / f"plans-{include_tokens}.jsonl"
+                plan = Plan.objects.order_by("id").first()
+                with open(path, "w", encoding="utf-8") as stream:
+                    export_plans(
+                        stream,
+                        Plan.objects.filter(id=plan.id),
+                        include_tokens=include_tokens,
+                    )
+                record = path.read_text().splitlines()[0]
+                plan.delete()
+
+                imported, skipped = import_plans(
+                    StringIO(f"{record}\n{record}\n"), batch_size=10
+                )
+
+                self.assertEqual((imported, skipped), (1, 1))
+                self.assertEqual(Plan.objects.count(), 5)
+
+    def test_import_rejects_a_tampered_dump(self):
+        path = self.directory / "plans.jsonl.gz"
+        call_command("export_plans", str(path), stdout=StringIO(), stderr=StringIO())
+        with gzip.open(path, "rt", encoding="utf-8") as stream:
+            lines = stream.readlines()
+        Plan.objects.all().delete()
+
+        with gzip.open(path, "wt", encoding="utf-8") as stream:
+            stream.writelines(lines[1:])
+        with self.assertRaisesMessage(CommandError, "expected 5 records"):
+            call_command(
+                "import_plans", str(path), stdout=StringIO(), stderr=StringIO()
+            )
+
+        with gzip.open(path, "wt", encoding="utf-8") as stream:
+            stream.writelines(lines[:-1])
+        with self.assertRaisesMessage(CommandError, "no checksum trailer"):
+            call_command(
+                "import_plans", str(path), stdout=StringIO(), stderr=StringIO()
+            )
+        self.assertEqual(Plan.objects.count(), 0)
@@ -1,11 +1,24 @@
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from planner.models import GeneratedVote, Participant, Plan
-from planner.views import _format_story
+from planner.models import (
+    PLAN_UPDATE_ATTEMPTS,
+    DevicePlanLink,
+    GeneratedVote,
+    Participant,
+    Plan,
+    PlanConflict,
+)
+from planner.signals import describe_stats, description_changed
+from planner.views import SESSION_DEVICE_KEY, SESSION_TOKEN_KEY, _format_story
 
 User = get_user_model()
 
@@ -29,6 +42,9 @@ class FormatStoryTests(TestCase):
 
 
 class PlannerViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
     def _create_plan_with_participants(self):
         plan = Plan.objects.create(
             inviter_email="inviter@example.com",
@@ -295,6 +311,69 @@ class PlannerViewTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(GeneratedVote.objects.count(), 0)
 
+    def test_vote_post_describe_keeps_votes_when_nothing_changed(self):
+        plan, inviter, invitee = self._create_plan_with_participants()
+        inviter.ideal_date = "Dinner and dancing"
+        inviter.save(update_fields=["ideal_date"])
+        self._create_votes_for_both(inviter, invitee)
+        plan.ai_summary = "A lovely plan"
+        plan.save(update_fields=["ai_summary"])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("planner:vote", args=[inviter.token]),
+                {"action": "describe", "ideal_date": "  Dinner and dancing "},
+            )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(GeneratedVote.objects.count(), 2)
+        plan.refresh_from_db()
+        self.assertEqual(plan.ai_summary, "A lovely plan")
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("UPDATE", "DELETE"))
+            and "deviceplanlink" not in query["sql"]
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(describe_stats()["unchanged"], 1)
+
+    def test_vote_post_describe_change_is_atomic_and_signalled(self):
+        plan, inviter, invitee = self._create_plan_with_participants()
+        inviter.ideal_date = "Dinner and dancing"
+        inviter.save(update_fields=["ideal_date"])
+        self._create_votes_for_both(inviter, invitee)
+        plan.ai_summary = "A lovely plan"
+        plan.save(update_fields=["ai_summary"])
+        url = reverse("planner:vote", args=[inviter.token])
+        received = []
+        description_changed.connect(
+            lambda **kwargs: received.append(kwargs), weak=False, dispatch_uid="t"
+        )
+        self.addCleanup(description_changed.disconnect, dispatch_uid="t")
+
+        with (
+            patch(
+                "planner.views.Vote.objects.filter", side_effect=RuntimeError("boom")
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            self.client.post(url, {"action": "describe", "ideal_date": "Picnic"})
+        inviter.refresh_from_db()
+        self.assertEqual(inviter.ideal_date, "Dinner and dancing")
+        self.assertEqual(GeneratedVote.objects.count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"action": "describe", "ideal_date": "Picnic"})
+
+        plan.refresh_from_db()
+        self.assertEqual(plan.ai_summary, "")
+        self.assertEqual(GeneratedVote.objects.count(), 0)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["votes_cleared"], 2)
+        self.assertTrue(received[0]["summary_cleared"])
+        self.assertEqual(describe_stats()["votes_cleared"], 2)
+
     @override_settings(ENABLE_AI=True)
     @patch("planner.views.generate_date_plan")
     def test_results_post_does_not_generate_until_both_votes_exist(
@@ -390,3 +469,265 @@ class PlannerViewTests(TestCase):
         plan.refresh_from_db()
         self.assertEqual(plan.ai_summary, "")
         generate_date_plan.assert_not_called()
+
+    def test_compatibility_json_waits_for_both_votes(self):
+        _plan, inviter, invitee = self._create_plan_with_participants()
+        url = reverse("planner:compatibility", args=[inviter.token])
+
+        waiting = self.client.get(url).json()
+        self._create_votes_for_both(inviter, invitee)
+        ready = self.client.get(url).json()
+
+        self.assertEqual(waiting, {"ready": False})
+        self.assertTrue(ready["ready"])
+        self.assertEqual(len(ready["questions"]), 7)
+        self.assertIn("percent", ready)
+        self.assertFalse(DevicePlanLink.objects.exists())
+        self.assertNotIn(SESSION_DEVICE_KEY, self.client.session)
+
+    def test_compatibility_json_is_forbidden_for_other_accounts(self):
+        _plan, inviter, _invitee = self._create_plan_with_participants()
+        inviter.user = User.objects.create_user(username="owner@example.com")
+        inviter.save(update_fields=["user"])
+        self.client.force_login(User.objects.create_user(username="x@example.com"))
+
+        response = self.client.get(
+            reverse("planner:compatibility", args=[inviter.token])
+        )
+
+        self.assertEqual(response.status_code, 403)
+        home = self.client.get(reverse("planner:home"))
+        self.assertEqual(list(home.context["messages"]), [])
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, SESSION_DASHBOARD_PAGE_SIZE=5)
+@override_settings(ENABLE_AI=True, RATE_LIMIT_ENABLED=False)
+class PlanVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.plan = Plan.objects.create(
+            inviter_email="inviter@example.com", invitee_email="invitee@example.com"
+        )
+        self.inviter = Participant.objects.create(
+            plan=self.plan,
+            email=self.plan.inviter_email,
+            role=Participant.INVITER,
+            ideal_date="Jazz and tapas",
+        )
+        self.invitee = Participant.objects.create(
+            plan=self.plan,
+            email=self.plan.invitee_email,
+            role=Participant.INVITEE,
+            ideal_date="Museum and ramen",
+        )
+
+    def _vote_both(self):
+        for participant in (self.inviter, self.invitee):
+            GeneratedVote.objects.create(
+                participant=participant, answers={"dinner_choice": "sushi"}
+            )
+
+    def _bump(self, **fields):
+        Plan.objects.filter(pk=self.plan.pk).update(version=F("version") + 1, **fields)
+
+    def test_compare_and_set_refuses_stale_instances(self):
+        stale = Plan.objects.get(pk=self.plan.pk)
+        self.assertTrue(self.plan.compare_and_set(ai_summary="First"))
+
+        self.assertFalse(stale.compare_and_set(ai_summary="Stale"))
+        self.plan.refresh_from_db()
+        self.assertEqual((self.plan.ai_summary, self.plan.version), ("First", 1))
+
+    def test_update_with_retry_reloads_and_gives_up_eventually(self):
+        stale = Plan.objects.get(pk=self.plan.pk)
+        self._bump(ai_summary="Newer")
+
+        self.assertTrue(stale.update_with_retry(lambda plan: {"city": "Austin"}))
+        stale.refresh_from_db()
+        self.assertEqual((stale.city, stale.ai_summary), ("Austin", "Newer"))
+
+        def always_conflicts(plan):
+            self._bump()
+            return {"city": "Boston"}
+
+        with self.assertRaises(PlanConflict):
+            stale.update_with_retry(always_conflicts)
+
+    @patch("planner.views.generate_date_plan")
+    def test_generated_plan_is_dropped_when_votes_change_meanwhile(self, generate):
+        self._vote_both()
+
+        def slow_generation(plan, **kwargs):
+            # The partner re-votes while Gemini is still writing.
+            self._bump(ai_summary="")
+            return "Plan from old votes"
+
+        generate.side_effect = slow_generation
+
+        response = self.client.post(
+            reverse("planner:results", args=[self.inviter.token]), follow=True
+        )
+
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.ai_summary, "")
+        self.assertContains(response, "Your plan changed while this one")
+
+    @patch("planner.views.generate_vote_questions")
+    def test_questions_are_regenerated_after_a_description_changes(self, generate):
+        fresh = {"questions": [{"id": "dinner_choice", "text": "Fresh"}]}
+
+        def first_generation(plan, **kwargs):
+            generate.side_effect = lambda plan, **kwargs: fresh
+            self._bump(generated_questions={})
+            return {"questions": [{"id": "dinner_choice", "text": "Stale"}]}
+
+        generate.side_effect = first_generation
+
+        self.client.get(reverse("planner:vote", args=[self.inviter.token]))
+
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.generated_questions, fresh)
+        self.assertEqual(generate.call_count, 2)
+
+    @patch("planner.views.generate_vote_questions")
+    def test_vote_page_uses_default_questions_when_writes_keep_conflicting(
+        self, generate
+    ):
+        generate.return_value = {"questions": [{"id": "x", "text": "Never saved"}]}
+
+        with patch.object(Plan, "compare_and_set", return_value=False):
+            response = self.client.get(
+                reverse("planner:vote", args=[self.inviter.token])
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "What dinner vibe sounds best?")
+        self.assertEqual(generate.call_count, PLAN_UPDATE_ATTEMPTS)
+
+    def test_vote_and_describe_writes_do_not_compare_and_swap(self):
+        answers = {
+            "dinner_choice": "italian",
+            "activity_choice": "movie",
+            "sweet_choice": "dessert",
+            "budget_choice": "mid",
+            "mood_choice": "classic",
+            "duration_choice": "half",
+            "transport_choice": "mixed",
+        }
+        url = reverse("planner:vote", args=[self.inviter.token])
+
+        with patch.object(Plan, "compare_and_set", return_value=False):
+            voted = self.client.post(url, answers)
+            described = self.client.post(
+                url, {"action": "describe", "ideal_date": "Tapas and a late show"}
+            )
+
+        self.assertEqual((voted.status_code, described.status_code), (302, 302))
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.version, 2)
+
+    def test_saving_a_vote_bumps_the_version(self):
+        answers = {
+            "dinner_choice": "italian",
+            "activity_choice": "movie",
+            "sweet_choice": "dessert",
+            "budget_choice": "mid",
+            "mood_choice": "classic",
+            "duration_choice": "half",
+            "transport_choice": "mixed",
+        }
+
+        for _ in range(2):
+            self.client.post(
+                reverse("planner:vote", args=[self.inviter.token]), answers
+            )
+
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.version, 2)
+
+
+class SessionDashboardTests(TestCase):
+    def _create_plan(self, number):
+        plan = Plan.objects.create(
+            inviter_email="me@example.com",
+            invitee_email=f"partner{number}@example.com",
+        )
+        inviter = Participant.objects.create(
+            plan=plan, email=plan.inviter_email, role=Participant.INVITER
+        )
+        Participant.objects.create(
+            plan=plan, email=plan.invitee_email, role=Participant.INVITEE
+        )
+        return inviter
+
+    def _open(self, participant):
+        self.client.get(reverse("planner:vote", args=[participant.token]))
+
+    def _home_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("planner:home"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_dashboard_keeps_every_plan_and_pages_by_last_activity(self):
+        inviters = [self._create_plan(number) for number in range(25)]
+        for inviter in inviters:
+            self._open(inviter)
+        DevicePlanLink.objects.update(
+            last_seen_at=F("last_seen_at") - timedelta(hours=2)
+        )
+        self._open(inviters[0])
+
+        first_page = self.client.get(reverse("planner:home"))
+        cards = first_page.context["plan_cards"]
+        self.assertEqual(cards[0]["partner"].email, "partner0@example.com")
+        self.assertEqual(cards[1]["partner"].email, "partner24@example.com")
+        self.assertEqual(first_page.context["page_obj"].paginator.count, 25)
+
+        last_page = self.client.get(reverse("planner:home"), {"page": 5})
+        self.assertEqual(
+            [card["partner"].email for card in last_page.context["plan_cards"]],
+            [f"partner{number}@example.com" for number in (5, 4, 3, 2, 1)],
+        )
+        self.assertEqual(DevicePlanLink.objects.count(), 25)
+
+    def test_repeat_visits_within_the_touch_interval_do_not_write(self):
+        inviter = self._create_plan(1)
+        self._open(inviter)
+        first_seen = DevicePlanLink.objects.get().last_seen_at
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("planner:results", args=[inviter.token]))
+
+        self.assertFalse(
+            [query for query in queries if not query["sql"].startswith("SELECT")]
+        )
+        self.assertEqual(DevicePlanLink.objects.get().last_seen_at, first_seen)
+
+    def test_home_query_count_does_not_grow_with_saved_plans(self):
+        for number in range(3):
+            self._open(self._create_plan(number))
+        few = self._home_queries()
+
+        for number in range(3, 30):
+            self._open(self._create_plan(number))
+        many = self._home_queries()
+
+        self.assertEqual(few, many)
+
+    def test_legacy_token_list_is_moved_into_the_device_index(self):
+        older = self._create_plan(1)
+        newer = self._create_plan(2)
+        session = self.client.session
+        session[SESSION_TOKEN_KEY] = [str(newer.token), str(older.token), "bogus"]
+        session.save()
+
+        response = self.client.get(reverse("planner:home"))
+
+        self.assertEqual(
+            [card["partner"].email for card in response.context["plan_cards"]],
+            ["partner2@example.com", "partner1@example.com"],
+        )
+        self.assertNotIn(SESSION_TOKEN_KEY, self.client.session)
+        self.assertIn(SESSION_DEVICE_KEY, self.client.session)
+        self.assertEqual(response.context["connections"][0]["count"], 1)
@@ -0,0 +1,234 @@
+"""Streaming JSONL export and import of plans for support and analytics."""
+
+import gzip
+import hashlib
+import json
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import GeneratedVote, Participant, Plan
+from .retention import plan_record
+
+# The last line of every dump; it carries the record count and the SHA-256
+# of all record lines before it.
+TRAILER_KEY = "_end"
+
+
+class ChecksumMismatch(ValueError):
+    pass
+
+
+def open_dump(path, mode):
+    """Open ``path`` as text, through gzip when it ends in ``.gz``."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def export_plans(
+    stream, queryset=None, batch_size=1000, progress=None, include_tokens=False
+):
+    """Write one JSON line per plan to ``stream`` and a checksum trailer.
+
+    Plans are read with ``.iterator()`` so memory stays flat; ``progress``
+    is called with the running count after every ``batch_size`` plans.
+    Participant tokens are only written with ``include_tokens``, for dumps
+    that must restore working plan links. Returns ``(count, sha256)``.
+    """
+    queryset = Plan.objects.all() if queryset is None else queryset
+    plans = (
+        queryset.order_by("id")
+        .prefetch_related("participants__generated_vote", "participants__vote")
+        .iterator(chunk_size=batch_size)
+    )
+    digest = hashlib.sha256()
+    count = 0
+    for plan in plans:
+        line = json.dumps(
+            plan_record(plan, include_tokens), cls=DjangoJSONEncoder, sort_keys=True
+        )
+        line += "\n"
+        digest.update(line.encode())
+        stream.write(line)
+        count += 1
+        if progress and count % batch_size == 0:
+            progress(count)
+    stream.write(
+        json.dumps({TRAILER_KEY: {"count": count, "sha256": digest.hexdigest()}}) + "\n"
+    )
+    return count, digest.hexdigest()
+
+
+def _records(stream):
+    for line in stream:
+        if line.strip():
+            record = json.loads(line)
+            if TRAILER_KEY not in record:
+                yield record
+
+
+def verify_dump(stream):
+    """Check a dump against its trailer without loading it into memory.
+
+    Returns the record count or raises :class:`ChecksumMismatch`.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    trailer = None
+    for line in stream:
+        if not line.strip():
+            continue
+        if line.startswith(f'{{"{TRAILER_KEY}"'):
+            trailer = json.loads(line)[TRAILER_KEY]
+            continue
+        digest.update(line.encode())
+        count += 1
+    if trailer is None:
+        raise ChecksumMismatch("dump has no checksum trailer; was it truncated?")
+    if trailer["count"] != count or trailer["sha256"] != digest.hexdigest():
+        raise ChecksumMismatch(
+            f"expected {trailer['count']} records with sha256 {trailer['sha256']}, "
+            f"read {count} with {digest.hexdigest()}"
+        )
+    return count
+
+
+def _plan_key(created_at, inviter_email, invitee_email, people):
+    return (created_at, inviter_email, invitee_email, tuple(sorted(people)))
+
+
+def _identities(record):
+    # A plan is recognised by its participant tokens when the dump has
+    # them, otherwise by its creation time, emails and participant roles.
+    tokens = {person.get("token") for person in record["participants"]} - {None}
+    if tokens:
+        return tokens
+    people = ((person["role"], person["email"]) for person in record["participants"])
+    return {
+        _plan_key(
+            parse_datetime(record["created_at"]),
+            record["inviter_email"],
+            record["invitee_email"],
+            people,
+        )
+    }
+
+
+def _existing_identities(records):
+    tokens = [
+        person["token"]
+        for record in records
+        for person in record["participants"]
+        if person.get("token")
+    ]
+    existing = {
+        str(token)
+        for token in Participant.objects.filter(token__in=tokens).values_list(
+            "token", flat=True
+        )
+    }
+    dates = [parse_datetime(record["created_at"]) for record in records]
+    for plan in Plan.objects.filter(created_at__in=dates).prefetch_related(
+        "participants"
+    ):
+        people = ((person.role, person.email) for person in plan.participants.all())
+        existing.add(
+            _plan_key(plan.created_at, plan.inviter_email, plan.invitee_email, people)
+        )
+    return existing
+
+
+def _import_batch(records):
+    # Skip plans already in the database and repeats within this batch;
+    # either would otherwise hit the unique token and roll the batch back.
+    seen = _existing_identities(records)
+    fresh = []
+    for record in records:
+        identities = _identities(record)
+        if identities & seen:
+            continue
+        seen |= identities
+        fresh.append(record)
+    records = fresh
+    user_ids = {record["created_by_id"] for record in records} | {
+        person["user_id"] for record in records for person in record["participants"]
+    }
+    known_users = set(
+        get_user_model()
+        .objects.filter(id__in=user_ids - {None})
+        .values_list("id", flat=True)
+    )
+
+    plans = Plan.objects.bulk_create(
+        Plan(
+            created_by_id=record["created_by_id"]
+            if record["created_by_id"] in known_users
+            else None,
+            inviter_email=record["inviter_email"],
+            invitee_email=record["invitee_email"],
+            city=record["city"],
+            generated_questions=record["generated_questions"],
+            ai_summary=record["ai_summary"],
+        )
+        for record in records
+    )
+    # created_at is auto_now_add, so restore the exported value afterwards.
+    for plan, record in zip(plans, records):
+        plan.created_at = parse_datetime(record["created_at"])
+    Plan.objects.bulk_update(plans, ["created_at"])
+
+    pending = [
+        (
+            Participant(
+                plan=plan,
+                user_id=person["user_id"] if person["user_id"] in known_users else None,
+                email=person["email"],
+                role=person["role"],
+                ideal_date=person["ideal_date"],
+                token=person.get("token") or uuid.uuid4(),
+            ),
+            person["answers"],
+        )
+        for plan, record in zip(plans, records)
+        for person in record["participants"]
+    ]
+    Participant.objects.bulk_create(participant for participant, _answers in pending)
+    GeneratedVote.objects.bulk_create(
+        GeneratedVote(participant=participant, answers=answers)
+        for participant, answers in pending
+        if answers is not None
+    )
+    return len(records)
+
+
+def import_plans(stream, batch_size=1000, progress=None):
+    """Create plans from a dump in ``bulk_create`` batches, one transaction
+    per batch.
+
+    Plans that already exist, matched on participant tokens or, in dumps
+    without tokens, on creation time and emails, are skipped, as are
+    repeats within the dump, so re-running an interrupted import is safe. Legacy votes come back as generated
+    votes with the same answers. Returns ``(imported, skipped)``.
+    """
+    imported = skipped = 0
+    batch = []
+    for record in _records(stream):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            with transaction.atomic():
+                created = _import_batch(batch)
+            imported += created
+            skipped += len(batch) - created
+            batch = []
+            if progress:
+                progress(imported, skipped)
+    if batch:
+        with transaction.atomic():
+            created = _import_batch(batch)
+        imported += created
+        skipped += len(batch) - created
+    return imported, skipped
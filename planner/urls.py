@@ -4,19 +4,21 @@ from django.contrib.auth.views import (
     PasswordChangeDoneView,
     PasswordChangeView,
 )
-from django.urls import path
-from django.urls import reverse_lazy
+from django.urls import path, reverse_lazy
 
-from .views import HomeView, ResultsView, SignUpView, VoteView
+from .pagecache import cache_anonymous_page
+from .views import CompatibilityView, HomeView, ResultsView, SignUpView, VoteView
 
 app_name = "planner"
 
 urlpatterns = [
-    path("signup/", SignUpView.as_view(), name="signup"),
+    path("signup/", cache_anonymous_page(SignUpView.as_view()), name="signup"),
     path(
         "login/",
-        LoginView.as_view(
-            template_name="planner/login.html", redirect_authenticated_user=True
+        cache_anonymous_page(
+            LoginView.as_view(
+                template_name="planner/login.html", redirect_authenticated_user=True
+            )
         ),
         name="login",
     ),
@@ -31,12 +33,20 @@ urlpatterns = [
     ),
     path(
         "settings/password/done/",
-        PasswordChangeDoneView.as_view(
-            template_name="planner/password_change_done.html"
+        cache_anonymous_page(
+            PasswordChangeDoneView.as_view(
+                template_name="planner/password_change_done.html"
+            ),
+            allow_authenticated=True,
         ),
         name="password_change_done",
     ),
-    path("", HomeView.as_view(), name="home"),
+    path("", cache_anonymous_page(HomeView.as_view()), name="home"),
     path("vote/<uuid:token>/", VoteView.as_view(), name="vote"),
     path("results/<uuid:token>/", ResultsView.as_view(), name="results"),
+    path(
+        "results/<uuid:token>/compatibility.json",
+        CompatibilityView.as_view(),
+        name="compatibility",
+    ),
 ]
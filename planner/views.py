@@ -1,16 +1,26 @@
 """View layer for invite, voting, and results flows."""
 
+import uuid
 from collections.abc import Iterable
+from datetime import timedelta
 from urllib.parse import quote
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
+from django.core.paginator import Paginator
 from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Lower
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils import timezone
 from django.views import View
 
+from .analytics import rollup_vote
+from .db_routers import replica_reads
+from .deadlines import request_budget
 from .forms import (
     CreatePlanForm,
     GeneratedVoteForm,
@@ -18,20 +28,59 @@ from .forms import (
     RefinePlanForm,
     SignUpForm,
 )
-from .models import GeneratedVote, Participant, Plan, Vote
-from .services import generate_date_plan, generate_vote_questions
-
+from .idempotency import idempotent_post, new_key
+from .models import (
+    DevicePlanLink,
+    GeneratedVote,
+    Participant,
+    Plan,
+    PlanConflict,
+    Vote,
+)
+from .outbox import queue_email
+from .ratelimit import CREATE_INVITE, GENERATE, REFINE, check_rate_limit
+from .services import (
+    compatibility_report,
+    generate_date_plan,
+    generate_vote_questions,
+)
+from .signals import description_changed, record_unchanged_description
 
+# Legacy list of participant tokens; imported into the device index on the
+# next visit.
 SESSION_TOKEN_KEY = "planner_tokens"
+SESSION_DEVICE_KEY = "planner_device"
 INVITE_EMAIL_SUBJECT = "You have a Date Nite invite"
 INVITE_EMAIL_BODY_PREFIX = (
     "Your partner invited you to plan a date night. Open this link to vote: "
 )
 INVITE_CREATED_MESSAGE = (
-    "Invite created. Share the partner link below by email, message, or copy/paste."
+    "Invite created. An email to your partner is on its way. "
+    "You can also share the link below by message or copy/paste."
 )
 
 
+def _plan_changed_warning(request):
+    # A generation finished after the votes or descriptions it was based on
+    # changed; its result was dropped rather than saved over the newer state.
+    messages.warning(
+        request,
+        "Your plan changed while this one was being written, so it was not "
+        "saved. Generate again to use the latest votes.",
+    )
+
+
+def _rate_limited_response(request, retry_after, back_url):
+    response = render(
+        request,
+        "planner/rate_limited.html",
+        {"retry_after": retry_after, "back_url": back_url},
+        status=429,
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
 def _normalize_email(value: str | None) -> str:
     return (value or "").strip().lower()
 
@@ -78,7 +127,7 @@ def _load_accessible_participant(request, token):
     participant = get_object_or_404(
         Participant.objects.select_related("plan", "user"), token=token
     )
-    _remember_session_token(request, participant.token)
+    _remember_participant(request, participant)
     participant = _claim_participant_for_user(request, participant)
     access_response = _enforce_participant_access(request, participant)
     if access_response:
@@ -181,9 +230,14 @@ def _claim_participant_for_user(request, participant):
         participant.role == Participant.INVITER
         and participant.plan.created_by_id is None
     ):
-        participant.plan.created_by = request.user
-        participant.plan.save(update_fields=["created_by"])
-        updated = True
+        # Ownership is not an input to generation, so claim it with a
+        # conditional update that leaves the version alone.
+        plan = participant.plan
+        if Plan.objects.filter(pk=plan.pk, created_by__isnull=True).update(
+            created_by=request.user
+        ):
+            plan.created_by = request.user
+            updated = True
 
     if updated:
         messages.info(
@@ -193,10 +247,15 @@ def _claim_participant_for_user(request, participant):
     return participant
 
 
+def _can_access(request, participant) -> bool:
+    """Whether this request may see ``participant``'s plan; no side effects."""
+    return participant.user_id is None or (
+        request.user.is_authenticated and request.user.pk == participant.user_id
+    )
+
+
 def _enforce_participant_access(request, participant):
-    if participant.user_id is None:
-        return None
-    if request.user.is_authenticated and request.user.pk == participant.user_id:
+    if _can_access(request, participant):
         return None
     if not request.user.is_authenticated:
         messages.info(request, "Sign in to access your saved date invite.")
@@ -205,61 +264,182 @@ def _enforce_participant_access(request, participant):
     return redirect("planner:home")
 
 
-def _session_tokens(request):
+def _legacy_session_tokens(request):
     tokens = request.session.get(SESSION_TOKEN_KEY, [])
     return tokens if isinstance(tokens, list) else []
 
 
-def _remember_session_token(request, token):
-    token_value = str(token)
-    tokens = _session_tokens(request)
-    if token_value not in tokens:
-        request.session[SESSION_TOKEN_KEY] = [token_value] + tokens[:19]
+def _import_legacy_tokens(request, device_key):
+    # Sessions from before the device index kept up to 20 tokens, newest
+    # first; move them over once, keeping their order.
+    tokens = []
+    for value in _legacy_session_tokens(request):
+        try:
+            tokens.append(uuid.UUID(str(value)))
+        except ValueError:
+            continue
+    request.session.pop(SESSION_TOKEN_KEY, None)
+    ids_by_token = dict(
+        Participant.objects.filter(token__in=tokens).values_list("token", "id")
+    )
+    now = timezone.now()
+    links = [
+        DevicePlanLink(
+            device_key=device_key,
+            participant_id=ids_by_token[token],
+            last_seen_at=now - timedelta(microseconds=position),
+        )
+        for position, token in enumerate(tokens)
+        if token in ids_by_token
+    ]
+    DevicePlanLink.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def _device_key(request, create=False):
+    device_key = request.session.get(SESSION_DEVICE_KEY)
+    if not device_key and (create or SESSION_TOKEN_KEY in request.session):
+        device_key = uuid.uuid4().hex
+        request.session[SESSION_DEVICE_KEY] = device_key
+    if device_key and SESSION_TOKEN_KEY in request.session:
+        _import_legacy_tokens(request, device_key)
+    return device_key
+
+
+def _remember_participant(request, participant):
+    """Record that this device opened ``participant``'s link.
+
+    The last-seen time is only refreshed once it is
+    ``DEVICE_LINK_TOUCH_SECONDS`` old, so repeat visits stay read-only and
+    keep reading from the replica.
+    """
+    device_key = _device_key(request, create=True)
+    now = timezone.now()
+    last_seen_at = (
+        DevicePlanLink.objects.filter(device_key=device_key, participant=participant)
+        .values_list("last_seen_at", flat=True)
+        .first()
+    )
+    if last_seen_at is None:
+        DevicePlanLink.objects.bulk_create(
+            [
+                DevicePlanLink(
+                    device_key=device_key, participant=participant, last_seen_at=now
+                )
+            ],
+            ignore_conflicts=True,
+        )
+    elif last_seen_at <= now - timedelta(seconds=settings.DEVICE_LINK_TOUCH_SECONDS):
+        DevicePlanLink.objects.filter(
+            device_key=device_key, participant=participant
+        ).update(last_seen_at=now)
+
+
+def _change_description(participant, ideal_date):
+    """Save a new ideal date and clear the questions, votes and plan derived
+    from the old one, as a single transaction."""
+    plan = participant.plan
+    with transaction.atomic():
+        summary_cleared = bool(plan.ai_summary)
+        participant.ideal_date = ideal_date
+        participant.save(update_fields=["ideal_date"])
+        # The ids let analytics subtract these votes after commit; a vote
+        # saved in between is still deleted and left to the rollup job.
+        vote_ids = {
+            "generated": list(
+                GeneratedVote.objects.filter(participant__plan=plan).values_list(
+                    "id", flat=True
+                )
+            ),
+            "legacy": list(
+                Vote.objects.filter(participant__plan=plan).values_list("id", flat=True)
+            ),
+        }
+        votes_cleared = GeneratedVote.objects.filter(participant__plan=plan).delete()[0]
+        votes_cleared += Vote.objects.filter(participant__plan=plan).delete()[0]
+        # Always bump the version so in-flight generations notice.
+        plan.bump(generated_questions={}, ai_summary="")
+        transaction.on_commit(
+            lambda: description_changed.send(
+                sender=Plan,
+                plan=plan,
+                participant=participant,
+                votes_cleared=votes_cleared,
+                vote_ids=vote_ids,
+                summary_cleared=summary_cleared,
+            )
+        )
 
 
 def _build_session_dashboard(request):
-    tokens = _session_tokens(request)
-    if not tokens:
-        return [], []
+    device_key = _device_key(request)
+    if not device_key:
+        return [], [], None
+
+    with replica_reads():
+        return _session_dashboard_for_device(device_key, request.GET.get("page"))
+
 
-    participants = (
-        Participant.objects.filter(token__in=tokens)
-        .select_related("plan", "user")
+def _session_dashboard_for_device(device_key, page_number=None):
+    """One page of the device's plans, most recently opened first.
+
+    The query count is fixed however many plans the device has seen.
+    """
+    plans = (
+        Plan.objects.filter(participants__device_links__device_key=device_key)
+        .annotate(last_seen_at=Max("participants__device_links__last_seen_at"))
         .prefetch_related(
-            "plan__participants__generated_vote",
-            "plan__participants__vote",
-            "plan__participants__user",
+            "participants__generated_vote",
+            "participants__vote",
+            "participants__user",
         )
+        .order_by("-last_seen_at", "-id")
+    )
+    page = Paginator(plans, settings.SESSION_DASHBOARD_PAGE_SIZE).get_page(page_number)
+    mine = set(
+        DevicePlanLink.objects.filter(
+            device_key=device_key, participant__plan__in=[plan.id for plan in page]
+        ).values_list("participant_id", flat=True)
     )
 
     cards = []
-    connections = {}
-    seen_plan_ids = set()
-
-    for my_participant in participants:
-        plan = my_participant.plan
-        if plan.id in seen_plan_ids:
-            continue
-        seen_plan_ids.add(plan.id)
-
+    for plan in page:
         all_people = list(plan.participants.all())
+        my_participant = next(
+            (person for person in all_people if person.id in mine), None
+        )
         partner = next(
-            (person for person in all_people if person.id != my_participant.id), None
+            (person for person in all_people if person is not my_participant), None
         )
-        if not partner:
+        if not my_participant or not partner:
             continue
-
         cards.append(_plan_card(plan, my_participant.token, partner, all_people))
 
-        partner_key = _normalize_email(partner.email)
-        _add_connection(connections, partner_key, partner.email, plan)
-
-    sorted_connections = _sorted_connections(connections)
-    cards.sort(key=lambda item: item["plan"].created_at, reverse=True)
-    return cards, sorted_connections
+    # Partners across every plan on the device, aggregated in the database.
+    device_plans = Plan.objects.filter(
+        participants__device_links__device_key=device_key
+    ).values("id")
+    partners = (
+        Participant.objects.filter(plan__in=device_plans)
+        .exclude(device_links__device_key=device_key)
+        .annotate(key=Lower("email"))
+        .values("key")
+        .annotate(
+            name=Min("email"),
+            count=Count("plan", distinct=True),
+            last_created_at=Max("plan__created_at"),
+        )
+        .order_by("-last_created_at")[: settings.SESSION_DASHBOARD_PAGE_SIZE]
+    )
+    connections = [{"name": row["name"], "count": row["count"]} for row in partners]
+    return cards, connections, page
 
 
 def _build_user_dashboard(user):
+    with replica_reads():
+        return _user_dashboard(user)
+
+
+def _user_dashboard(user):
     plans = (
         Plan.objects.filter(participants__user=user)
         .distinct()
@@ -325,9 +505,10 @@ class HomeView(View):
     def _build_context(self, request, form=None):
         if request.user.is_authenticated:
             cards, connections = _build_user_dashboard(request.user)
+            page = None
             initial_inviter_email = request.user.email
         else:
-            cards, connections = _build_session_dashboard(request)
+            cards, connections, page = _build_session_dashboard(request)
             initial_inviter_email = ""
 
         return {
@@ -335,12 +516,17 @@ class HomeView(View):
             or CreatePlanForm(initial={"inviter_email": initial_inviter_email}),
             "plan_cards": cards,
             "connections": connections,
+            "page_obj": page,
         }
 
     def get(self, request):
         return render(request, self.template_name, self._build_context(request))
 
     def post(self, request):
+        retry_after = check_rate_limit(request, CREATE_INVITE)
+        if retry_after:
+            return _rate_limited_response(request, retry_after, reverse("planner:home"))
+
         form = CreatePlanForm(request.POST)
         inviter_email = _normalize_email(form.data.get("inviter_email"))
         account_email = (
@@ -369,14 +555,23 @@ class HomeView(View):
                 email=plan.inviter_email,
                 role=Participant.INVITER,
             )
-            Participant.objects.create(
+            invitee = Participant.objects.create(
                 plan=plan,
                 email=plan.invitee_email,
                 role=Participant.INVITEE,
             )
+            invitee_link = request.build_absolute_uri(
+                reverse("planner:vote", kwargs={"token": invitee.token})
+            )
+            queue_email(
+                plan.invitee_email,
+                INVITE_EMAIL_SUBJECT,
+                f"{INVITE_EMAIL_BODY_PREFIX}{invitee_link}",
+                plan=plan,
+            )
 
         messages.success(request, INVITE_CREATED_MESSAGE)
-        _remember_session_token(request, inviter.token)
+        _remember_participant(request, inviter)
         return redirect("planner:vote", token=inviter.token)
 
 
@@ -400,17 +595,29 @@ class VoteView(View):
             invitee_link = _invitee_vote_link(request, plan)
             invite_gmail_link = _invite_gmail_link(plan.invitee_email, invitee_link)
 
-        descriptions_ready = self._all_descriptions_submitted(plan)
+        locale_hint = request.headers.get("Accept-Language", "en-US")
 
-        has_schema = isinstance(plan.generated_questions, dict) and bool(
-            plan.generated_questions.get("questions")
-        )
-        if descriptions_ready and not has_schema:
-            locale_hint = request.headers.get("Accept-Language", "en-US")
-            plan.generated_questions = generate_vote_questions(
-                plan, locale_hint=locale_hint
+        def questions_change(current):
+            has_schema = isinstance(current.generated_questions, dict) and bool(
+                current.generated_questions.get("questions")
             )
-            plan.save(update_fields=["generated_questions"])
+            if has_schema or not self._all_descriptions_submitted(current):
+                return None
+            return {
+                "generated_questions": generate_vote_questions(
+                    current, locale_hint=locale_hint
+                )
+            }
+
+        # If a description changes while questions are generated, the write
+        # conflicts and the questions are regenerated from the new text.
+        try:
+            plan.update_with_retry(questions_change)
+        except PlanConflict:
+            # The descriptions kept changing; vote on the default questions
+            # (the form falls back to them) and generate on a later visit.
+            plan.generated_questions = {}
+        descriptions_ready = self._all_descriptions_submitted(plan)
 
         if not (participant.ideal_date or "").strip():
             return {
@@ -419,6 +626,7 @@ class VoteView(View):
                 "ideal_form": ideal_form or IdealDateForm(),
                 "invitee_link": invitee_link,
                 "invite_gmail_link": invite_gmail_link,
+                "idempotency_key": new_key(),
             }
 
         if not descriptions_ready:
@@ -429,6 +637,7 @@ class VoteView(View):
                 or IdealDateForm(initial={"ideal_date": participant.ideal_date}),
                 "invitee_link": invitee_link,
                 "invite_gmail_link": invite_gmail_link,
+                "idempotency_key": new_key(),
             }
 
         existing_vote = getattr(participant, "generated_vote", None)
@@ -442,8 +651,10 @@ class VoteView(View):
             ),
             "invitee_link": invitee_link,
             "invite_gmail_link": invite_gmail_link,
+            "idempotency_key": new_key(),
         }
 
+    @request_budget("vote")
     def get(self, request, token):
         participant, access_response = _load_accessible_participant(request, token)
         if access_response:
@@ -452,6 +663,8 @@ class VoteView(View):
         context = self._build_vote_context(request, participant)
         return render(request, self.template_name, context)
 
+    @idempotent_post("vote")
+    @request_budget("vote")
     def post(self, request, token):
         participant, access_response = _load_accessible_participant(request, token)
         if access_response:
@@ -466,15 +679,14 @@ class VoteView(View):
                 )
                 return render(request, self.template_name, context)
 
-            participant.ideal_date = ideal_form.cleaned_data["ideal_date"].strip()
-            participant.save(update_fields=["ideal_date"])
-            plan = participant.plan
-            participant_ids = list(plan.participants.values_list("id", flat=True))
-            GeneratedVote.objects.filter(participant_id__in=participant_ids).delete()
-            Vote.objects.filter(participant_id__in=participant_ids).delete()
-            plan.generated_questions = {}
-            plan.ai_summary = ""
-            plan.save(update_fields=["generated_questions", "ai_summary"])
+            ideal_date = ideal_form.cleaned_data["ideal_date"].strip()
+            if ideal_date == (participant.ideal_date or "").strip():
+                # Keep both partners' votes when nothing changed.
+                record_unchanged_description()
+                messages.info(request, "Your ideal date is unchanged.")
+                return redirect("planner:vote", token=participant.token)
+
+            _change_description(participant, ideal_date)
             messages.success(
                 request, "Saved. Once both descriptions are in, your questions unlock."
             )
@@ -495,13 +707,16 @@ class VoteView(View):
             context = self._build_vote_context(request, participant, vote_form=form)
             return render(request, self.template_name, context)
 
-        GeneratedVote.objects.update_or_create(
-            participant=participant,
-            defaults={"answers": form.cleaned_answers()},
-        )
-        if participant.plan.ai_summary:
-            participant.plan.ai_summary = ""
-            participant.plan.save(update_fields=["ai_summary"])
+        with transaction.atomic():
+            vote, _created = GeneratedVote.objects.update_or_create(
+                participant=participant,
+                defaults={"answers": form.cleaned_answers()},
+            )
+            rollup_vote(vote)
+            # Clear the summary and bump the version even when there is no
+            # summary yet, so a plan being generated from the old votes is
+            # not saved over the new ones.
+            participant.plan.bump(ai_summary="")
         messages.success(request, "Your choices are saved.")
         return redirect("planner:results", token=participant.token)
 
@@ -565,6 +780,7 @@ class ResultsView(View):
             "ai_enabled": settings.ENABLE_AI,
             "story": _format_story(plan.ai_summary),
             "refine_form": RefinePlanForm(),
+            "idempotency_key": new_key(),
         }
 
     def get(self, request, token):
@@ -572,9 +788,12 @@ class ResultsView(View):
         if access_response:
             return access_response
 
-        context = self._build_context(request, participant)
-        return render(request, self.template_name, context)
+        with replica_reads():
+            context = self._build_context(request, participant)
+            return render(request, self.template_name, context)
 
+    @idempotent_post("generate")
+    @request_budget("results")
     def post(self, request, token):
         participant, access_response = _load_accessible_participant(request, token)
         if access_response:
@@ -602,18 +821,50 @@ class ResultsView(View):
             if not plan.ai_summary:
                 messages.warning(request, "Generate a first plan before refining it.")
                 return redirect("planner:results", token=participant.token)
+            retry_after = check_rate_limit(request, REFINE, plan=plan)
+            if retry_after:
+                return _rate_limited_response(
+                    request, retry_after, request.get_full_path()
+                )
 
-            plan.ai_summary = generate_date_plan(
+            summary = generate_date_plan(
                 plan,
                 locale_hint=locale_hint,
                 feedback=refine_form.cleaned_data["feedback"],
                 previous_summary=plan.ai_summary,
             )
-            plan.save(update_fields=["ai_summary"])
-            messages.success(request, "Plan refined based on your feedback.")
+            if plan.compare_and_set(ai_summary=summary):
+                messages.success(request, "Plan refined based on your feedback.")
+            else:
+                _plan_changed_warning(request)
             return redirect("planner:results", token=participant.token)
 
-        plan.ai_summary = generate_date_plan(plan, locale_hint=locale_hint)
-        plan.save(update_fields=["ai_summary"])
-        messages.success(request, "AI plan generated.")
+        retry_after = check_rate_limit(request, GENERATE, plan=plan)
+        if retry_after:
+            return _rate_limited_response(request, retry_after, request.get_full_path())
+
+        summary = generate_date_plan(plan, locale_hint=locale_hint)
+        if plan.compare_and_set(ai_summary=summary):
+            messages.success(request, "AI plan generated.")
+        else:
+            _plan_changed_warning(request)
         return redirect("planner:results", token=participant.token)
+
+
+class CompatibilityView(View):
+    """JSON compatibility report for a plan, computed locally without AI."""
+
+    def get(self, request, token):
+        # A read-only JSON endpoint: no device link, account claim or
+        # flashed message, unlike the HTML pages.
+        participant = get_object_or_404(
+            Participant.objects.select_related("plan"), token=token
+        )
+        if not _can_access(request, participant):
+            return JsonResponse({"detail": "forbidden"}, status=403)
+
+        with replica_reads():
+            report = compatibility_report(participant.plan)
+        if report is None:
+            return JsonResponse({"ready": False})
+        return JsonResponse({"ready": True, **report})
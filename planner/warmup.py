@@ -0,0 +1,107 @@
+"""Measure and shorten worker cold starts."""
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+BOOT_SNIPPET = (
+    "import os, time\n"
+    "started = time.perf_counter()\n"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')\n"
+    "from config.wsgi import application\n"
+    "print(f'boot_seconds={time.perf_counter() - started:.6f}')\n"
+)
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def _warm_urls():
+    from django.urls import reverse
+
+    # Imports every view module and builds the reverse lookup tables.
+    reverse("planner:home")
+
+
+def _warm_templates():
+    from django.template.loader import get_template
+
+    from .assets import available_font_faces, critical_css
+
+    for name in ("home", "vote", "results", "login", "signup"):
+        get_template(f"planner/{name}.html")
+    critical_css()
+    available_font_faces()
+
+
+def _warm_gazetteer():
+    from .localization import _gazetteer
+
+    _gazetteer()
+
+
+def _warm_ai():
+    from .services import _genai
+
+    _genai()
+
+
+def _warm_database():
+    from django.db import connection
+
+    connection.ensure_connection()
+
+
+STAGES = {
+    "urls": _warm_urls,
+    "templates": _warm_templates,
+    "gazetteer": _warm_gazetteer,
+    "ai": _warm_ai,
+    "database": _warm_database,
+}
+
+
+def warm_up(stages=None):
+    """Run warm-up stages in order and return ``{stage: seconds}``.
+
+    Defaults to ``WARMUP_STAGES``. Unknown stage names are skipped.
+    """
+    timings = {}
+    for name in settings.WARMUP_STAGES if stages is None else stages:
+        stage = STAGES.get(name)
+        if stage is None:
+            continue
+        started = time.perf_counter()
+        stage()
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def profile_boot(python=None, env=None):
+    """Boot the app in a fresh interpreter under ``-X importtime``.
+
+    Returns ``(boot_seconds, modules)`` where ``modules`` is a list of
+    ``(module, self_us, cumulative_us)`` in import order.
+    """
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", BOOT_SNIPPET],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us)))
+    boot_seconds = 0.0
+    for line in result.stdout.splitlines():
+        if line.startswith("boot_seconds="):
+            boot_seconds = float(line.partition("=")[2])
+    return boot_seconds, modules